@@ -0,0 +1,32 @@
+import os
+import sys
+import argparse
+
+# Ensure we can import the dnd package from the project root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dnd.core.snapshot import SRDSnapshot, DEFAULT_SNAPSHOT_FILENAME
+
+DEFAULT_OUTPUT = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '.dnd_cache', DEFAULT_SNAPSHOT_FILENAME))
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Ingest a local SRD JSON dump (directory or tarball) into the offline snapshot store.")
+    parser.add_argument("source", help="Path to the dump directory or .tar/.tar.gz file (e.g. a 5e-database checkout)")
+    parser.add_argument("--out", default=os.environ.get("DND_SRD_SNAPSHOT", DEFAULT_OUTPUT),
+                        help=f"Snapshot file to write (default: {DEFAULT_OUTPUT})")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"Source not found: {args.source}")
+        sys.exit(1)
+
+    print(f"--- Ingesting SRD dump: {args.source} ---")
+    snapshot = SRDSnapshot.ingest(args.source, args.out)
+    for category in snapshot.categories():
+        print(f"  {category}: {snapshot.get_category_items(category)['count']} entries")
+    print(f"✅ Snapshot v{snapshot.version} written to {args.out}")
+
+if __name__ == "__main__":
+    main()
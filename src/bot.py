@@ -19,9 +19,12 @@ if not os.environ.get("SLACK_BOT_TOKEN") or not os.environ.get("SLACK_APP_TOKEN"
 import dm_utils
 import dnd_bridge
 import common_tools
+import llm_bridge
 import re
-from slack_bolt import App
-from slack_bolt.adapter.socket_mode import SocketModeHandler
+import asyncio
+from slack_bolt.async_app import AsyncApp
+from slack_bolt.adapter.socket_mode.async_handler import AsyncSocketModeHandler
+from slack_sdk import WebClient
 import google.genai as genai
 from google.genai import types
 
@@ -29,14 +32,16 @@ from google.genai import types
 # Client init moved to llm_bridge call later
 
 # Setup Slack
-# Setup Slack
-app = App(token=os.environ["SLACK_BOT_TOKEN"])
+# Handlers run on the event loop; tools run on worker threads and use the
+# blocking web_client instead of app.client
+app = AsyncApp(token=os.environ["SLACK_BOT_TOKEN"])
+web_client = WebClient(token=os.environ["SLACK_BOT_TOKEN"])
 
 # Fetch Bot Identity Global
 BOT_NAME = "Dungeon Master"
 BOT_ID = None
 try:
-    auth_res = app.client.auth_test()
+    auth_res = web_client.auth_test()
     BOT_ID = auth_res["user_id"]
     BOT_NAME = auth_res["user"]
     print(f"🤖 Bot Identity: {BOT_NAME} ({BOT_ID})")
@@ -61,7 +66,8 @@ def roll_dice(expression: str, purpose: str, is_secret: bool = False) -> str:
     log_type = "SECRET ROLL" if is_secret else "PUBLIC ROLL"
     
     log_message = f"**{log_type}** | Purpose: {purpose} | Result: {result['total']} ({result['rolls']} {result['modifier']})"
-    dm_utils.log_to_file(log_file, log_message)
+    dm_utils.log_to_file(log_file, log_message, event_type="roll", secret=is_secret,
+                         expression=expression, purpose=purpose, total=result['total'])
     
     return f"Rolled {expression} for {purpose}. Result: {result['total']}"
 
@@ -74,9 +80,10 @@ def log_event(message: str, is_secret: bool = False) -> str:
     session_log, secrets_log = dm_utils.get_log_paths()
     log_file = secrets_log if is_secret else session_log
     prefix = "[SECRET]" if is_secret else "[PUBLIC]"
-    dm_utils.log_to_file(log_file, f"{prefix} {message}")
+    dm_utils.log_to_file(log_file, f"{prefix} {message}", event_type="secret" if is_secret else "narration", secret=is_secret)
     return "Logged event."
 
+@llm_bridge.declare_tool(side_effects=False)
 def lookup_rule(query: str) -> str:
     """
     [DEPRECATED: Use search_dnd_rules instead if possible]
@@ -87,6 +94,7 @@ def lookup_rule(query: str) -> str:
     return dm_utils.search_rules(query, rules_path)
 
 # --- New D&D API Tools ---
+@llm_bridge.declare_tool(side_effects=False)
 def search_dnd_rules(query: str) -> dict:
     """
     Search the official D&D 5e API for rules, spells, monsters, and items.
@@ -95,6 +103,7 @@ def search_dnd_rules(query: str) -> dict:
     """
     return dnd_bridge.search_dnd_rules(query)
 
+@llm_bridge.declare_tool(side_effects=False)
 def verify_dnd_statement(statement: str) -> dict:
     """
     Check if a D&D rule statement is true using the API.
@@ -102,6 +111,7 @@ def verify_dnd_statement(statement: str) -> dict:
     """
     return dnd_bridge.verify_dnd_statement(statement)
 
+@llm_bridge.declare_tool(side_effects=False)
 def find_monster_by_cr(min_cr: float, max_cr: float) -> dict:
     """
     Find monsters within a CR range.
@@ -124,6 +134,7 @@ def request_player_roll(check_type: str, dc: int, consequence: str) -> str:
     """
     return dm_utils.request_player_roll_logic(check_type, dc, consequence)
 
+@llm_bridge.declare_tool(side_effects=False)
 def read_campaign_log(log_type: str) -> str:
     """
     Reads a campaign log file ('session', 'secrets', or 'world') to recall past events.
@@ -147,7 +158,7 @@ def send_dm(character_name: str, message: str) -> str:
         return f"Error: Could not find player for character '{character_name}'. Have they registered with `!iam`?"
         
     try:
-        app.client.chat_postMessage(channel=user_id, text=message)
+        web_client.chat_postMessage(channel=user_id, text=message)
         return f"Successfully sent private message to {character_name}."
     except Exception as e:
         return f"Failed to send DM: {e}"
@@ -182,6 +193,7 @@ def generate_scene_image(image_description: str) -> str:
     result = dm_utils.propose_image(image_description)
     return f"{result}\nTell the user: 'I have a visual for this. Type `!show` to see it.'"
 
+@llm_bridge.declare_tool(side_effects=False)
 def validate_action(action: str, character_name: str) -> str:
     """
     Validates a player's proposed action against the rules and their character state.
@@ -206,6 +218,7 @@ def submit_character_sheet(character_name: str, details: str) -> str:
     """
     return dm_utils.save_character_sheet(character_name, details)
 
+@llm_bridge.declare_tool(side_effects=False)
 def generate_name(race: str = "any", count: int = 1) -> str:
     """
     Generates random fantasy names for characters, locations, or items.
@@ -240,7 +253,9 @@ tools_list = [
     generate_name,
     common_tools.lookup_past_session, # NEW Deep Memory
     common_tools.initialize_combat,
-    common_tools.track_combat_change
+    common_tools.track_combat_change,
+    common_tools.track_combat_changes,
+    common_tools.end_combat
 ]
 
 # Load System Prompt
@@ -259,6 +274,52 @@ engine = GameEngine(
     tools_list=tools_list
 )
 
+from core import streaming
+
+# Slack truncates long message text; longer replies continue in a new message
+SLACK_MESSAGE_LIMIT = 3900
+
+async def reply_with_stream(say, **turn) -> str:
+    """
+    Posts the engine's reply to a turn, editing the message as text streams in.
+    turn: The keyword arguments of engine.process_message.
+    Returns the full reply text.
+    """
+    if not streaming.STREAMING_ENABLED:
+        response_text = await engine.process_message_async(**turn)
+        if response_text is None:
+            # Answered as part of another player's turn (see core.scheduler)
+            return ""
+        await say(response_text)
+        return response_text
+
+    async def post(text):
+        response = await say(text)
+        return (response["channel"], response["ts"])
+
+    async def edit(handle, text):
+        await app.client.chat_update(channel=handle[0], ts=handle[1], text=text)
+
+    buffer = streaming.StreamBuffer(SLACK_MESSAGE_LIMIT)
+    posted = []
+    # Placeholder right away, so players see the DM is writing
+    await streaming.render_pages_async(buffer.pages(), posted, post, edit)
+    finished = False
+    try:
+        async for delta in engine.process_message_stream_async(**turn):
+            buffer.add(delta)
+            if buffer.due():
+                await streaming.render_pages_async(buffer.pages(), posted, post, edit)
+        finished = True
+    finally:
+        if finished and not buffer.text:
+            # Answered as part of another player's turn (see core.scheduler)
+            for handle, _ in posted:
+                await app.client.chat_delete(channel=handle[0], ts=handle[1])
+        else:
+            await streaming.render_pages_async(buffer.pages(final=True), posted, post, edit)
+    return buffer.text
+
 # --- Slack Handlers ---
 
 # Function to process attachments (Images) for Slack
@@ -294,7 +355,7 @@ def process_attachments(event_data, logger):
     return parts
 
 @app.message(re.compile("^!help"))
-def handle_help_command(message, say):
+async def handle_help_command(message, say):
     """
     Lists available commands.
     """
@@ -315,15 +376,15 @@ def handle_help_command(message, say):
         "`!admin allow <@user>` - Allow a user to interact with the bot.\n"
         "`!admin deny <@user>` - Block a user.\n"
     )
-    say(help_text)
+    await say(help_text)
 
 # Helper for User Names
 user_cache = {}
-def fetch_user_name(user_id):
+async def fetch_user_name(user_id):
     if user_id in user_cache:
         return user_cache[user_id]
     try:
-        result = app.client.users_info(user=user_id)
+        result = await app.client.users_info(user=user_id)
         if result["ok"]:
             user = result["user"]
             # Prefer display name, fallback to real name
@@ -338,80 +399,80 @@ def fetch_user_name(user_id):
     return f"User <{user_id}>"
 
 @app.message(re.compile("^!admin"))
-def handle_admin_commands(message, say):
+async def handle_admin_commands(message, say):
     user_id = message['user']
     channel_id = message['channel']
     
     # Resolve Campaign Context
-    campaign_name = dm_utils.get_campaign_for_channel("slack", channel_id)
+    campaign_name = await asyncio.to_thread(dm_utils.get_campaign_for_channel, "slack", channel_id)
     token = None
     if campaign_name:
         token = dm_utils.set_active_campaign(campaign_name)
     
     try:
         # Check Campaign Config First
-        config = dm_utils.get_campaign_config(campaign_name)
+        config = await asyncio.to_thread(dm_utils.get_campaign_config, campaign_name)
         admin_id = config.get("admin_user_id") or os.environ.get("ADMIN_USER_ID")
         
         if not admin_id or user_id != admin_id:
-            say(f"⛔ You are not the Dungeon Master (Admin ID: {admin_id}).")
+            await say(f"⛔ You are not the Dungeon Master (Admin ID: {admin_id}).")
             return
             
         text = message['text']
         parts = text.split()
         
         if len(parts) < 2:
-            say("Usage: `!admin allow @user`, `!admin deny @user`, `!admin list`")
+            await say("Usage: `!admin allow @user`, `!admin deny @user`, `!admin list`")
             return
             
         command = parts[1]
         
         if command == "list":
             users = permissions.get_allowed_users()
-            say(f"**Allowed Users**:\n{users if users else 'None (Public Mode if env is empty)'}")
+            await say(f"**Allowed Users**:\n{users if users else 'None (Public Mode if env is empty)'}")
             return
             
         if command in ["allow", "deny"]:
             # Extract user ID from tag <@U12345>
             target_ids = re.findall(r"<@([A-Z0-9]+)>", text)
             if not target_ids:
-                say("Please tag the user(s) you want to modify.")
+                await say("Please tag the user(s) you want to modify.")
                 return
                 
             for tid in target_ids:
                 if command == "allow":
-                    permissions.add_user(tid)
-                    say(f"✅ Added <@{tid}> to allowed list.")
+                    await asyncio.to_thread(permissions.add_user, tid)
+                    await say(f"✅ Added <@{tid}> to allowed list.")
                 else:
-                    permissions.remove_user(tid)
-                    say(f"❌ Removed <@{tid}> from allowed list.")
+                    await asyncio.to_thread(permissions.remove_user, tid)
+                    await say(f"❌ Removed <@{tid}> from allowed list.")
             return
     
         elif command == "bind":
             if len(parts) < 3:
-                say("Usage: `!admin bind <campaign_name>`")
+                await say("Usage: `!admin bind <campaign_name>`")
                 return
             campaign_name = parts[2]
-            dm_utils.bind_channel_to_campaign("slack", message['channel'], campaign_name)
-            say(f"✅ Success! Channel is now bound to campaign `{campaign_name}`.")
+            await asyncio.to_thread(dm_utils.bind_channel_to_campaign, "slack", message['channel'], campaign_name)
+            await say(f"✅ Success! Channel is now bound to campaign `{campaign_name}`.")
             return
     finally:
         if token:
             dm_utils.active_campaign_ctx.reset(token)
 
 @app.message(re.compile("^!show"))
-def handle_show_command(message, say, logger):
+async def handle_show_command(message, say, logger):
     """
     User approves the pending image generation.
     """
     channel_id = message['channel']
-    say("🎨 Painting the scene... (This takes ~5 seconds)")
+    await say("🎨 Painting the scene... (This takes ~5 seconds)")
     
-    image_bytes, result = dm_utils.generate_image_from_pending()
+    image_bytes, result = await asyncio.to_thread(dm_utils.generate_image_from_pending)
     
     if image_bytes:
         try:
-            app.client.files_upload_v2(
+            await app.client.files_upload_v2(
                 channel=channel_id,
                 file=image_bytes,
                 filename="scene_visual.png",
@@ -419,54 +480,54 @@ def handle_show_command(message, say, logger):
                 initial_comment=f"Visual for: *{result}*"
             )
         except Exception as e:
-            say(f"❌ Upload Failed: {e}")
+            await say(f"❌ Upload Failed: {e}")
     else:
-        say(f"❌ Generation Failed: {result}")
+        await say(f"❌ Generation Failed: {result}")
 
 @app.message(re.compile("^!hide"))
-def handle_hide_command(message, say):
+async def handle_hide_command(message, say):
     """
     User rejects the pending image.
     """
-    say("🗑️ Image cancelled.")
+    await say("🗑️ Image cancelled.")
 
 
 @app.message(re.compile("^!wrapup"))
-def handle_wrapup_command(message, say):
+async def handle_wrapup_command(message, say):
     # Context wrapper
     channel_id = message['channel']
-    campaign_name = dm_utils.get_campaign_for_channel("slack", channel_id)
+    campaign_name = await asyncio.to_thread(dm_utils.get_campaign_for_channel, "slack", channel_id)
     token = None
     if campaign_name:
         token = dm_utils.set_active_campaign(campaign_name)
     else:
-        say("❌ This channel is not bound to a campaign. Run `!admin bind <name>` first.")
+        await say("❌ This channel is not bound to a campaign. Run `!admin bind <name>` first.")
         return
 
     try:
-        say("📜 Compacting session log and generating summary...")
-        result = dm_utils.summarize_and_compact_session_logic()
-        say(result)
-        say("✅ Session wrapped! Type `!startsession` to begin the next chapter.")
+        await say("📜 Compacting session log and generating summary...")
+        result = await asyncio.to_thread(dm_utils.summarize_and_compact_session_logic)
+        await say(result)
+        await say("✅ Session wrapped! Type `!startsession` to begin the next chapter.")
     except Exception as e:
-        say(f"❌ Wrap-up failed: {e}")
+        await say(f"❌ Wrap-up failed: {e}")
     finally:
         if token: dm_utils.active_campaign_ctx.reset(token)
 
 @app.message(re.compile("^!startsession"))
-def handle_startsession_command(message, say):
+async def handle_startsession_command(message, say):
     # Context wrapper
     channel_id = message['channel']
-    campaign_name = dm_utils.get_campaign_for_channel("slack", channel_id)
+    campaign_name = await asyncio.to_thread(dm_utils.get_campaign_for_channel, "slack", channel_id)
     token = None
     if campaign_name:
         token = dm_utils.set_active_campaign(campaign_name)
     else:
-        say("❌ This channel is not bound to a campaign. Run `!admin bind <name>` first.")
+        await say("❌ This channel is not bound to a campaign. Run `!admin bind <name>` first.")
         return
 
     try:
-        say("🌅 Initializing new session...")
+        await say("🌅 Initializing new session...")
         
         # 1. Read the summary from current session log
         # Note: If !wrapup was just run, this reads the 'previous' session log which is technically the 'current' one on disk before session increment?
@@ -485,28 +546,28 @@ def handle_startsession_command(message, say):
                     pass
 
         # 2. Start new session
-        result = dm_utils.start_new_session_logic(summary)
-        say(f"🎉 {result}")
+        result = await asyncio.to_thread(dm_utils.start_new_session_logic, summary)
+        await say(f"🎉 {result}")
         
     except Exception as e:
-        say(f"❌ Failed to start new session: {e}")
+        await say(f"❌ Failed to start new session: {e}")
     finally:
         if token: dm_utils.active_campaign_ctx.reset(token)
 
 @app.message(re.compile("^!recap"))
-def handle_recap_command(message, say):
+async def handle_recap_command(message, say):
     """
     Forcefully retrieves the log for a specific session (or current) and summarizes it.
     Usage: !recap or !recap session_4
     """
     # Context wrapper
     channel_id = message['channel']
-    campaign_name = dm_utils.get_campaign_for_channel("slack", channel_id)
+    campaign_name = await asyncio.to_thread(dm_utils.get_campaign_for_channel, "slack", channel_id)
     token = None
     if campaign_name:
         token = dm_utils.set_active_campaign(campaign_name)
     else:
-        say("❌ This channel is not bound to a campaign.")
+        await say("❌ This channel is not bound to a campaign.")
         return
 
     try:
@@ -523,18 +584,18 @@ def handle_recap_command(message, say):
             log_path, _ = dm_utils.get_log_paths()
 
         if not os.path.exists(log_path):
-            say(f"❌ Could not find log file at `{log_path}`.")
+            await say(f"❌ Could not find log file at `{log_path}`.")
             return
 
         with open(log_path, "r") as f:
             content = f.read()
 
         # 1. Show user (truncated)
-        say(f"📜 **Recap from {os.path.basename(os.path.dirname(log_path))}**:\n\n{content[:1000]}...\n\n*(Injecting full log into AI memory...)*")
+        await say(f"📜 **Recap from {os.path.basename(os.path.dirname(log_path))}**:\n\n{content[:1000]}...\n\n*(Injecting full log into AI memory...)*")
         
         # 2. Feed to Agent to rebuild context
         user_id = message.get("user")
-        user_name = fetch_user_name(user_id)
+        user_name = await fetch_user_name(user_id)
         
         # Construct a system-style injection message
         injection_text = (
@@ -545,7 +606,7 @@ def handle_recap_command(message, say):
             f"--- END OF RECAP ---"
         )
         
-        response_text = engine.process_message(
+        response_text = await engine.process_message_async(
             user_id=user_id,
             user_name=user_name,
             message_text=injection_text,
@@ -554,17 +615,18 @@ def handle_recap_command(message, say):
             channel_id=channel_id,
             server_id=message.get("team")
         )
-        say(f"🤖 {response_text}")
+        if response_text:
+            await say(f"🤖 {response_text}")
             
     except Exception as e:
-        say(f"❌ Recap failed: {e}")
+        await say(f"❌ Recap failed: {e}")
     finally:
         if token: dm_utils.active_campaign_ctx.reset(token)
 
 
 
 @app.message(re.compile("^!name"))
-def handle_name_command(message, say):
+async def handle_name_command(message, say):
     """
     !name <race>
     """
@@ -577,31 +639,31 @@ def handle_name_command(message, say):
     name = dm_utils.generate_random_name(race)
     
     if name:
-        say(f"🎲 Random Name ({race}): *{name}*")
+        await say(f"🎲 Random Name ({race}): *{name}*")
     else:
         # Fallback to LLM if library doesn't support it
-        say(f"🎲 Generating unique {race} name... (One moment)")
+        await say(f"🎲 Generating unique {race} name... (One moment)")
         try:
             api_key = os.environ.get("GOOGLE_API_KEY")
             if not api_key:
-                say(f"❌ Custom names require GOOGLE_API_KEY. See README.md.")
+                await say(f"❌ Custom names require GOOGLE_API_KEY. See README.md.")
                 return
             
             # The GameEngine will handle LLM calls for name generation if dm_utils doesn't have it.
             # For now, we'll just indicate failure if dm_utils doesn't return a name.
-            say(f"❌ Failed to generate name for '{race}' using available tools. Try asking the bot directly: '@DeeSim generate a {race} name'.")
+            await say(f"❌ Failed to generate name for '{race}' using available tools. Try asking the bot directly: '@DeeSim generate a {race} name'.")
             
         except Exception as e:
-            say(f"❌ Failed to generate name: {e}")
+            await say(f"❌ Failed to generate name: {e}")
 
 @app.message(re.compile("^!iam"))
-def handle_iam_command(message, say):
+async def handle_iam_command(message, say):
     user_id = message['user']
     channel_id = message['channel']
     text = message['text']
     
     # Resolve Campaign Context
-    campaign_name = dm_utils.get_campaign_for_channel("slack", channel_id)
+    campaign_name = await asyncio.to_thread(dm_utils.get_campaign_for_channel, "slack", channel_id)
     token = None
     if campaign_name:
         token = dm_utils.set_active_campaign(campaign_name)
@@ -609,17 +671,17 @@ def handle_iam_command(message, say):
     try:
         match = re.search(r"!iam\s+(.+)", text, re.IGNORECASE)
         if not match:
-            say("Usage: `!iam <Character Name>` (e.g. `!iam Grognak`)")
+            await say("Usage: `!iam <Character Name>` (e.g. `!iam Grognak`)")
         else:
             char_name = match.group(1).strip()
-            result = dm_utils.register_player(user_id, char_name)
-            say(result)
+            result = await asyncio.to_thread(dm_utils.register_player, user_id, char_name)
+            await say(result)
     finally:
         if token:
             dm_utils.active_campaign_ctx.reset(token)
 
 @app.event("app_mention")
-def handle_app_mentions(body, say, logger):
+async def handle_app_mentions(body, say, logger):
     user_id = body['event']['user']
     channel_id = body['event']['channel']
     event = body['event']
@@ -633,16 +695,17 @@ def handle_app_mentions(body, say, logger):
         user_text = user_text.replace(f"<@{BOT_ID}>", "").strip()
 
     # Process Attachments (Images)
-    image_parts = process_attachments(event, logger)
+    image_parts = await asyncio.to_thread(process_attachments, event, logger)
     
     # Delegate to Engine
     # Fetch real user name for better UX
-    user_name = fetch_user_name(user_id)
+    user_name = await fetch_user_name(user_id)
     
     # Inject Bot Identity Context
     final_text = f"[Context: You are '{BOT_NAME}'. Address the user as '{user_name}'.]\n{user_text}"
     
-    response_text = engine.process_message(
+    await reply_with_stream(
+        say,
         user_id=user_id,
         user_name=user_name,
         message_text=final_text,
@@ -651,11 +714,9 @@ def handle_app_mentions(body, say, logger):
         channel_id=channel_id,
         server_id=body.get("team_id")
     )
-    
-    say(response_text)
 
 @app.message(".*")
-def handle_message_events(message, say, logger):
+async def handle_message_events(message, say, logger):
     """
     Handles all message events. 
     1. If DM ('im'): Respond (Active)
@@ -678,9 +739,9 @@ def handle_message_events(message, say, logger):
     
     # --- CAMPAIGN PERMISSION CHECK ---
     # If channel is bound to a campaign, check if channel is allowed in config
-    campaign_name = dm_utils.get_campaign_for_channel("slack", channel_id)
+    campaign_name = await asyncio.to_thread(dm_utils.get_campaign_for_channel, "slack", channel_id)
     if campaign_name:
-        config = dm_utils.get_campaign_config(campaign_name)
+        config = await asyncio.to_thread(dm_utils.get_campaign_config, campaign_name)
         allowed_channels = config.get("allowed_channel_ids", [])
         if allowed_channels and channel_id not in allowed_channels:
              # Silent ignore or log? Silent to avoid spam.
@@ -693,14 +754,15 @@ def handle_message_events(message, say, logger):
         logger.info(f"Received DM from {user_id}")
         
         # Process Attachments (Images)
-        image_parts = process_attachments(message, logger)
+        image_parts = await asyncio.to_thread(process_attachments, message, logger)
         
-        user_name = fetch_user_name(user_id)
+        user_name = await fetch_user_name(user_id)
 
         # Inject Bot Identity Context
         final_text = f"[Context: You are '{BOT_NAME}'. Address the user as '{user_name}'.]\n{text}"
 
-        response_text = engine.process_message(
+        await reply_with_stream(
+            say,
             user_id=user_id,
             user_name=user_name,
             message_text=final_text,
@@ -709,13 +771,13 @@ def handle_message_events(message, say, logger):
             channel_id=channel_id,
             server_id=server_id
         )
-        say(response_text)
         return
 
     # --- CHANNEL BUFFER LOGIC (Passive) ---
     # Only buffer if allowed
-    user_name = fetch_user_name(user_id)
-    engine.buffer_message(
+    user_name = await fetch_user_name(user_id)
+    await asyncio.to_thread(
+        engine.buffer_message,
         user_id=user_id,
         user_name=user_name,
         message_text=text,
@@ -728,4 +790,4 @@ if __name__ == "__main__":
     print("🤖 Agentic DM (Slack) is listening via Socket Mode...")
     # Dynamic root (default)
     print(f"Default Campaign Root: {dm_utils.get_campaign_root()}")
-    SocketModeHandler(app, os.environ["SLACK_APP_TOKEN"]).start()
+    asyncio.run(AsyncSocketModeHandler(app, os.environ["SLACK_APP_TOKEN"]).start_async())
@@ -1,5 +1,6 @@
 import dm_utils
 import dnd_bridge
+import llm_bridge
 import os
 from typing import List, Dict, Any, Optional
 
@@ -37,7 +38,8 @@ def roll_dice(expression: str, purpose: str, is_secret: bool = False) -> str:
     log_type = "SECRET ROLL" if is_secret else "PUBLIC ROLL"
     
     log_message = f"**{log_type}** | Purpose: {purpose} | Result: {result['total']} ({result['rolls']} {result['modifier']})"
-    dm_utils.log_to_file(log_file, log_message)
+    dm_utils.log_to_file(log_file, log_message, event_type="roll", secret=is_secret,
+                         expression=expression, purpose=purpose, total=result['total'])
     
     return f"Rolled {expression} for {purpose}. Result: {result['total']}"
 
@@ -50,9 +52,10 @@ def log_event(message: str, is_secret: bool = False) -> str:
     session_log, secrets_log = dm_utils.get_log_paths()
     log_file = secrets_log if is_secret else session_log
     prefix = "[SECRET]" if is_secret else "[PUBLIC]"
-    dm_utils.log_to_file(log_file, f"{prefix} {message}")
+    dm_utils.log_to_file(log_file, f"{prefix} {message}", event_type="secret" if is_secret else "narration", secret=is_secret)
     return "Logged event."
 
+@llm_bridge.declare_tool(side_effects=False)
 def search_dnd_rules(query: str) -> dict:
     """
     Search the official D&D 5e API for rules, spells, monsters, and items.
@@ -61,6 +64,7 @@ def search_dnd_rules(query: str) -> dict:
     """
     return dnd_bridge.search_dnd_rules(query)
 
+@llm_bridge.declare_tool(side_effects=False)
 def verify_dnd_statement(statement: str) -> dict:
     """
     Check if a D&D rule statement is true using the API.
@@ -68,6 +72,7 @@ def verify_dnd_statement(statement: str) -> dict:
     """
     return dnd_bridge.verify_dnd_statement(statement)
 
+@llm_bridge.declare_tool(side_effects=False)
 def find_monster_by_cr(min_cr: float, max_cr: float) -> dict:
     """
     Find monsters within a CR range.
@@ -90,6 +95,7 @@ def request_player_roll(check_type: str, dc: int, consequence: str) -> str:
     """
     return dm_utils.request_player_roll_logic(check_type, dc, consequence)
 
+@llm_bridge.declare_tool(side_effects=False)
 def read_campaign_log(log_type: str) -> str:
     """
     Reads a campaign log file ('session', 'secrets', or 'world') to recall past events.
@@ -97,12 +103,14 @@ def read_campaign_log(log_type: str) -> str:
     """
     return dm_utils.read_campaign_log(log_type)
 
+@llm_bridge.declare_tool(side_effects=False)
 def list_sessions() -> str:
     """
     Lists all session directories with metadata.
     """
     return dm_utils.list_sessions()
 
+@llm_bridge.declare_tool(side_effects=False)
 def read_full_session(session_name: str = "current") -> str:
     """
     Reads ALL log files from a specific session combined.
@@ -110,6 +118,7 @@ def read_full_session(session_name: str = "current") -> str:
     return dm_utils.read_session(session_name)
 
 
+@llm_bridge.declare_tool(side_effects=False)
 def lookup_past_session(query: str, session_name: str = "") -> str:
     """
     A deep memory tool to research past events across all previous sessions using ChromaDB semantic search.
@@ -156,6 +165,7 @@ def propose_scene_image(image_description: str) -> str:
     result = dm_utils.propose_image(image_description)
     return f"{result}\nTell the user: 'I have a visual for this. Type `!show` to see it.'"
 
+@llm_bridge.declare_tool(side_effects=False)
 def validate_action(action: str, character_name: str) -> str:
     """
     Validates a player's proposed action against the rules and their character state.
@@ -180,6 +190,7 @@ def submit_character_sheet(character_name: str, details: str) -> str:
     """
     return dm_utils.save_character_sheet(character_name, details)
 
+@llm_bridge.declare_tool(side_effects=False)
 def generate_name(race: str = "any") -> str:
     """
     Generates a random fantasy name.
@@ -188,6 +199,7 @@ def generate_name(race: str = "any") -> str:
     return dm_utils.generate_random_name(race)
 
 # Helper to look up defunct rule search
+@llm_bridge.declare_tool(side_effects=False)
 def lookup_rule(query: str) -> str:
     """
     [DEPRECATED: Use search_dnd_rules instead if possible]
@@ -199,7 +211,8 @@ def lookup_rule(query: str) -> str:
 def initialize_combat(entities: List[Dict[str, Any]]) -> str:
     """
     Sets up the initial state for a combat encounter.
-    entities: List of dicts, e.g. [{"name": "Goblin 1", "hp": 7, "max_hp": 7, "ac": 15, "notes": "Scimitar"}]
+    entities: List of dicts, e.g. [{"name": "Goblin 1", "hp": 7, "max_hp": 7, "ac": 15, "initiative": 14, "notes": "Scimitar"}]
+    Optional keys: "initiative" (sets turn order), "conditions" (list of conditions).
     """
     return dm_utils.update_combat_state(entities)
 
@@ -210,42 +223,25 @@ def track_combat_change(character_name: str, hp_change: int = 0, notes_update: s
     hp_change: Amount to change HP (negative for damage, positive for healing).
     notes_update: New notes or status effects (e.g. "Stunned", "Used 1st level slot").
     """
-    state_text = dm_utils.get_combat_state()
-    if "No active combat" in state_text:
-        return state_text
-
-    # Basic parsing of the markdown table
-    import re
-    entities = []
-    lines = state_text.split("\n")
-    for line in lines:
-        if "|" in line and "---" not in line and "Name | HP" not in line:
-            parts = [p.strip() for p in line.split("|") if p.strip()]
-            if len(parts) >= 3:
-                name = parts[0]
-                hp_val = parts[1]
-                ac = parts[2]
-                notes = parts[3] if len(parts) > 3 else ""
-                
-                try:
-                    curr_hp, max_hp = map(int, hp_val.split("/"))
-                except:
-                    curr_hp, max_hp = 0, 0
-                
-                if name.lower() == character_name.lower():
-                    curr_hp = max(0, min(max_hp, curr_hp + hp_change))
-                    if notes_update:
-                        notes = notes_update
-                
-                entities.append({
-                    "name": name,
-                    "hp": curr_hp,
-                    "max_hp": max_hp,
-                    "ac": ac,
-                    "notes": notes
-                })
+    return track_combat_changes([{"name": character_name, "hp_change": hp_change, "notes_update": notes_update}])
 
-    return dm_utils.update_combat_state(entities)
+def track_combat_changes(changes: List[Dict[str, Any]]) -> str:
+    """
+    Applies HP/condition changes to several combatants at once (e.g. a Fireball hitting four goblins).
+    changes: List of dicts, e.g. [{"name": "Goblin 1", "hp_change": -8}, {"name": "Goblin 2", "hp_change": -4, "conditions": ["Prone"]}]
+    Optional keys: "notes_update" (replaces notes), "conditions" (replaces the condition list).
+    """
+    if not dm_utils.get_combatants():
+        return "No active combat section found."
+    results = dm_utils.combat.apply_changes(changes)
+    return "Combat state updated:\n" + "\n".join(f"- {line}" for line in results)
+
+def end_combat() -> str:
+    """
+    Ends the current combat encounter and clears the combat tracker.
+    """
+    removed = dm_utils.combat.end_combat()
+    return f"Combat ended ({removed} combatants cleared)." if removed else "No active combat to end."
 
 def manage_inventory(action: str, item_name: str, quantity: int = 1, weight: float = 0.0, character_name: str = None) -> str:
     """
@@ -256,12 +252,22 @@ def manage_inventory(action: str, item_name: str, quantity: int = 1, weight: flo
     """
     return dm_utils.manage_inventory(action, item_name, quantity, weight, character_name)
 
+def manage_inventory_bulk(operations: List[Dict[str, Any]]) -> str:
+    """
+    Applies many inventory changes in one go (use this after loot drops instead of calling manage_inventory per item).
+    operations: List of dicts, e.g. [{"character_name": "Vax", "item_name": "Gold Piece", "quantity": 50, "weight": 0.02, "action": "add"}]
+    action: "add" (default) or "remove".
+    """
+    return dm_utils.manage_inventory_bulk(operations)
+
+@llm_bridge.declare_tool(side_effects=False)
 def lookup_item_details(item_name: str) -> str:
     """
     Looks up an item in the D&D API to find its rarity, cost, and type.
     """
     return dm_utils.lookup_item_details(item_name)
 
+@llm_bridge.declare_tool(side_effects=False)
 def lookup_monster(monster_name: str) -> str:
     """
     Looks up a monster's stats (AC, HP, Speed, Actions) for combat.
@@ -6,6 +6,20 @@ from contextvars import ContextVar
 active_campaign_ctx: ContextVar[str | None] = ContextVar("active_campaign", default=None)
 REGISTRY_PATH = os.path.join(os.getcwd(), "campaign_registry.json")
 
+# Bumped whenever channel bindings or campaign configuration change, so
+# in-process caches (e.g. the engine's chat sessions) know to rebuild.
+_config_generation = 0
+
+def get_config_generation() -> int:
+    """Returns the current registry/config generation."""
+    return _config_generation
+
+def bump_config_generation() -> int:
+    """Invalidates in-process caches derived from campaign configuration."""
+    global _config_generation
+    _config_generation += 1
+    return _config_generation
+
 def get_campaign_for_channel(platform_id: str, channel_id: str) -> str | None:
     """Returns the campaign name bound to a specific channel."""
     if not os.path.exists(REGISTRY_PATH):
@@ -28,6 +42,7 @@ def bind_channel_to_campaign(platform_id: str, channel_id: str, campaign_name: s
     registry[f"{platform_id}:{channel_id}"] = campaign_name
     with open(REGISTRY_PATH, "w") as f:
         json.dump(registry, f, indent=2)
+    bump_config_generation()
 
 def set_active_campaign(campaign_name: str):
     """Sets the campaign context for the current thread/task."""
@@ -0,0 +1,189 @@
+import os
+import re
+from typing import Optional
+from core.campaign import get_current_session_dir
+from core.database import get_db_connection
+
+# --- Structured Combat Tracker ---
+# Combatants live in the campaign database, one row per (session, creature),
+# so an HP tick is a single-row UPDATE. The '## Active Combat' markdown table
+# is only rendered when someone reads it.
+
+COMBAT_SECTION_HEADING = "## Active Combat"
+_COMBAT_SECTION_PATTERN = re.compile(r"## Active Combat\n.*?(?=\n##|$)", re.DOTALL)
+
+def _name_key(name: str) -> str:
+    return " ".join(str(name).lower().split())
+
+def _session_name() -> str:
+    return os.path.basename(get_current_session_dir())
+
+def _parse_conditions(value) -> str:
+    """Normalizes conditions given as a list or a comma-separated string."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        value = value.split(",")
+    return ", ".join(str(c).strip() for c in value if str(c).strip())
+
+def _to_int(value, default: int = 0) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+def _clamp_hp(hp: int, max_hp: int) -> int:
+    return max(0, min(max_hp, hp))
+
+def start_combat(entities: list) -> int:
+    """
+    Replaces the current session's combatants.
+    entities: List of dicts with name, hp, max_hp, ac and optionally initiative, conditions, notes.
+    Returns the number of combatants.
+    """
+    session = _session_name()
+    rows = []
+    seen = set()
+    for position, e in enumerate(entities):
+        name = str(e.get("name", "Unknown")).strip() or "Unknown"
+        key = _name_key(name)
+        if key in seen:
+            continue
+        seen.add(key)
+        max_hp = _to_int(e.get("max_hp", e.get("hp", 0)))
+        initiative = e.get("initiative")
+        rows.append((
+            session, key, name, position,
+            _to_int(initiative) if initiative not in (None, "") else None,
+            _to_int(e.get("hp", max_hp)), max_hp,
+            str(e.get("ac", 0)),
+            _parse_conditions(e.get("conditions")),
+            str(e.get("notes", "") or "")
+        ))
+
+    with get_db_connection() as conn:
+        conn.execute("DELETE FROM combatants WHERE session_name = ?", (session,))
+        conn.executemany('''
+            INSERT INTO combatants (session_name, name_key, name, position, initiative, hp, max_hp, ac, conditions, notes)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+    return len(rows)
+
+def apply_changes(changes: list) -> list:
+    """
+    Applies HP/condition/note changes to many combatants in one transaction (e.g. an AoE).
+    changes: List of dicts with name and optionally hp_change, notes_update, conditions.
+    Returns a result line per change.
+    """
+    session = _session_name()
+    results = []
+    with get_db_connection() as conn:
+        for change in changes:
+            name = str(change.get("name", "")).strip()
+            row = conn.execute(
+                "SELECT name, hp, max_hp FROM combatants WHERE session_name = ? AND name_key = ?",
+                (session, _name_key(name))
+            ).fetchone()
+            if row is None:
+                results.append(f"{name}: not in combat.")
+                continue
+
+            hp_change = _to_int(change.get("hp_change", 0))
+            hp = _clamp_hp(row["hp"] + hp_change, row["max_hp"])
+            updates = {"hp": hp}
+            if change.get("notes_update"):
+                updates["notes"] = str(change["notes_update"])
+            if change.get("conditions") is not None:
+                updates["conditions"] = _parse_conditions(change["conditions"])
+
+            assignments = ", ".join(f"{column} = ?" for column in updates)
+            conn.execute(
+                f"UPDATE combatants SET {assignments} WHERE session_name = ? AND name_key = ?",
+                (*updates.values(), session, _name_key(name))
+            )
+            status = " (down)" if hp == 0 else ""
+            results.append(f"{row['name']}: {hp}/{row['max_hp']} HP{status}")
+    return results
+
+def end_combat() -> int:
+    """Clears the current session's combatants. Returns how many were removed."""
+    with get_db_connection() as conn:
+        cursor = conn.execute("DELETE FROM combatants WHERE session_name = ?", (_session_name(),))
+        return cursor.rowcount
+
+def get_combatants() -> list:
+    """Returns the current session's combatants in initiative order (as dicts)."""
+    with get_db_connection() as conn:
+        rows = conn.execute('''
+            SELECT name, initiative, hp, max_hp, ac, conditions, notes FROM combatants
+            WHERE session_name = ?
+            ORDER BY initiative IS NULL, initiative DESC, position
+        ''', (_session_name(),)).fetchall()
+    return [dict(row) for row in rows]
+
+def render_combat_section(combatants: list) -> str:
+    """Renders combatants as the '## Active Combat' markdown table."""
+    lines = [
+        COMBAT_SECTION_HEADING,
+        "",
+        "| Init | Name | HP | AC | Conditions | Notes |",
+        "| :--- | :--- | :--- | :--- | :--- | :--- |"
+    ]
+    for c in combatants:
+        init = "" if c["initiative"] is None else c["initiative"]
+        lines.append(f"| {init} | {c['name']} | {c['hp']}/{c['max_hp']} | {c['ac']} | {c['conditions']} | {c['notes']} |")
+    return "\n".join(lines)
+
+def parse_legacy_combat_section(section: str) -> list:
+    """Parses an old '| Name | HP | AC | Notes |' table written to secrets_log.md."""
+    entities = []
+    for line in section.split("\n"):
+        if "|" in line and "---" not in line and "Name | HP" not in line:
+            parts = [p.strip() for p in line.split("|") if p.strip()]
+            if len(parts) >= 3:
+                try:
+                    curr_hp, max_hp = map(int, parts[1].split("/"))
+                except ValueError:
+                    curr_hp, max_hp = 0, 0
+                entities.append({
+                    "name": parts[0],
+                    "hp": curr_hp,
+                    "max_hp": max_hp,
+                    "ac": parts[2],
+                    "notes": parts[3] if len(parts) > 3 else ""
+                })
+    return entities
+
+def import_legacy_combat(secrets_content: str) -> bool:
+    """
+    Moves a combat table from an older secrets_log.md into the tracker, once,
+    if the tracker has nothing for this session. Returns True if imported.
+    """
+    match = _COMBAT_SECTION_PATTERN.search(secrets_content)
+    if not match or get_combatants():
+        return False
+    entities = parse_legacy_combat_section(match.group(0))
+    if not entities:
+        return False
+    start_combat(entities)
+    return True
+
+def find_combat_section(secrets_content: str) -> Optional[str]:
+    """The stored '## Active Combat' section of secrets_log.md content, if any."""
+    match = _COMBAT_SECTION_PATTERN.search(secrets_content)
+    return match.group(0) if match else None
+
+def strip_combat_section(secrets_content: str) -> str:
+    """Removes a stored '## Active Combat' section from secrets_log.md content."""
+    return _COMBAT_SECTION_PATTERN.sub("", secrets_content).rstrip() + "\n"
+
+def splice_combat_section(secrets_content: str) -> str:
+    """
+    Returns secrets_log.md content with the live combat table in place of any
+    stored '## Active Combat' section (appended if there was none).
+    """
+    combatants = get_combatants()
+    content = strip_combat_section(secrets_content).rstrip()
+    if not combatants:
+        return content + "\n" if content else ""
+    return (content + "\n\n" if content else "") + render_combat_section(combatants) + "\n"
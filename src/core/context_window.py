@@ -0,0 +1,234 @@
+import os
+import json
+import math
+import hashlib
+import threading
+from core import summarizer
+from core.state_manager import _message_content, _message_id
+
+# --- Rolling Context Window ---
+# Sessions are built from the most recent turns of chat_history.json that fit
+# a per-provider token budget. Older turns are folded into a running summary
+# (cached in the session dir and only extended with newly folded turns), which
+# is given to the model as the first exchange of its history. The full history
+# is still saved to chat_history.json and indexed in Chroma, so relevant older
+# turns can be recalled into a prompt on demand.
+
+# Verbatim history budget (tokens) per provider; DM_CONTEXT_TOKENS overrides all
+CONTEXT_BUDGETS = {"google": 32000, "claude": 24000, "local": 6000}
+
+# Rough characters per token of each provider's tokenizer
+CHARS_PER_TOKEN = {"google": 4.0, "claude": 3.5, "local": 3.5}
+
+# Per-message overhead (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Older turns are folded once at least this share of the budget overflows,
+# so the summary is not regenerated on every turn
+FOLD_BATCH_SHARE = 0.25
+
+# Older turns recalled from Chroma per prompt
+RECALL_RESULTS = 3
+RECALL_MAX_CHARS = 400
+
+SUMMARY_STATE_FILENAME = "context_summary.json"
+SUMMARY_PREAMBLE = "[Story So Far - summary of earlier turns in this session]"
+SUMMARY_ACK = "Understood. Continuing from there."
+
+_summary_lock = threading.Lock()
+
+def get_budget(provider: str) -> int:
+    override = os.environ.get("DM_CONTEXT_TOKENS")
+    if override:
+        return int(override)
+    return CONTEXT_BUDGETS.get(provider, CONTEXT_BUDGETS["local"])
+
+def count_tokens(text: str, provider: str) -> int:
+    """Estimates the tokens of text for a provider's tokenizer."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN.get(provider, 4.0))
+
+def message_text(msg: dict) -> str:
+    """The readable text of a stored history message (text parts, tool calls)."""
+    parts = msg.get("parts", [])
+    if not isinstance(parts, list):
+        parts = [parts]
+    texts = []
+    for part in parts:
+        if isinstance(part, dict):
+            if part.get("text"):
+                texts.append(str(part["text"]))
+            elif part.get("function_call"):
+                texts.append(f"[Tool call: {part['function_call'].get('name', '?')}]")
+            elif part.get("function_response"):
+                texts.append(f"[Tool result: {str(part['function_response'].get('response', ''))[:200]}]")
+        elif part:
+            texts.append(str(part))
+    return " ".join(texts)
+
+def count_message_tokens(msg: dict, provider: str) -> int:
+    parts = msg.get("parts", [])
+    return MESSAGE_OVERHEAD_TOKENS + count_tokens(
+        json.dumps(parts, ensure_ascii=False) if not isinstance(parts, str) else parts, provider)
+
+def _is_turn_start(msg: dict) -> bool:
+    """A user message with text, i.e. not a tool response; history may be cut before it."""
+    if msg.get("role") != "user":
+        return False
+    parts = msg.get("parts", [])
+    if not isinstance(parts, list):
+        return bool(parts)
+    return any(isinstance(p, str) or (isinstance(p, dict) and "text" in p) for p in parts) and \
+        not any(isinstance(p, dict) and "function_response" in p for p in parts)
+
+def _prefix_hash(history: list, end: int) -> str:
+    digest = hashlib.sha1()
+    for msg in history[:end]:
+        digest.update(json.dumps(msg, sort_keys=True, default=str).encode("utf-8"))
+    return digest.hexdigest()
+
+def _fits_with_slack(messages: list, provider: str) -> bool:
+    budget = get_budget(provider) * (1 + FOLD_BATCH_SHARE)
+    return sum(count_message_tokens(m, provider) for m in messages) <= budget
+
+def find_cutoff(history: list, provider: str, covered: int = 0) -> int:
+    """
+    Returns the index of the first message kept verbatim. Folding happens in
+    batches: the current cut (`covered`, what the running summary already
+    covers) is kept while the turns after it fit the budget plus a fold batch;
+    after that the cut moves to the earliest turn whose suffix fits the budget.
+    """
+    if covered < len(history) and (covered == 0 or _is_turn_start(history[covered])):
+        if _fits_with_slack(history[covered:], provider):
+            return covered
+
+    budget = get_budget(provider)
+    tokens = 0
+    cutoff = None
+    for idx in range(len(history) - 1, -1, -1):
+        tokens += count_message_tokens(history[idx], provider)
+        if tokens > budget and cutoff is not None:
+            break
+        if _is_turn_start(history[idx]):
+            # The latest turn is always kept, even if it alone is over budget
+            cutoff = idx
+    return cutoff or 0
+
+def transcript(messages: list) -> str:
+    lines = []
+    for msg in messages:
+        text = message_text(msg).strip()
+        if text:
+            role = "DM" if msg.get("role") in ("model", "assistant") else "Players"
+            lines.append(f"{role}: {text}\n\n")
+    return "".join(lines)
+
+def _load_state(session_dir: str) -> dict:
+    path = os.path.join(session_dir, SUMMARY_STATE_FILENAME)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {"covered": 0, "prefix_hash": _prefix_hash([], 0), "summary": ""}
+
+def _save_state(session_dir: str, state: dict):
+    path = os.path.join(session_dir, SUMMARY_STATE_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+def running_summary(history: list, cutoff: int, session_dir: str, fold, provider: str) -> str:
+    """
+    Returns the summary of history[:cutoff], extending the cached running
+    summary with only the turns folded since it was written.
+    fold: Callable(previous_summary, transcript) -> updated summary.
+    """
+    with _summary_lock:
+        state = _load_state(session_dir)
+        covered = state.get("covered", 0)
+        if covered > cutoff or covered > len(history) or state.get("prefix_hash") != _prefix_hash(history, covered):
+            # History was rewritten below the summary: start over
+            covered, summary = 0, ""
+        else:
+            summary = state.get("summary", "")
+        if covered == cutoff:
+            return summary
+
+        # Fold the new turns in chunks the summarizer can take in one call
+        pending = transcript(history[covered:cutoff])
+        for chunk in summarizer.iter_chunks(pending.splitlines(keepends=True), summarizer.CHUNK_TOKENS):
+            summary = fold(summary, chunk)
+        _save_state(session_dir, {"covered": cutoff, "prefix_hash": _prefix_hash(history, cutoff), "summary": summary})
+        print(f"🧠 [Context] Folded {cutoff - covered} older messages into the running summary (~{count_tokens(summary, provider)} tokens)")
+        return summary
+
+def _summary_messages(summary: str, provider: str) -> list:
+    """The running summary as an opening user/model exchange in the provider's history format."""
+    def part(text):
+        return {"text": text} if provider == "google" else text
+    return [
+        {"role": "user", "parts": [part(f"{SUMMARY_PREAMBLE}\n{summary}")]},
+        {"role": "model", "parts": [part(SUMMARY_ACK)]}
+    ]
+
+class ContextWindow:
+    """
+    The history a session was built from.
+    base: Messages of the full history not given to the session (folded turns).
+    messages: What the session receives (summary exchange + recent turns).
+    synthetic: Number of leading summary messages in `messages`.
+    """
+    def __init__(self, base: list, messages: list, synthetic: int, provider: str):
+        self.base = base
+        self.messages = messages
+        self.synthetic = synthetic
+        self.provider = provider
+
+    @property
+    def folded(self) -> bool:
+        return bool(self.base)
+
+    def full_history(self, session_history: list) -> list:
+        """Rebuilds the full history to save from the session's own history."""
+        return self.base + list(session_history[self.synthetic:])
+
+    def needs_refold(self, full_history: list) -> bool:
+        """True once the session's verbatim turns outgrew the budget plus a fold batch."""
+        budget = get_budget(self.provider)
+        tokens = sum(count_message_tokens(m, self.provider) for m in full_history[len(self.base):])
+        return tokens > budget * (1 + FOLD_BATCH_SHARE)
+
+def build_window(history: list, provider: str, session_dir: str, fold) -> ContextWindow:
+    """Splits a stored history into folded turns and the recent turns kept verbatim."""
+    state = _load_state(session_dir)
+    cutoff = find_cutoff(history, provider, state.get("covered", 0))
+    if cutoff == 0:
+        return ContextWindow([], list(history), 0, provider)
+    try:
+        summary = running_summary(history, cutoff, session_dir, fold, provider)
+    except Exception as e:
+        print(f"⚠️ [Context] Could not fold older turns, keeping them verbatim: {e}")
+        return ContextWindow([], list(history), 0, provider)
+    synthetic = _summary_messages(summary, provider) if summary else []
+    return ContextWindow(history[:cutoff], synthetic + history[cutoff:], len(synthetic), provider)
+
+def recall(query: str, window: ContextWindow, session_name: str, collection) -> str:
+    """
+    Returns older turns of this session relevant to query, from the Chroma
+    `chat_history` collection, leaving out anything still in the window.
+    """
+    if not window.folded or not query.strip():
+        return ""
+    offset = len(window.base) - window.synthetic
+    in_window = {
+        _message_id(session_name, offset + idx, _message_content(msg))
+        for idx, msg in enumerate(window.messages) if idx >= window.synthetic
+    }
+    results = collection.query(query_texts=[query], n_results=RECALL_RESULTS + len(in_window),
+                               where={"session_name": session_name})
+    ids = (results.get("ids") or [[]])[0]
+    docs = (results.get("documents") or [[]])[0]
+    recalled = [doc[:RECALL_MAX_CHARS] for doc_id, doc in zip(ids, docs) if doc_id not in in_window]
+    return "\n".join(f"- {doc}" for doc in recalled[:RECALL_RESULTS])
@@ -1,20 +1,126 @@
 import sqlite3
 import os
+import threading
 import contextlib
 from core.campaign import get_campaign_root
 
+# Idle connections kept per database; extra connections are opened on demand
+# under load and closed on release.
+POOL_SIZE = int(os.environ.get("DM_DB_POOL_SIZE", "4"))
+
+# Milliseconds a writer waits on a locked database before failing
+BUSY_TIMEOUT_MS = 5000
+
+# Prepared statements cached per connection
+STATEMENT_CACHE_SIZE = 256
+
 def get_db_path() -> str:
     """Returns the path to the SQLite database for the active campaign."""
     root = get_campaign_root()
     return os.path.join(root, "campaign_state.db")
 
+class ConnectionPool:
+    """
+    Pool of SQLite connections to one database file.
+    Connections run in WAL mode (readers never block the writer) with
+    synchronous=NORMAL and a busy timeout, and keep their prepared-statement
+    cache across checkouts. Each connection is used by one thread at a time.
+    Pending schema migrations are applied the first time a file is opened.
+    """
+
+    def __init__(self, db_path: str, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self.size = size
+        self._idle: list[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        self._inode = None
+        self._migrated_inode = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        # Enable accessing columns by name
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _file_inode(self):
+        try:
+            return os.stat(self.db_path).st_ino
+        except OSError:
+            return None
+
+    def acquire(self) -> sqlite3.Connection:
+        # A deleted or replaced file invalidates every pooled connection
+        inode = self._file_inode()
+        with self._lock:
+            if inode != self._inode:
+                stale, self._idle = self._idle, []
+            else:
+                stale = []
+            conn = self._idle.pop() if self._idle else None
+        for old in stale:
+            old.close()
+        if conn is None:
+            conn = self._connect()
+            with self._lock:
+                self._inode = self._file_inode()
+                migrated = self._migrated_inode == self._inode
+            if not migrated:
+                # First connection to this file in this process: bring the schema up to date
+                try:
+                    run_migrations(conn)
+                except Exception:
+                    conn.close()
+                    raise
+                with self._lock:
+                    self._migrated_inode = self._file_inode()
+        return conn
+
+    def release(self, conn: sqlite3.Connection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Returns the connection pool for a database file, creating it on first use."""
+    key = os.path.abspath(db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.setdefault(key, ConnectionPool(key))
+    return pool
+
+def close_all_connections():
+    """Closes every pooled connection (e.g. before deleting campaign files)."""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
 @contextlib.contextmanager
 def get_db_connection():
-    """Context manager for SQLite database connections."""
-    db_path = get_db_path()
-    conn = sqlite3.connect(db_path)
-    # Enable accessing columns by name
-    conn.row_factory = sqlite3.Row
+    """Context manager for pooled SQLite connections to the active campaign's database."""
+    pool = get_pool(get_db_path())
+    conn = pool.acquire()
     try:
         yield conn
         conn.commit()
@@ -22,58 +128,151 @@ def get_db_connection():
         conn.rollback()
         raise e
     finally:
-        conn.close()
+        pool.release(conn)
+
+# --- Schema Migrations ---
+# Each campaign database records the last applied version in PRAGMA user_version.
+# Migrations are append-only: never edit one that has shipped, add a new one.
+
+def _migration_base_tables(conn: sqlite3.Connection):
+    """Core tables (existing databases already have them)."""
+    # Players Table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS players (
+            slack_id TEXT PRIMARY KEY,
+            character_name TEXT NOT NULL,
+            race TEXT,
+            class TEXT,
+            level INTEGER DEFAULT 1,
+            registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Character Sheets Table (Unstructured text like stats/backstory)
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS character_sheets (
+            character_name TEXT PRIMARY KEY,
+            details_text TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Inventory Table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS inventory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            character_id TEXT NOT NULL,
+            item_name TEXT NOT NULL,
+            quantity INTEGER DEFAULT 1,
+            weight REAL DEFAULT 0.0,
+            FOREIGN KEY (character_id) REFERENCES players (slack_id)
+        )
+    ''')
+    
+    # Quests Table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS quests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT UNIQUE NOT NULL,
+            description TEXT,
+            status TEXT DEFAULT 'Active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Chat History & Context (Handled by ChromaDB / Vector Store)
+    # We are intentionally leaving chat logs out of SQLite to enable semantic search capabilities
+
+def _migration_context_buffer(conn: sqlite3.Connection):
+    """Passive chatter buffered between direct interactions (see state_manager)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS context_buffer (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            author TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+def _migration_lookup_indexes(conn: sqlite3.Connection):
+    """Indexes for per-turn lookups, and one inventory row per (character, item)."""
+    # Merge duplicate stacks so the unique index can be created; keep the newest weight
+    conn.execute('''
+        UPDATE inventory SET
+            quantity = (SELECT SUM(i2.quantity) FROM inventory i2
+                        WHERE i2.character_id = inventory.character_id AND i2.item_name = inventory.item_name),
+            weight = (SELECT i3.weight FROM inventory i3
+                      WHERE i3.character_id = inventory.character_id AND i3.item_name = inventory.item_name
+                      ORDER BY i3.id DESC LIMIT 1)
+        WHERE id IN (SELECT MIN(id) FROM inventory GROUP BY character_id, item_name HAVING COUNT(*) > 1)
+    ''')
+    conn.execute('''
+        DELETE FROM inventory
+        WHERE id NOT IN (SELECT MIN(id) FROM inventory GROUP BY character_id, item_name)
+    ''')
+    # Covers manage_inventory's (character_id, item_name) filters and enables UPSERT
+    conn.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_inventory_character_item ON inventory (character_id, item_name)"
+    )
+    # Matches get_user_id_by_character_name's LOWER(character_name) = LOWER(?)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_players_character_name ON players (LOWER(character_name))"
+    )
+
+def _migration_combatants(conn: sqlite3.Connection):
+    """Structured combat tracker state (see core.combat)."""
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS combatants (
+            session_name TEXT NOT NULL,
+            name_key TEXT NOT NULL,
+            name TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            initiative INTEGER,
+            hp INTEGER DEFAULT 0,
+            max_hp INTEGER DEFAULT 0,
+            ac TEXT,
+            conditions TEXT DEFAULT '',
+            notes TEXT DEFAULT '',
+            PRIMARY KEY (session_name, name_key)
+        )
+    ''')
+
+# (version, description, migration)
+MIGRATIONS = [
+    (1, "base tables", _migration_base_tables),
+    (2, "context_buffer table", _migration_context_buffer),
+    (3, "lookup indexes and unique inventory stacks", _migration_lookup_indexes),
+    (4, "combatants table", _migration_combatants),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """
+    Applies pending migrations to a campaign database, each in its own
+    transaction. Safe to call concurrently: BEGIN IMMEDIATE serializes
+    writers and the version is re-checked under the lock.
+    Returns the schema version.
+    """
+    for version, description, migration in MIGRATIONS:
+        if get_schema_version(conn) >= version:
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if get_schema_version(conn) < version:
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {version}")
+                print(f"🗄️ [DB] Applied migration {version}: {description}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return get_schema_version(conn)
 
 def init_db():
-    """Initializes the database schema if tables don't exist."""
+    """Initializes the database schema by applying any pending migrations."""
     with get_db_connection() as conn:
-        cursor = conn.cursor()
-        
-        # Players Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS players (
-                slack_id TEXT PRIMARY KEY,
-                character_name TEXT NOT NULL,
-                race TEXT,
-                class TEXT,
-                level INTEGER DEFAULT 1,
-                registered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Character Sheets Table (Unstructured text like stats/backstory)
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS character_sheets (
-                character_name TEXT PRIMARY KEY,
-                details_text TEXT NOT NULL,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Inventory Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS inventory (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                character_id TEXT NOT NULL,
-                item_name TEXT NOT NULL,
-                quantity INTEGER DEFAULT 1,
-                weight REAL DEFAULT 0.0,
-                FOREIGN KEY (character_id) REFERENCES players (slack_id)
-            )
-        ''')
-        
-        # Quests Table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS quests (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT UNIQUE NOT NULL,
-                description TEXT,
-                status TEXT DEFAULT 'Active',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        ''')
-        
-        # Chat History & Context (Handled by ChromaDB / Vector Store)
-        # We are intentionally leaving chat logs out of SQLite to enable semantic search capabilities
-        pass
-
+        run_migrations(conn)
@@ -1,38 +1,135 @@
 
 import os
 import time
+import asyncio
 import datetime
+import threading
 from google.genai import types
 import dm_utils
 import llm_bridge
 from .permissions import is_allowed
+from . import context_window
+from .scheduler import TurnScheduler, QueuedTurn
+from . import rate_limiter
+from .streaming import StatusUpdate
+
+# Seconds before retrying a turn that failed with a transient error (doubles per attempt)
+RETRY_BASE_DELAY = 2
+
+def _file_signature(path: str):
+    """(mtime_ns, size) of a file, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
 
 class GameEngine:
     def __init__(self, tools_list: list):
         self.tools_list = tools_list
-        # self.sessions was removed to enforce statelessness
         provider, resolved_name = llm_bridge.resolve_model_config()
+        self.provider = provider
         self.model_name = resolved_name
+        # campaign_name -> (fingerprint, session). Sessions are reused while the
+        # files they were built from are unchanged (see _session_fingerprint).
+        self._sessions = {}
+        # campaign_name -> ContextWindow the cached session was built from
+        self._windows = {}
+        self._sessions_lock = threading.Lock()
+        # One turn per campaign at a time; bursts are coalesced
+        self.scheduler = TurnScheduler()
         print(f"✨ [Engine] Multitenant Initialized with {provider} model: {self.model_name}")
 
+    def _session_fingerprint(self) -> tuple:
+        """
+        Describes everything a campaign session is built from: provider/model,
+        the current session directory, the chat history and system prompt files,
+        setup/config state and the registry/config generation.
+        Must be called with the campaign context set.
+        """
+        root = dm_utils.get_campaign_root()
+        return (
+            llm_bridge.resolve_model_config(),
+            dm_utils.get_config_generation(),
+            dm_utils.get_current_session_dir(),
+            _file_signature(dm_utils.get_chat_history_path()),
+            _file_signature(os.path.join(root, "config.json")),
+            dm_utils.get_system_instruction_signature()
+        )
+
     def get_campaign_session(self, campaign_name: str):
-        """Retrieves or initializes a chat session for a specific campaign."""
-        # Removed caching: Always load fresh from disk to respect campaign switching/Setup Wizard changes
-        
+        """
+        Retrieves or initializes a chat session for a specific campaign.
+        A cached session is reused while its fingerprint matches, so campaign
+        switching, session rollover and prompt/skill edits still force a rebuild.
+        """
         # We assume the context is already set by the caller (process_message)
+        fingerprint = self._session_fingerprint()
+        with self._sessions_lock:
+            cached = self._sessions.get(campaign_name)
+        if cached and cached[0] == fingerprint:
+            return cached[1]
+
+        # Move a combat table left by older versions into the tracker before play
+        dm_utils.migrate_legacy_combat()
         history = dm_utils.load_chat_snapshot()
         system_instruction = dm_utils.get_system_instruction()
+
+        # Only the recent turns go to the model; older ones are summarized
+        provider = fingerprint[0][0]
+        window = context_window.build_window(
+            history, provider, dm_utils.get_current_session_dir(), dm_utils.fold_running_summary
+        )
         
-        print(f"✨ [Engine] Loading session for campaign: {campaign_name} ({len(history)} messages)")
+        prompt_stats = dm_utils.get_system_instruction_stats()
+        print(f"✨ [Engine] Loading session for campaign: {campaign_name} ({len(history)} messages, {len(window.base)} folded, system prompt {prompt_stats['bytes']} bytes / ~{prompt_stats['estimated_tokens']} tokens)")
         
         session = llm_bridge.get_chat_session(
             model_name=self.model_name,
-            history=history,
+            history=window.messages,
             tools=self.tools_list,
             system_instruction=system_instruction
         )
+        with self._sessions_lock:
+            self._sessions[campaign_name] = (fingerprint, session)
+            self._windows[campaign_name] = window
         return session
 
+    def get_context_window(self, campaign_name: str):
+        """The ContextWindow the cached session of a campaign was built from, if any."""
+        with self._sessions_lock:
+            return self._windows.get(campaign_name)
+
+    def recall_older_turns(self, campaign_name: str, query: str) -> str:
+        """Older turns of the session relevant to query, when some were folded out of the window."""
+        window = self.get_context_window(campaign_name)
+        if window is None or not window.folded:
+            return ""
+        try:
+            return context_window.recall(
+                query, window, os.path.basename(dm_utils.get_current_session_dir()),
+                dm_utils.get_chat_collection()
+            )
+        except Exception as e:
+            print(f"[Engine] Recall failed: {e}")
+            return ""
+
+    def _remember_session(self, campaign_name: str, session):
+        """Re-fingerprints a session after the engine itself saved its history."""
+        fingerprint = self._session_fingerprint()
+        with self._sessions_lock:
+            self._sessions[campaign_name] = (fingerprint, session)
+
+    def invalidate_session(self, campaign_name: str = None):
+        """Drops the cached session for one campaign, or all of them."""
+        with self._sessions_lock:
+            if campaign_name is None:
+                self._sessions.clear()
+                self._windows.clear()
+            else:
+                self._sessions.pop(campaign_name, None)
+                self._windows.pop(campaign_name, None)
+
     def handle_admin_bind(self, platform_id, channel_id, user_id, message_text):
         """Handles the !admin bind <campaign> command."""
         # Simple permission check (we can refine this)
@@ -45,14 +142,11 @@ class GameEngine:
         dm_utils.bind_channel_to_campaign(platform_id, channel_id, campaign_name)
         return f"✅ Success! Channel `{channel_id}` is now bound to campaign `{campaign_name}`. Good luck, adventurers!"
 
-    def process_message(self, user_id: str, user_name: str, message_text: str, platform_id: str, attachments: list = None, channel_id: str = None, server_id: str = None) -> str:
+    def _route(self, platform_id: str, channel_id: str, user_id: str, message_text: str):
         """
-        Main Game Loop (Multitenant):
-        1. Determine Campaign
-        2. Set Context
-        3. Run turn
+        Determines the campaign of a message.
+        Returns (campaign_name, reply); reply is set when the turn ends here.
         """
-        # 1. Determine Campaign
         campaign_name = dm_utils.get_campaign_for_channel(platform_id, channel_id)
         print(f"🎬 [Engine] Routing {platform_id} message (Channel: {channel_id}) to Campaign: {campaign_name or 'PENDING_BIND'}")
         
@@ -61,113 +155,398 @@ class GameEngine:
             if platform_id == "local":
                  campaign_name = dm_utils.ACTIVE_CAMPAIGN
             elif message_text.startswith("!admin bind"):
-                 return self.handle_admin_bind(platform_id, channel_id, user_id, message_text)
+                 return None, self.handle_admin_bind(platform_id, channel_id, user_id, message_text)
             else:
-                 return f"❌ This channel is not yet registered to a campaign. An admin must run `!admin bind <name>` (e.g., `!admin bind oneshot`).\n\n(Channel ID: `{channel_id}`)"
+                 return None, f"❌ This channel is not yet registered to a campaign. An admin must run `!admin bind <name>` (e.g., `!admin bind oneshot`).\n\n(Channel ID: `{channel_id}`)"
+        return campaign_name, None
+
+    def _access_denied(self, user_id, channel_id, server_id, platform_id):
+        """The refusal for users outside the allow list, or None."""
+        if is_allowed(user_id=user_id, channel_id=channel_id, server_id=server_id, platform_id=platform_id):
+            return None
+        platform_label = "Slack Workspace" if platform_id == "slack" else "Discord Server"
+        return f"🔒 [Access Denied] You are not in the Book of Allowed Heroes for this {platform_label}.\nAsk the DM to run `!admin allow <@{user_id}>`."
+
+    def _speaker_text(self, turn: QueuedTurn) -> str:
+        """The player's message, tagged with who said it."""
+        char_name = dm_utils.get_character_name(turn.user_id)
+        if char_name != "Unknown Hero":
+             return f"(Character: {char_name}) {turn.message_text}"
+        elif turn.user_name:
+             return f"(User: {turn.user_name}) {turn.message_text}"
+        return turn.message_text
+
+    def _compose_turn_text(self, campaign_name: str, batch: list) -> str:
+        """
+        Context injection around the player message(s) of a turn.
+        batch: QueuedTurns answered together (see core.scheduler).
+        Must be called with the campaign context set.
+        """
+        # Player Name
+        if len(batch) == 1:
+            final_text = self._speaker_text(batch[0])
+        else:
+            spoken = "\n\n".join(self._speaker_text(turn) for turn in batch)
+            final_text = f"[Queued Messages - several players spoke while you were answering. Respond to all of them in one reply]:\n{spoken}"
+
+        # Older turns that left the context window but matter now
+        recalled = self.recall_older_turns(campaign_name, "\n".join(turn.message_text for turn in batch))
+        if recalled:
+            final_text = f"[Recalled Earlier Turns]:\n{recalled}\n\n{final_text}"
+
+        # Passive Buffer
+        buffered_context = dm_utils.get_and_clear_context_buffer()
+        if buffered_context:
+            final_text = f"[Background Context - Untagged Conversation]:\n{buffered_context}\n\n[Direct Interaction]:\n{final_text}"
+
+        # Time Gap / New Session
+        hours_since = dm_utils.get_hours_since_last_message()
+        if hours_since > 4.0:
+            system_note = f"[System Note: It has been {hours_since:.1f} hours since the last game interaction. This is likely a new session. Please welcome the players back, mention the break, and ask for a roll call to see who is present before continuing.]"
+            final_text = f"{system_note}\n\n{final_text}"
+
+        # Setup Wizard
+        setup_step = dm_utils.get_setup_step()
+        if setup_step < 4:
+            setup_instructions = dm_utils.get_setup_instructions(setup_step)
+            final_text = f"{setup_instructions}\n\n{final_text}"
+        return final_text
+
+    def _turn_content(self, campaign_name: str, batch: list) -> list:
+        """The message parts sent to the model for a turn."""
+        content = [self._compose_turn_text(campaign_name, batch)]
+        for turn in batch:
+            content.extend(turn.attachments)
+        return content
+
+    def _save_history(self, campaign_name: str, session):
+        """Saves the session's history (Context is set, so snapshots save to correct folder)."""
+        try:
+            # Normalize history access (Google wrapper might need helper, Local has .history)
+            if hasattr(session, "get_history"):
+                hist_data = session.get_history()
+            elif hasattr(session, "history"):
+                hist_data = session.history
+            elif hasattr(session, "chat") and hasattr(session.chat, "history"):
+                 # Extract raw history from Google Chat object if needed, but wrapper should handle this
+                 hist_data = session.history # Assuming wrapper syncs it or exposes it
+            else:
+                 hist_data = []
+
+            # The session only holds the recent turns; save the full history
+            window = self.get_context_window(campaign_name)
+            if window is not None:
+                hist_data = window.full_history(hist_data)
+            saved = dm_utils.save_chat_snapshot(hist_data)
+            if window is not None and window.needs_refold(saved):
+                # Rebuild next turn so older turns get folded into the summary
+                self.invalidate_session(campaign_name)
+            else:
+                # Our own write must not invalidate the in-memory session
+                self._remember_session(campaign_name, session)
+        except Exception as h_err:
+            print(f"[Engine] Failed to save history: {h_err}")
+            self.invalidate_session(campaign_name)
+
+    def _handle_llm_error(self, campaign_name: str, error: Exception, attempt: int, max_retries: int):
+        """
+        Logs an LLM failure and drops the session (it may hold a half-finished turn).
+        Returns (retry_delay, reply); retry_delay is None when the turn should fail with reply.
+        """
+        error_str = str(error)
+        print(f"[Engine] LLM Error (Attempt {attempt+1}/{max_retries+1}): {error_str}")
+        # The session may hold a half-finished turn; rebuild from disk next time
+        self.invalidate_session(campaign_name)
+        
+        # Check for 503, Overloaded, or Network/SSL Timeouts
+        error_lower = error_str.lower()
+        is_transient = (
+            "503" in error_str or 
+            "overloaded" in error_lower or
+            "timed out" in error_lower or
+            "ssl" in error_lower or
+            "connection" in error_lower
+        )
+        
+        is_rate_limited = llm_bridge.is_rate_limit_error(error)
+        
+        if is_rate_limited and attempt < max_retries:
+            controller = rate_limiter.get_controller(self.provider, self.model_name)
+            if controller.limited:
+                # Every campaign backs off through the shared buckets, so no fixed sleep here
+                controller.penalize()
+                return 0, None
+            return RETRY_BASE_DELAY * (2 ** attempt), None
+
+        if is_transient and attempt < max_retries:
+            return RETRY_BASE_DELAY * (2 ** attempt), None
+        
+        # Final Error Handling
+        if is_rate_limited:
+            return None, "⏳ The magical winds are calm (Rate Limit Exceeded). Please wait a moment."
+        elif is_transient:
+            return None, "😵 The spirits are overwhelmed (Model Overloaded). Please try again in a moment."
+        else:
+            return None, f"I encountered a magical disturbance (Error: {error_str})"
+
+    def process_message(self, user_id: str, user_name: str, message_text: str, platform_id: str, attachments: list = None, channel_id: str = None, server_id: str = None) -> str:
+        """
+        Main Game Loop (Multitenant):
+        1. Determine Campaign
+        2. Set Context
+        3. Wait for the campaign's turn (one turn per campaign at a time)
+        4. Run turn
+        Returns None when the message was answered as part of another
+        player's turn (it arrived while that turn was queued).
+        """
+        # 1. Determine Campaign
+        campaign_name, reply = self._route(platform_id, channel_id, user_id, message_text)
+        if reply:
+            return reply
 
         # 2. Set Context for all nested util calls in this thread
         token = dm_utils.set_active_campaign(campaign_name)
         try:
         
             # Permission Check
-            if not is_allowed(user_id=user_id, channel_id=channel_id, server_id=server_id, platform_id=platform_id):
-                platform_label = "Slack Workspace" if platform_id == "slack" else "Discord Server"
-                return f"🔒 [Access Denied] You are not in the Book of Allowed Heroes for this {platform_label}.\nAsk the DM to run `!admin allow <@{user_id}>`."
+            denied = self._access_denied(user_id, channel_id, server_id, platform_id)
+            if denied:
+                return denied
 
-            session = self.get_campaign_session(campaign_name)
+            # 3. Single writer per campaign
+            batch = self.scheduler.wait_turn(campaign_name, QueuedTurn(user_id, user_name, message_text, list(attachments or [])))
+            if batch is None:
+                return None
+            try:
+                notice = rate_limiter.backpressure_notice(self.provider, self.model_name)
+                if notice:
+                    print(f"[Engine] {campaign_name}: {notice}")
+                return self._run_turn(campaign_name, batch)
+            finally:
+                self.scheduler.finish(campaign_name)
+        finally:
+            # Clear context
+            dm_utils.active_campaign_ctx.reset(token)
 
-            # Context Injection
-            final_text = message_text
-            
-            # Player Name
-            char_name = dm_utils.get_character_name(user_id)
-            if char_name != "Unknown Hero":
-                 final_text = f"(Character: {char_name}) {final_text}"
-            elif user_name:
-                 final_text = f"(User: {user_name}) {final_text}"
-
-            # Passive Buffer
-            buffered_context = dm_utils.get_and_clear_context_buffer()
-            if buffered_context:
-                final_text = f"[Background Context - Untagged Conversation]:\n{buffered_context}\n\n[Direct Interaction]:\n{final_text}"
-
-            # Time Gap / New Session
-            hours_since = dm_utils.get_hours_since_last_message()
-            if hours_since > 4.0:
-                system_note = f"[System Note: It has been {hours_since:.1f} hours since the last game interaction. This is likely a new session. Please welcome the players back, mention the break, and ask for a roll call to see who is present before continuing.]"
-                final_text = f"{system_note}\n\n{final_text}"
-
-            # Setup Wizard
-            setup_step = dm_utils.get_setup_step()
-            if setup_step < 4:
-                setup_instructions = dm_utils.get_setup_instructions(setup_step)
-                final_text = f"{setup_instructions}\n\n{final_text}"
-
-            # 3. Call LLM with Retry Logic
-            max_retries = 3
-            base_delay = 2
-            
-            for attempt in range(max_retries + 1):
-                try:
-                    content = [final_text]
-                    if attachments:
-                        content.extend(attachments)
-                    
-                    # session (ChatSession) holds history and tools
-                    response = session.send_message(content, timeout=90)
-                    
-                    # 4. Save History (Context is set, so snapshots save to correct folder)
-                    try:
-                        # Normalize history access (Google wrapper might need helper, Local has .history)
-                        if hasattr(session, "get_history"):
-                            hist_data = session.get_history()
-                        elif hasattr(session, "history"):
-                            hist_data = session.history
-                        elif hasattr(session, "chat") and hasattr(session.chat, "history"):
-                             # Extract raw history from Google Chat object if needed, but wrapper should handle this
-                             hist_data = session.history # Assuming wrapper syncs it or exposes it
-                        else:
-                             hist_data = []
-
-                        dm_utils.save_chat_snapshot(hist_data)
-                    except Exception as h_err:
-                        print(f"[Engine] Failed to save history: {h_err}")
-                        
-                    text_out = response.text
-                    if not text_out:
-                        text_out = "..."
-                        
-                    return text_out
-
-                except Exception as e:
-                    error_str = str(e)
-                    print(f"[Engine] LLM Error (Attempt {attempt+1}/{max_retries+1}): {error_str}")
+    def _run_turn(self, campaign_name: str, batch: list) -> str:
+        """Calls the LLM for a turn and saves the history. Must hold the campaign's turn."""
+        session = self.get_campaign_session(campaign_name)
+        content = self._turn_content(campaign_name, batch)
+
+        # 4. Call LLM with Retry Logic
+        max_retries = 3
+        
+        for attempt in range(max_retries + 1):
+            try:
+                # session (ChatSession) holds history and tools
+                response = session.send_message(content, timeout=90)
+                
+                # Save History
+                self._save_history(campaign_name, session)
                     
-                    # Check for 503, Overloaded, or Network/SSL Timeouts
-                    error_lower = error_str.lower()
-                    is_transient = (
-                        "503" in error_str or 
-                        "overloaded" in error_lower or
-                        "timed out" in error_lower or
-                        "ssl" in error_lower or
-                        "connection" in error_lower
-                    )
+                text_out = response.text
+                if not text_out:
+                    text_out = "..."
                     
-                    if is_transient and attempt < max_retries:
-                        time.sleep(base_delay * (2 ** attempt))
+                return text_out
+
+            except Exception as e:
+                delay, reply = self._handle_llm_error(campaign_name, e, attempt, max_retries)
+                if delay is None:
+                    return reply
+                time.sleep(delay)
+                session = self.get_campaign_session(campaign_name)
+
+    def process_message_stream(self, user_id: str, user_name: str, message_text: str, platform_id: str, attachments: list = None, channel_id: str = None, server_id: str = None):
+        """
+        Same turn as process_message, but yields the reply as text deltas while
+        the model generates it, so adapters can show it progressively.
+        Yields nothing when the message was coalesced into another turn.
+        May first yield a streaming.StatusUpdate (not reply text) when the turn
+        is queued behind the LLM rate limit.
+        Transient errors are only retried before anything was yielded.
+        Consume the generator on a single thread (it holds the campaign context).
+        """
+        campaign_name, reply = self._route(platform_id, channel_id, user_id, message_text)
+        if reply:
+            yield reply
+            return
+
+        token = dm_utils.set_active_campaign(campaign_name)
+        try:
+            denied = self._access_denied(user_id, channel_id, server_id, platform_id)
+            if denied:
+                yield denied
+                return
+
+            batch = self.scheduler.wait_turn(campaign_name, QueuedTurn(user_id, user_name, message_text, list(attachments or [])))
+            if batch is None:
+                return
+            try:
+                notice = rate_limiter.backpressure_notice(self.provider, self.model_name)
+                if notice:
+                    yield StatusUpdate(notice)
+                yield from self._run_turn_stream(campaign_name, batch)
+            finally:
+                self.scheduler.finish(campaign_name)
+        finally:
+            dm_utils.active_campaign_ctx.reset(token)
+
+    def _run_turn_stream(self, campaign_name: str, batch: list):
+        session = self.get_campaign_session(campaign_name)
+        content = self._turn_content(campaign_name, batch)
+
+        max_retries = 3
+        started = time.monotonic()
+
+        for attempt in range(max_retries + 1):
+            emitted = False
+            try:
+                for delta in session.send_message_stream(content, timeout=90):
+                    if not delta:
                         continue
-                    
-                    # Final Error Handling
-                    if "429" in error_str or "RESOURCE_EXHAUSTED" in error_str:
-                        return "⏳ The magical winds are calm (Rate Limit Exceeded). Please wait a moment."
-                    elif is_transient:
-                        return "😵 The spirits are overwhelmed (Model Overloaded). Please try again in a moment."
-                    else:
-                        return f"I encountered a magical disturbance (Error: {error_str})"
+                    if not emitted:
+                        print(f"⚡ [Engine] First token after {time.monotonic() - started:.2f}s")
+                    emitted = True
+                    yield delta
+                self._save_history(campaign_name, session)
+                if not emitted:
+                    yield "..."
+                return
+            except GeneratorExit:
+                # The adapter stopped reading mid-turn; the session is incomplete
+                self.invalidate_session(campaign_name)
+                raise
+            except Exception as e:
+                delay, reply = self._handle_llm_error(campaign_name, e, attempt, max_retries)
+                if delay is not None and not emitted:
+                    time.sleep(delay)
+                    session = self.get_campaign_session(campaign_name)
+                    continue
+                if delay is not None:
+                    reply = "😵 The spirits are overwhelmed (Model Overloaded). Please try again in a moment."
+                yield f"\n\n{reply}" if emitted else reply
+                return
+
+    async def process_message_async(self, user_id: str, user_name: str, message_text: str, platform_id: str, attachments: list = None, channel_id: str = None, server_id: str = None) -> str:
+        """
+        process_message for asyncio adapters. The model call awaits the session's
+        async API; file/DB helpers run on worker threads (asyncio.to_thread
+        carries the campaign context along).
+        Routing and the access check run inline (they are small file reads) so
+        the message is queued for its campaign before the first await, in the
+        order messages arrived.
+        """
+        campaign_name, reply = self._route(platform_id, channel_id, user_id, message_text)
+        if reply:
+            return reply
+
+        token = dm_utils.set_active_campaign(campaign_name)
+        try:
+            denied = self._access_denied(user_id, channel_id, server_id, platform_id)
+            if denied:
+                return denied
+
+            batch = await self.scheduler.wait_turn_async(campaign_name, QueuedTurn(user_id, user_name, message_text, list(attachments or [])))
+            if batch is None:
+                return None
+            try:
+                notice = rate_limiter.backpressure_notice(self.provider, self.model_name)
+                if notice:
+                    print(f"[Engine] {campaign_name}: {notice}")
+                return await self._run_turn_async(campaign_name, batch)
+            finally:
+                self.scheduler.finish(campaign_name)
         finally:
-            # Clear context
             dm_utils.active_campaign_ctx.reset(token)
 
+    async def _run_turn_async(self, campaign_name: str, batch: list) -> str:
+        session = await asyncio.to_thread(self.get_campaign_session, campaign_name)
+        content = await asyncio.to_thread(self._turn_content, campaign_name, batch)
+
+        max_retries = 3
+
+        for attempt in range(max_retries + 1):
+            try:
+                response = await session.send_message_async(content, timeout=90)
+                await asyncio.to_thread(self._save_history, campaign_name, session)
+                return response.text or "..."
+            except Exception as e:
+                delay, reply = self._handle_llm_error(campaign_name, e, attempt, max_retries)
+                if delay is None:
+                    return reply
+                await asyncio.sleep(delay)
+                session = await asyncio.to_thread(self.get_campaign_session, campaign_name)
+
+    async def process_message_stream_async(self, user_id: str, user_name: str, message_text: str, platform_id: str, attachments: list = None, channel_id: str = None, server_id: str = None):
+        """
+        process_message_stream for asyncio adapters (an async generator).
+        Consume it within a single task (it holds the campaign context).
+        The message is queued on the first read, before any await (see
+        process_message_async).
+        """
+        campaign_name, reply = self._route(platform_id, channel_id, user_id, message_text)
+        if reply:
+            yield reply
+            return
+
+        token = dm_utils.set_active_campaign(campaign_name)
+        try:
+            denied = self._access_denied(user_id, channel_id, server_id, platform_id)
+            if denied:
+                yield denied
+                return
+
+            batch = await self.scheduler.wait_turn_async(campaign_name, QueuedTurn(user_id, user_name, message_text, list(attachments or [])))
+            if batch is None:
+                return
+            try:
+                notice = rate_limiter.backpressure_notice(self.provider, self.model_name)
+                if notice:
+                    yield StatusUpdate(notice)
+                async for delta in self._run_turn_stream_async(campaign_name, batch):
+                    yield delta
+            finally:
+                self.scheduler.finish(campaign_name)
+        finally:
+            dm_utils.active_campaign_ctx.reset(token)
+
+    async def _run_turn_stream_async(self, campaign_name: str, batch: list):
+        session = await asyncio.to_thread(self.get_campaign_session, campaign_name)
+        content = await asyncio.to_thread(self._turn_content, campaign_name, batch)
+
+        max_retries = 3
+        started = time.monotonic()
+
+        for attempt in range(max_retries + 1):
+            emitted = False
+            try:
+                async for delta in session.send_message_stream_async(content, timeout=90):
+                    if not delta:
+                        continue
+                    if not emitted:
+                        print(f"⚡ [Engine] First token after {time.monotonic() - started:.2f}s")
+                    emitted = True
+                    yield delta
+                await asyncio.to_thread(self._save_history, campaign_name, session)
+                if not emitted:
+                    yield "..."
+                return
+            except (GeneratorExit, asyncio.CancelledError):
+                # The adapter stopped reading mid-turn; the session is incomplete
+                self.invalidate_session(campaign_name)
+                raise
+            except Exception as e:
+                delay, reply = self._handle_llm_error(campaign_name, e, attempt, max_retries)
+                if delay is not None and not emitted:
+                    await asyncio.sleep(delay)
+                    session = await asyncio.to_thread(self.get_campaign_session, campaign_name)
+                    continue
+                if delay is not None:
+                    reply = "😵 The spirits are overwhelmed (Model Overloaded). Please try again in a moment."
+                yield f"\n\n{reply}" if emitted else reply
+                return
+
     def buffer_message(self, user_id: str, user_name: str, message_text: str, platform_id: str, channel_id: str = None, server_id: str = None):
         """Passively buffer messages."""
         if is_allowed(user_id, channel_id, server_id, platform_id):
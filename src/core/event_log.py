@@ -0,0 +1,170 @@
+import os
+import re
+import json
+import datetime
+import threading
+from core.campaign import get_current_session_dir
+
+# --- Session Event Journal ---
+# Every loggable game event (rolls, narration, secrets, world facts, summary
+# sections) is appended as one JSON line to events.jsonl in the session dir.
+# Views that used to be re-parsed out of the markdown logs (party status,
+# world updates, recent rolls) are materialized from the journal and caught up
+# lazily: a read only applies the events appended since the stored offset.
+# The markdown logs are still written for people and for archiving.
+
+EVENTS_FILENAME = "events.jsonl"
+VIEWS_FILENAME = "event_views.json"
+
+EVENT_TYPES = ("roll", "narration", "secret", "world_fact", "section", "tool", "meta")
+
+# Meta event marking that the session log's markdown sections are in the journal
+MARKDOWN_SECTIONS_RECORDED = "markdown_sections_recorded"
+
+# Recent rolls kept in the materialized view
+RECENT_ROLLS = 20
+
+_SECTION_PATTERN = re.compile(r"^## (.+?)\s*$", re.MULTILINE)
+
+_append_lock = threading.Lock()
+_views_lock = threading.Lock()
+_views_cache: dict[str, dict] = {}  # session_dir -> views
+
+def _empty_views() -> dict:
+    return {"offset": 0, "counts": {}, "sections": {}, "world_facts": [], "recent_rolls": [],
+            "last_event_at": None, "markdown_sections_recorded": False}
+
+def split_sections(markdown: str) -> dict:
+    """Splits markdown into {'Heading': body} for every '## Heading' section."""
+    sections = {}
+    matches = list(_SECTION_PATTERN.finditer(markdown))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(markdown)
+        sections[match.group(1).strip()] = markdown[match.end():end].strip()
+    return sections
+
+def append_event(event_type: str, content: str, session_dir: str | None = None, secret: bool = False, **data) -> dict:
+    """
+    Appends one typed event to the session journal.
+    event_type: One of EVENT_TYPES.
+    session_dir: Defaults to the active session.
+    """
+    if event_type not in EVENT_TYPES:
+        raise ValueError(f"Unknown event type: {event_type}")
+    session_dir = session_dir or get_current_session_dir()
+    event = {
+        "ts": datetime.datetime.now().isoformat(timespec="seconds"),
+        "type": event_type,
+        "secret": secret,
+        "content": content,
+        **data
+    }
+    line = json.dumps(event, ensure_ascii=False) + "\n"
+    os.makedirs(session_dir, exist_ok=True)
+    with _append_lock:
+        with open(os.path.join(session_dir, EVENTS_FILENAME), "a", encoding="utf-8") as f:
+            f.write(line)
+    return event
+
+def append_sections(markdown: str, session_dir: str | None = None, source: str = "summary"):
+    """
+    Records every '## Heading' section of the session log's markdown as a
+    section event; the log needs no parsing for its sections afterwards.
+    """
+    for name, body in split_sections(markdown).items():
+        append_event("section", body, session_dir, section=name, source=source)
+    append_event("meta", MARKDOWN_SECTIONS_RECORDED, session_dir)
+
+def _apply(views: dict, event: dict):
+    event_type = event.get("type")
+    views["counts"][event_type] = views["counts"].get(event_type, 0) + 1
+    views["last_event_at"] = event.get("ts")
+    if event_type == "section":
+        views["sections"][event.get("section", "")] = event.get("content", "")
+    elif event_type == "world_fact":
+        views["world_facts"].append(event.get("content", ""))
+    elif event_type == "roll":
+        views["recent_rolls"] = (views["recent_rolls"] + [event.get("content", "")])[-RECENT_ROLLS:]
+    elif event_type == "meta" and event.get("content") == MARKDOWN_SECTIONS_RECORDED:
+        views["markdown_sections_recorded"] = True
+
+def _load_views(session_dir: str) -> dict:
+    path = os.path.join(session_dir, VIEWS_FILENAME)
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return {**_empty_views(), **json.load(f)}
+        except (OSError, json.JSONDecodeError):
+            pass
+    return _empty_views()
+
+def _save_views(session_dir: str, views: dict):
+    path = os.path.join(session_dir, VIEWS_FILENAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(views, f)
+    os.replace(tmp_path, path)
+
+def _refresh(session_dir: str) -> dict:
+    """Brings the cached views up to date with the journal. Caller holds _views_lock."""
+    events_path = os.path.join(session_dir, EVENTS_FILENAME)
+    try:
+        size = os.path.getsize(events_path)
+    except OSError:
+        size = 0
+
+    views = _views_cache.get(session_dir)
+    if views is None:
+        views = _load_views(session_dir)
+    if size < views["offset"]:
+        # Journal was replaced or truncated: rebuild from scratch
+        views = _empty_views()
+    if size > views["offset"]:
+        with open(events_path, "rb") as f:
+            f.seek(views["offset"])
+            chunk = f.read(size - views["offset"])
+        # Only consume complete lines; a concurrent append may be mid-write
+        complete = chunk[:chunk.rfind(b"\n") + 1]
+        for raw in complete.splitlines():
+            try:
+                _apply(views, json.loads(raw))
+            except json.JSONDecodeError:
+                continue
+        if complete:
+            views["offset"] += len(complete)
+            _save_views(session_dir, views)
+    _views_cache[session_dir] = views
+    return views
+
+def get_views(session_dir: str | None = None) -> dict:
+    """
+    Returns (a copy of) the session's materialized views, first applying any
+    events appended since they were last brought up to date.
+    """
+    session_dir = session_dir or get_current_session_dir()
+    with _views_lock:
+        return json.loads(json.dumps(_refresh(session_dir)))
+
+def get_section(name: str, session_dir: str | None = None) -> str | None:
+    """
+    Returns the latest recorded body of a '## name' section, or None.
+    Sessions that predate the journal have their markdown log's sections
+    imported on first use.
+    """
+    session_dir = session_dir or get_current_session_dir()
+    with _views_lock:
+        views = _refresh(session_dir)
+        if name in views["sections"] or views["markdown_sections_recorded"]:
+            return views["sections"].get(name)
+    import_legacy_sections(session_dir)
+    with _views_lock:
+        return _refresh(session_dir)["sections"].get(name)
+
+def import_legacy_sections(session_dir: str):
+    """Records the sections of an existing session_log.md, once per session."""
+    log_path = os.path.join(session_dir, "session_log.md")
+    markdown = ""
+    if os.path.exists(log_path):
+        with open(log_path, "r", encoding="utf-8") as f:
+            markdown = f.read()
+    append_sections(markdown, session_dir, source="legacy")
@@ -1,7 +1,104 @@
 import os
+import time
+import threading
 from core.campaign import get_campaign_root
+from core import database
 from core.database import get_db_connection
 
+# --- Player Identity Cache ---
+# Names are read on every inbound message but almost never change, so each
+# campaign's players table is mirrored in memory. register_player writes
+# through; a periodic reload picks up changes made by other processes.
+
+IDENTITY_CACHE_TTL = 300.0
+
+def _normalize_name(name: str) -> str:
+    return " ".join(name.lower().split())
+
+class PlayerIdentityMap:
+    """In-memory mirror of one campaign's players table with a normalized-name index."""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.loaded_at = 0.0
+        self._inode = None
+        self._names: dict[str, str] = {}     # slack_id -> character_name
+        self._by_name: dict[str, str] = {}   # normalized name -> first slack_id (rowid order)
+        self._lock = threading.Lock()
+
+    def _file_inode(self):
+        try:
+            return os.stat(self.db_path).st_ino
+        except OSError:
+            return None
+
+    def is_stale(self) -> bool:
+        return (time.monotonic() - self.loaded_at > IDENTITY_CACHE_TTL
+                or self._inode != self._file_inode())
+
+    def load(self, conn):
+        rows = conn.execute("SELECT slack_id, character_name FROM players ORDER BY rowid").fetchall()
+        names = {}
+        by_name = {}
+        for row in rows:
+            names[row['slack_id']] = row['character_name']
+            by_name.setdefault(_normalize_name(row['character_name']), row['slack_id'])
+        with self._lock:
+            self._names = names
+            self._by_name = by_name
+            self._inode = self._file_inode()
+            self.loaded_at = time.monotonic()
+
+    def remember(self, user_id: str, char_name: str):
+        """Write-through for a player row that was just inserted or renamed."""
+        with self._lock:
+            old_name = self._names.get(user_id)
+            self._names[user_id] = char_name
+            if old_name is not None and self._by_name.get(_normalize_name(old_name)) == user_id:
+                del self._by_name[_normalize_name(old_name)]
+                # Another player may share the old name
+                for other_id, other_name in self._names.items():
+                    if other_id != user_id and _normalize_name(other_name) == _normalize_name(old_name):
+                        self._by_name[_normalize_name(old_name)] = other_id
+                        break
+            self._by_name.setdefault(_normalize_name(char_name), user_id)
+
+    def character_name(self, user_id: str) -> str | None:
+        return self._names.get(user_id)
+
+    def user_id(self, char_name: str) -> str | None:
+        """Exact (case-insensitive) match first, then the first name containing it."""
+        key = _normalize_name(char_name)
+        with self._lock:
+            user_id = self._by_name.get(key)
+            if user_id is not None or not key:
+                return user_id
+            for candidate, candidate_id in self._by_name.items():
+                if key in candidate:
+                    return candidate_id
+        return None
+
+_identity_maps: dict[str, PlayerIdentityMap] = {}
+_identity_lock = threading.Lock()
+
+def get_identity_map(conn=None) -> PlayerIdentityMap:
+    """Returns the active campaign's identity map, (re)loading it when stale."""
+    db_path = os.path.abspath(database.get_db_path())
+    with _identity_lock:
+        identity = _identity_maps.setdefault(db_path, PlayerIdentityMap(db_path))
+    if identity.is_stale():
+        if conn is None:
+            with get_db_connection() as conn:
+                identity.load(conn)
+        else:
+            identity.load(conn)
+    return identity
+
+def clear_identity_cache():
+    """Drops every cached identity map."""
+    with _identity_lock:
+        _identity_maps.clear()
+
 # --- Player & Attendance Logic ---
 
 def register_player(user_id: str, char_name: str) -> str:
@@ -12,34 +109,24 @@ def register_player(user_id: str, char_name: str) -> str:
             VALUES (?, ?)
             ON CONFLICT(slack_id) DO UPDATE SET character_name=excluded.character_name
         ''', (user_id, char_name))
+    get_identity_map().remember(user_id, char_name)
     return f"Registered <@{user_id}> as **{char_name}**."
 
 def get_character_name(user_id: str) -> str:
-    """Retrieves a character name by Slack ID."""
-    with get_db_connection() as conn:
-        cursor = conn.execute("SELECT character_name FROM players WHERE slack_id = ?", (user_id,))
-        row = cursor.fetchone()
-        if row:
-            return row['character_name']
-    return "Unknown Hero"
+    """Retrieves a character name by Slack ID (served from the identity cache)."""
+    return get_identity_map().character_name(user_id) or "Unknown Hero"
 
 def get_user_id_by_character_name(char_name: str) -> str | None:
     """
     Reverse lookup: Find Slack User ID from Character Name.
-    Case-insensitive partial match via SQLite LIKE.
+    Case-insensitive exact match, then partial match, from the identity cache.
     """
-    with get_db_connection() as conn:
-        # Try exact match first
-        cursor = conn.execute("SELECT slack_id FROM players WHERE LOWER(character_name) = LOWER(?)", (char_name.strip(),))
-        row = cursor.fetchone()
-        if row:
-            return row['slack_id']
-            
-        # Try partial match
-        like_query = f"%{char_name.strip()}%"
-        cursor = conn.execute("SELECT slack_id FROM players WHERE character_name LIKE ?", (like_query,))
-        row = cursor.fetchone()
-        if row:
-            return row['slack_id']
-            
-    return None
+    return get_identity_map().user_id(char_name.strip())
+
+def get_user_ids_by_character_names(char_names: list, conn=None) -> dict:
+    """
+    Batch reverse lookup with the same matching as get_user_id_by_character_name.
+    Returns {name: slack_id or None} keyed by the names as given.
+    """
+    identity = get_identity_map(conn)
+    return {name: identity.user_id(name.strip()) for name in char_names}
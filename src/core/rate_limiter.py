@@ -0,0 +1,205 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from typing import Optional
+
+# --- LLM Admission Control ---
+# All campaigns share one API key per provider, so their model calls share
+# its quota. Every request is admitted through the controller for its
+# provider/model, which paces requests with requests-per-minute and
+# tokens-per-minute token buckets instead of bursting into 429s and then
+# backing off all at once. Waiting requests are served by priority: players
+# waiting on a reply go before background work (summaries, image prompts).
+
+# Priorities (lower is served first)
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# (requests per minute, tokens per minute) per provider; 0 means unlimited.
+# DM_RATE_RPM / DM_RATE_TPM override them for every provider.
+DEFAULT_LIMITS = {"google": (60, 1000000), "claude": (50, 40000), "local": (0, 0)}
+
+# Tokens reserved for the reply when estimating a request's cost
+OUTPUT_RESERVE_TOKENS = 1024
+
+# Rough characters per token when only the prompt length is known
+CHARS_PER_TOKEN = 4.0
+
+# Players are told their turn is queued when the wait is expected to exceed this
+NOTICE_AFTER_SECONDS = float(os.environ.get("DM_RATE_NOTICE_SECONDS", "5"))
+
+# Longest a waiter sleeps before checking whether it reached the head of the queue
+POLL_INTERVAL = 0.1
+
+def estimate_tokens(chars: int) -> int:
+    """Estimated cost of a request whose prompt (history included) has `chars` characters."""
+    return int(chars / CHARS_PER_TOKEN) + OUTPUT_RESERVE_TOKENS
+
+class TokenBucket:
+    """Refills `per_minute` units per minute, up to a burst of `per_minute`."""
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` units are available."""
+        self._refill()
+        return max(0.0, (amount - self.level) / self.rate)
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= amount
+
+    def drain(self):
+        self._refill()
+        self.level = min(self.level, 0.0)
+
+class AdmissionController:
+    """
+    Admits requests for one provider/model in priority order, as fast as the
+    RPM/TPM buckets allow. A request bigger than the TPM bucket is admitted
+    once the bucket is full (and leaves it in debt).
+    """
+    def __init__(self, name: str, rpm: int, tpm: int):
+        self.name = name
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self._lock = threading.Lock()
+        self._waiting = []  # heap of [priority, seq, tokens]
+        self._seq = itertools.count()
+        self.admitted = 0
+        self.delayed = 0
+
+    @property
+    def limited(self) -> bool:
+        return bool(self.requests or self.tokens)
+
+    def _wait_time(self, tokens: int) -> float:
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.wait_time(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.wait_time(min(tokens, self.tokens.capacity)))
+        return wait
+
+    def _enter(self, tokens: int, priority: int) -> list:
+        entry = [priority, next(self._seq), tokens]
+        with self._lock:
+            heapq.heappush(self._waiting, entry)
+        return entry
+
+    def _try_admit(self, entry: list) -> float:
+        """Admits entry if it is first in line and the buckets allow; else returns seconds to wait."""
+        with self._lock:
+            if self._waiting[0] is not entry:
+                return POLL_INTERVAL
+            wait = self._wait_time(entry[2])
+            if wait > 0:
+                return wait
+            heapq.heappop(self._waiting)
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(entry[2])
+            self.admitted += 1
+            return 0.0
+
+    def _leave(self, entry: list):
+        with self._lock:
+            if entry in self._waiting:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+
+    def acquire(self, tokens: int, priority: int = INTERACTIVE):
+        """Blocks until a request costing `tokens` may be sent."""
+        if not self.limited:
+            return
+        entry = self._enter(tokens, priority)
+        try:
+            wait = self._try_admit(entry)
+            if wait > 0:
+                self.delayed += 1
+            while wait > 0:
+                time.sleep(min(wait, POLL_INTERVAL))
+                wait = self._try_admit(entry)
+        finally:
+            self._leave(entry)
+
+    async def acquire_async(self, tokens: int, priority: int = INTERACTIVE):
+        """acquire without blocking the event loop."""
+        if not self.limited:
+            return
+        entry = self._enter(tokens, priority)
+        try:
+            wait = self._try_admit(entry)
+            if wait > 0:
+                self.delayed += 1
+            while wait > 0:
+                await asyncio.sleep(min(wait, POLL_INTERVAL))
+                wait = self._try_admit(entry)
+        finally:
+            self._leave(entry)
+
+    def backlog(self, tokens: int = OUTPUT_RESERVE_TOKENS) -> tuple:
+        """(requests waiting, estimated seconds until a new request costing `tokens` is admitted)."""
+        with self._lock:
+            depth = len(self._waiting)
+            queued_tokens = sum(entry[2] for entry in self._waiting)
+            wait = 0.0
+            if self.requests:
+                wait = max(wait, self.requests.wait_time(depth + 1))
+            if self.tokens:
+                wait = max(wait, self.tokens.wait_time(queued_tokens + tokens))
+        return depth, wait
+
+    def penalize(self):
+        """The provider answered 429 anyway: empty the buckets so every campaign slows down together."""
+        with self._lock:
+            if self.requests:
+                self.requests.drain()
+            if self.tokens:
+                self.tokens.drain()
+        print(f"⏳ [RateLimit] {self.name} was rate limited; pacing all campaigns from an empty bucket")
+
+_controllers = {}
+_controllers_lock = threading.Lock()
+
+def get_limits(provider: str) -> tuple:
+    rpm, tpm = DEFAULT_LIMITS.get(provider, (0, 0))
+    rpm = int(os.environ.get("DM_RATE_RPM", rpm))
+    tpm = int(os.environ.get("DM_RATE_TPM", tpm))
+    return rpm, tpm
+
+def get_controller(provider: str, model: str) -> AdmissionController:
+    """The shared controller for a provider/model."""
+    key = (provider, model)
+    with _controllers_lock:
+        if key not in _controllers:
+            rpm, tpm = get_limits(provider)
+            _controllers[key] = AdmissionController(f"{provider}/{model}", rpm, tpm)
+        return _controllers[key]
+
+def admit(provider: str, model: str, tokens: int = OUTPUT_RESERVE_TOKENS, priority: int = INTERACTIVE):
+    """Blocks until a request may be sent to provider/model."""
+    get_controller(provider, model).acquire(tokens, priority)
+
+async def admit_async(provider: str, model: str, tokens: int = OUTPUT_RESERVE_TOKENS, priority: int = INTERACTIVE):
+    await get_controller(provider, model).acquire_async(tokens, priority)
+
+def backpressure_notice(provider: str, model: str) -> Optional[str]:
+    """A note for players when their request will queue noticeably behind others, else None."""
+    depth, wait = get_controller(provider, model).backlog()
+    if wait < NOTICE_AFTER_SECONDS:
+        return None
+    ahead = f"{depth} request{'s' if depth != 1 else ''} ahead, " if depth else ""
+    return f"⏳ The DM is juggling many tables ({ahead}about {wait:.0f}s). Your turn is queued..."
@@ -0,0 +1,95 @@
+import os
+import asyncio
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+# --- Per-Campaign Turn Scheduling ---
+# A campaign's turn reads chat_history.json, calls the model and writes the
+# history back, so two turns of the same campaign must never overlap (the
+# second save would drop the first turn). Each campaign has one writer at a
+# time; different campaigns run in parallel. Messages that arrive while a
+# turn is in flight wait, and when it finishes they are coalesced into a
+# single next turn instead of one model call each.
+
+# Set DM_COALESCE_TURNS=0 to answer queued messages one by one (still in order)
+COALESCE_TURNS = os.environ.get("DM_COALESCE_TURNS", "1") != "0"
+
+@dataclass(eq=False)
+class QueuedTurn:
+    """One player message waiting for (or taking) a campaign's turn."""
+    user_id: str
+    user_name: str
+    message_text: str
+    attachments: List[Any] = field(default_factory=list)
+    # Resolves to the batch this message leads, or None if another message's turn answered it
+    future: Future = field(default_factory=Future, repr=False)
+
+class TurnScheduler:
+    """
+    Single-writer queues keyed by campaign.
+    wait_turn/wait_turn_async return the batch of messages the caller must
+    answer in one turn (the caller's own message first) and the caller must
+    call finish() afterwards. They return None when the message was merged
+    into a turn led by another caller.
+    """
+    def __init__(self, coalesce: bool = None):
+        self.coalesce = COALESCE_TURNS if coalesce is None else coalesce
+        self._lock = threading.Lock()
+        self._busy = set()
+        # campaign_name -> QueuedTurns waiting for the in-flight turn to finish
+        self._pending: Dict[str, List[QueuedTurn]] = {}
+
+    def _enqueue(self, campaign_name: str, turn: QueuedTurn):
+        with self._lock:
+            if campaign_name in self._busy:
+                self._pending.setdefault(campaign_name, []).append(turn)
+            else:
+                self._busy.add(campaign_name)
+                turn.future.set_result([turn])
+
+    def wait_turn(self, campaign_name: str, turn: QueuedTurn) -> Optional[List[QueuedTurn]]:
+        """Blocks until the campaign is free for this message (see class docstring)."""
+        self._enqueue(campaign_name, turn)
+        return turn.future.result()
+
+    async def wait_turn_async(self, campaign_name: str, turn: QueuedTurn) -> Optional[List[QueuedTurn]]:
+        """wait_turn without blocking the event loop."""
+        self._enqueue(campaign_name, turn)
+        try:
+            return await asyncio.shield(asyncio.wrap_future(turn.future))
+        except asyncio.CancelledError:
+            self._abandon(campaign_name, turn)
+            raise
+
+    def _abandon(self, campaign_name: str, turn: QueuedTurn):
+        """A waiter gave up: drop its message, or hand the turn on if it was already chosen to lead."""
+        with self._lock:
+            pending = self._pending.get(campaign_name, [])
+            if turn in pending:
+                pending.remove(turn)
+                return
+        if turn.future.done() and turn.future.result():
+            self.finish(campaign_name)
+
+    def finish(self, campaign_name: str):
+        """Ends the in-flight turn and admits the messages that queued up meanwhile."""
+        with self._lock:
+            pending = self._pending.pop(campaign_name, [])
+            if not pending:
+                self._busy.discard(campaign_name)
+                return
+            if self.coalesce:
+                batch, rest = pending, []
+            else:
+                batch, rest = pending[:1], pending[1:]
+            if rest:
+                self._pending[campaign_name] = rest
+            # Resolved under the lock so _abandon never sees a batch in limbo
+            batch[0].future.set_result(batch)
+            for turn in batch[1:]:
+                turn.future.set_result(None)
+
+        if len(batch) > 1:
+            print(f"🧵 [Scheduler] Coalescing {len(batch)} queued messages for '{campaign_name}' into one turn")
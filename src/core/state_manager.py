@@ -1,10 +1,15 @@
 import os
 import json
 import glob
+import queue
+import atexit
+import hashlib
 import datetime
+import threading
 from core.campaign import get_campaign_root, get_current_session_dir
 
 from core.database import get_db_connection
+from core import event_log
 
 # Suppress harmless ONNX C++ warnings for Apple Silicon (and avoid tokenizer parallelism warnings)
 os.environ["ONNXRUNTIME_LOG_LEVEL"] = "3"
@@ -15,15 +20,17 @@ from chromadb.config import Settings
 
 # --- Vector & State Logic ---
 
-def get_chroma_client():
-    """Returns a client for the local ChromaDB associated with this campaign."""
-    root = get_campaign_root()
-    db_path = os.path.join(root, "chroma_db")
-    return chromadb.PersistentClient(path=db_path)
+def get_chroma_path() -> str:
+    """Returns the path of the local ChromaDB associated with this campaign."""
+    return os.path.join(get_campaign_root(), "chroma_db")
+
+def get_chroma_client(db_path: str | None = None):
+    """Returns a client for the local ChromaDB associated with this campaign (or db_path)."""
+    return chromadb.PersistentClient(path=db_path or get_chroma_path())
 
-def get_chat_collection():
+def get_chat_collection(db_path: str | None = None):
     """Returns the main chat sequence collection."""
-    client = get_chroma_client()
+    client = get_chroma_client(db_path)
     # We use a simple generic embedding for local test, or let Chroma use its default all-MiniLM-L6-v2
     return client.get_or_create_collection(name="chat_history")
 
@@ -112,7 +119,9 @@ def prune_empty_fields(data):
 
 def save_chat_snapshot(history_data: list):
     """
-    Saves context array and simultaneously indexes ONLY new messages into Chroma.
+    Saves context array and queues the messages not yet indexed for Chroma.
+    Indexing runs on a background worker, off the response path.
+    Returns the history as saved (plain JSON).
     """
     path = get_chat_history_path()
     os.makedirs(os.path.dirname(path), exist_ok=True)
@@ -136,43 +145,128 @@ def save_chat_snapshot(history_data: list):
     with open(path, "w") as f:
         json.dump(clean_history, f, indent=2)
         
-    # Sync with ChromaDB
-    try:
-        session_name = os.path.basename(get_current_session_dir())
-        collection = get_chat_collection()
-        
-        # In a real heavy app we'd delta check. Here, we can just upsert the last message 
-        # or bulk upsert the whole array if using a stable ID.
-        # Let's bulk upsert using a hash of the content+timestamp as ID
-        import hashlib
-        
+    # Sync with ChromaDB (paths are resolved now; the worker has no campaign context)
+    chat_indexer.submit(get_chroma_path(), get_current_session_dir(), clean_history)
+    return clean_history
+
+# --- Incremental Chroma Indexing ---
+
+CHAT_INDEX_STATE_FILENAME = "chat_index_state.json"
+
+def _message_content(item: dict) -> str:
+    parts = item.get("parts", [])
+    return " ".join([str(p) for p in parts]) if isinstance(parts, list) else str(parts)
+
+def _message_id(session_name: str, idx: int, content: str) -> str:
+    """Stable Chroma ID for the message at position idx of a session."""
+    return hashlib.md5(f"{session_name}_{idx}_{content[:50]}".encode()).hexdigest()
+
+class ChatHistoryIndexer:
+    """
+    Background worker that embeds chat messages into the `chat_history`
+    collection incrementally. For each session it keeps a high-water mark (the
+    IDs of the messages already indexed, persisted in chat_index_state.json),
+    so a save only embeds messages past the mark. If the history was rewritten
+    below the mark (undo, compaction) indexing resumes from the divergence point.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._marks: dict[str, list] = {}  # session_dir -> indexed message IDs
+
+    def submit(self, db_path: str, session_dir: str, history: list):
+        """Queues a history snapshot for indexing."""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="chat-indexer", daemon=True)
+                self._thread.start()
+        self._queue.put((db_path, session_dir, history))
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """Waits until every queued snapshot is indexed. Returns False on timeout."""
+        done = threading.Event()
+        threading.Thread(target=lambda: (self._queue.join(), done.set()), daemon=True).start()
+        return done.wait(timeout)
+
+    def _run(self):
+        while True:
+            db_path, session_dir, history = self._queue.get()
+            try:
+                self.sync(db_path, session_dir, history)
+            except Exception as e:
+                print(f"DEBUG: Failed to sync with ChromaDB: {e}")
+            finally:
+                self._queue.task_done()
+
+    def _load_mark(self, session_dir: str) -> list:
+        mark = self._marks.get(session_dir)
+        if mark is None:
+            mark = []
+            state_path = os.path.join(session_dir, CHAT_INDEX_STATE_FILENAME)
+            if os.path.exists(state_path):
+                try:
+                    with open(state_path, "r") as f:
+                        mark = json.load(f).get("ids", [])
+                except (OSError, json.JSONDecodeError):
+                    mark = []
+            self._marks[session_dir] = mark
+        return mark
+
+    def _save_mark(self, session_dir: str, mark: list):
+        self._marks[session_dir] = mark
+        state_path = os.path.join(session_dir, CHAT_INDEX_STATE_FILENAME)
+        tmp_path = state_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"ids": mark}, f)
+        os.replace(tmp_path, state_path)
+
+    def sync(self, db_path: str, session_dir: str, history: list) -> int:
+        """
+        Indexes the messages of `history` past the session's high-water mark.
+        Returns the number of messages embedded.
+        """
+        session_name = os.path.basename(session_dir)
+        mark = self._load_mark(session_dir)
+
+        # Resume after the longest prefix still matching what was indexed;
+        # IDs include the position, so checking the last shared one suffices.
+        start = min(len(mark), len(history))
+        while start and mark[start - 1] != _message_id(session_name, start - 1, _message_content(history[start - 1])):
+            start -= 1
+
+        new_ids = []
         ids = []
         docs = []
         metadatas = []
-        
-        for idx, item in enumerate(clean_history):
+        for idx in range(start, len(history)):
+            item = history[idx]
             role = item.get("role", "unknown")
-            parts = item.get("parts", [])
-            content = " ".join([str(p) for p in parts]) if isinstance(parts, list) else str(parts)
-            
+            content = _message_content(item)
+            stable_id = _message_id(session_name, idx, content)
+            new_ids.append(stable_id)
+
             if len(content.strip()) < 5:
                 continue # Skip trivial empty messages
-                
-            # Create a stable ID for this exact message in this session
-            stable_id = hashlib.md5(f"{session_name}_{idx}_{content[:50]}".encode()).hexdigest()
-            
+
             ids.append(stable_id)
             docs.append(f"{role}: {content}")
             metadatas.append({"session_name": session_name, "role": role})
-            
+
         if ids:
-            collection.upsert(
+            get_chat_collection(db_path).upsert(
                 ids=ids,
                 documents=docs,
                 metadatas=metadatas
             )
-    except Exception as e:
-        print(f"DEBUG: Failed to sync with ChromaDB: {e}")
+        if start != len(mark) or new_ids:
+            self._save_mark(session_dir, mark[:start] + new_ids)
+        return len(ids)
+
+chat_indexer = ChatHistoryIndexer()
+# Short-lived processes (CLI play, scripts) get their last turn indexed before exit
+atexit.register(chat_indexer.flush, 10)
 
 def undo_last_message() -> str:
     """Removes the last (user, assistant) interaction from active history."""
@@ -191,13 +285,19 @@ def undo_last_message() -> str:
     save_chat_snapshot(history)
     return removed_text
 
-def log_to_file(file_path: str, content: str):
-    """Appends content to a flat log file (Secrets, active session, etc)."""
+def log_to_file(file_path: str, content: str, event_type: str | None = None, secret: bool = False, **event_data):
+    """
+    Appends content to a flat log file (Secrets, active session, etc).
+    With an event_type, the entry is also recorded as a typed event in the
+    session's event journal (see core.event_log).
+    """
     timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     entry = f"\n[{timestamp}] {content}\n"
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
     with open(file_path, "a") as f:
         f.write(entry)
+    if event_type:
+        event_log.append_event(event_type, content, os.path.dirname(file_path), secret=secret, **event_data)
 
 def get_hours_since_last_message() -> float:
     path = get_chat_history_path()
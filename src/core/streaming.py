@@ -0,0 +1,95 @@
+import os
+import time
+
+# --- Progressive Message Rendering ---
+# Platform adapters post a placeholder as soon as a turn starts and then edit
+# it as text deltas arrive from GameEngine.process_message_stream (or its
+# asyncio twin, process_message_stream_async). Edits are throttled (chat APIs
+# rate-limit message updates), and replies longer than a platform's message
+# limit continue in follow-up messages.
+
+# Set DM_STREAM_RESPONSES=0 to post complete replies only
+STREAMING_ENABLED = os.environ.get("DM_STREAM_RESPONSES", "1") != "0"
+
+# Minimum seconds between edits of a streaming message
+EDIT_INTERVAL = float(os.environ.get("DM_STREAM_EDIT_INTERVAL", "1.0"))
+
+# Shown at the end of a message while the reply is still being written
+TYPING_CURSOR = " ▌"
+
+PLACEHOLDER = "🎲 ..."
+
+class StatusUpdate(str):
+    """
+    A delta that is not part of the reply: a status line (e.g. the turn is
+    queued behind the LLM rate limit) shown in place of the placeholder.
+    """
+
+class StreamBuffer:
+    """
+    Accumulates streamed text and decides when the posted messages should be
+    updated. pages() splits the text into messages of at most `limit` chars.
+    """
+    def __init__(self, limit: int, interval: float = EDIT_INTERVAL):
+        self.limit = limit - len(TYPING_CURSOR)
+        self.interval = interval
+        self.text = ""
+        self.status = None
+        self._dirty = False
+        self._last_flush = 0.0
+
+    def add(self, delta: str):
+        if isinstance(delta, StatusUpdate):
+            self.status = str(delta)
+            self._dirty = True
+        elif delta:
+            self.text += delta
+            self._dirty = True
+
+    def due(self) -> bool:
+        """True when there is unrendered text and the edit interval has passed."""
+        return self._dirty and time.monotonic() - self._last_flush >= self.interval
+
+    def pages(self, final: bool = False) -> list:
+        """The text split for posting; the last page carries the typing cursor unless final."""
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        text = self.text if (self.text or not final) else "..."
+        pages = []
+        while len(text) > self.limit:
+            # Prefer breaking on a paragraph, then a line, within the limit
+            cut = text.rfind("\n\n", 0, self.limit)
+            if cut <= 0:
+                cut = text.rfind("\n", 0, self.limit)
+            if cut <= 0:
+                cut = self.limit
+            pages.append(text[:cut])
+            text = text[cut:].lstrip("\n")
+        pages.append(text)
+        if not final:
+            pages[-1] = (pages[-1] or self.status or PLACEHOLDER) + TYPING_CURSOR
+        return pages
+
+def render_pages(pages: list, posted: list, post, edit):
+    """
+    Brings the posted messages in line with pages.
+    posted: List of [handle, text] for messages already posted (updated in place).
+    post: Callable(text) -> handle. edit: Callable(handle, text).
+    """
+    for i, page in enumerate(pages):
+        if i < len(posted):
+            if posted[i][1] != page:
+                edit(posted[i][0], page)
+                posted[i][1] = page
+        else:
+            posted.append([post(page), page])
+
+async def render_pages_async(pages: list, posted: list, post, edit):
+    """render_pages for coroutine post/edit callables (discord.py)."""
+    for i, page in enumerate(pages):
+        if i < len(posted):
+            if posted[i][1] != page:
+                await edit(posted[i][0], page)
+                posted[i][1] = page
+        else:
+            posted.append([await post(page), page])
@@ -0,0 +1,151 @@
+import os
+import json
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Chunked Session Summarization ---
+# A session log is split into token-bounded chunks on entry boundaries. Each
+# chunk is summarized on its own (concurrently), and the chunk notes are then
+# reduced into the final summary. Chunk notes are cached by content hash in
+# the session dir: the log is append-only, so a re-run after new messages
+# only summarizes the chunks at the tail.
+
+# Approximate tokens per chunk (estimated as bytes // 4, like the prompt stats)
+CHUNK_TOKENS = int(os.environ.get("DM_SUMMARY_CHUNK_TOKENS", "6000"))
+
+# Chunk summaries requested at once
+MAX_WORKERS = int(os.environ.get("DM_SUMMARY_WORKERS", "4"))
+
+CHUNK_CACHE_FILENAME = "summary_chunks.json"
+
+_cache_lock = threading.Lock()
+
+def estimate_tokens(text: str) -> int:
+    return len(text.encode("utf-8")) // 4
+
+def iter_chunks(lines, max_tokens: int = CHUNK_TOKENS):
+    """
+    Groups an iterable of log lines (e.g. an open file) into chunks of at most
+    ~max_tokens. Chunks end on a blank line (entry boundary) where possible;
+    a single oversized line is split on its own.
+    """
+    max_bytes = max(1, max_tokens) * 4
+    chunk, size, last_break = [], 0, 0
+    for line in lines:
+        line_size = len(line.encode("utf-8"))
+        while line_size > max_bytes:
+            # Oversized line: flush what we have and hard-split it
+            if chunk:
+                yield "".join(chunk)
+                chunk, size, last_break = [], 0, 0
+            head = line.encode("utf-8")[:max_bytes].decode("utf-8", errors="ignore")
+            yield head
+            line = line[len(head):]
+            line_size = len(line.encode("utf-8"))
+        if size + line_size > max_bytes and chunk:
+            cut = last_break or len(chunk)
+            yield "".join(chunk[:cut])
+            chunk = chunk[cut:]
+            size = sum(len(l.encode("utf-8")) for l in chunk)
+            last_break = 0
+        chunk.append(line)
+        size += line_size
+        if not line.strip():
+            last_break = len(chunk)
+    if chunk and "".join(chunk).strip():
+        yield "".join(chunk)
+
+def _chunk_key(chunk: str, salt: str) -> str:
+    return hashlib.sha1(f"{salt}\0{chunk}".encode("utf-8")).hexdigest()
+
+def _load_cache(path: str) -> dict:
+    if os.path.exists(path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            pass
+    return {}
+
+def _save_cache(path: str, cache: dict):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+def summarize_chunks(chunks: list, summarize_chunk, cache: dict, salt: str = "",
+                     max_workers: int = MAX_WORKERS) -> tuple[list, int]:
+    """
+    Summarizes chunks concurrently, in order, reusing summaries found in cache.
+    summarize_chunk: Callable(chunk_text, index, total) -> summary text.
+    cache: {key: summary}; new summaries are added to it as they finish.
+    salt: Mixed into the cache keys (model name, prompt version).
+    Returns (summaries, number of chunks that had to be summarized).
+    """
+    keys = [_chunk_key(chunk, salt) for chunk in chunks]
+    missing = [i for i, key in enumerate(keys) if not cache.get(key)]
+    summaries = [cache.get(key) for key in keys]
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(missing))),
+                                thread_name_prefix="dm-summary") as executor:
+            futures = {i: executor.submit(summarize_chunk, chunks[i], i, len(chunks)) for i in missing}
+            error = None
+            for i, future in futures.items():
+                try:
+                    summaries[i] = future.result()
+                except Exception as e:
+                    # Let the other chunks finish so they are cached for a retry
+                    error = error or e
+                    continue
+                if summaries[i]:
+                    cache[keys[i]] = summaries[i]
+            if error:
+                raise error
+    return summaries, len(missing)
+
+def _join_notes(notes: list) -> str:
+    return "\n\n".join(f"### Part {i + 1} of {len(notes)}\n{note.strip()}" for i, note in enumerate(notes))
+
+def map_reduce_summary(lines, summarize_chunk, reduce_notes, session_dir: str, salt: str = "",
+                       max_tokens: int = CHUNK_TOKENS, max_workers: int = MAX_WORKERS) -> str:
+    """
+    Summarizes a log of any size.
+    lines: Iterable of log lines.
+    summarize_chunk: Callable(chunk_text, index, total) -> notes for that chunk.
+    reduce_notes: Callable(text, from_notes) -> final summary. Given the log
+      itself when it fits in one chunk, otherwise the ordered chunk notes.
+    Chunk notes are cached in session_dir; only those used by this run are kept.
+    """
+    chunks = list(iter_chunks(lines, max_tokens))
+    if len(chunks) <= 1:
+        return reduce_notes("".join(chunks), False)
+
+    cache_path = os.path.join(session_dir, CHUNK_CACHE_FILENAME)
+    with _cache_lock:
+        cache = _load_cache(cache_path)
+    used_keys = {_chunk_key(c, salt) for c in chunks}
+    try:
+        notes, summarized = summarize_chunks(chunks, summarize_chunk, cache, salt, max_workers)
+        print(f"📝 [Summary] {len(chunks)} chunks ({summarized} summarized, {len(chunks) - summarized} cached)")
+        combined = _join_notes(notes)
+
+        # Notes for a huge log may still not fit: reduce them level by level
+        level = 1
+        while estimate_tokens(combined) > max_tokens and level < 4:
+            chunks = list(iter_chunks(combined.splitlines(keepends=True), max_tokens))
+            if len(chunks) <= 1:
+                break
+            level_salt = f"{salt}:level{level}"
+            used_keys.update(_chunk_key(c, level_salt) for c in chunks)
+            notes, _ = summarize_chunks(chunks, summarize_chunk, cache, level_salt, max_workers)
+            combined = _join_notes(notes)
+            level += 1
+    finally:
+        # Chunks finished before a failure are kept for the retry
+        with _cache_lock:
+            os.makedirs(session_dir, exist_ok=True)
+            _save_cache(cache_path, {k: v for k, v in cache.items() if k in used_keys})
+
+    return reduce_notes(combined, True)
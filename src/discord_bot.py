@@ -58,6 +58,52 @@ def process_attachments(message):
                 
     return parts
 
+from core import streaming
+
+# Discord message length limit
+DISCORD_MESSAGE_LIMIT = 2000
+
+async def reply_with_stream(channel, **turn) -> str:
+    """
+    Posts the engine's reply to a turn, editing the message as text streams in.
+    turn: The keyword arguments of engine.process_message.
+    Returns the full reply text.
+    """
+    async def post(text):
+        return await channel.send(text)
+
+    async def edit(sent, text):
+        await sent.edit(content=text)
+
+    buffer = streaming.StreamBuffer(DISCORD_MESSAGE_LIMIT)
+    posted = []
+
+    if not streaming.STREAMING_ENABLED:
+        response_text = await engine.process_message_async(**turn)
+        if response_text is None:
+            # Answered as part of another player's turn (see core.scheduler)
+            return ""
+        buffer.add(response_text)
+        await streaming.render_pages_async(buffer.pages(final=True), posted, post, edit)
+        return buffer.text
+
+    await streaming.render_pages_async(buffer.pages(), posted, post, edit)
+    finished = False
+    try:
+        async for delta in engine.process_message_stream_async(**turn):
+            buffer.add(delta)
+            if buffer.due():
+                await streaming.render_pages_async(buffer.pages(), posted, post, edit)
+        finished = True
+    finally:
+        if finished and not buffer.text:
+            # Answered as part of another player's turn (see core.scheduler)
+            for sent, _ in posted:
+                await sent.delete()
+        else:
+            await streaming.render_pages_async(buffer.pages(final=True), posted, post, edit)
+    return buffer.text
+
 @client.event
 async def on_ready():
     print(f'🤖 Agentic DM (Discord) logged in as {client.user}')
@@ -158,8 +204,7 @@ async def on_message(message):
 
             # We process this as a normal message but with the injection
             # The response will trigger the auto-generation logic below.
-            response_text = await asyncio.to_thread(
-                engine.process_message,
+            response_text = await engine.process_message_async(
                 user_id=user_id,
                 user_name=user_name,
                 message_text=prompt_injection,
@@ -169,7 +214,8 @@ async def on_message(message):
                 server_id=server_id
             )
 
-            await message.channel.send(response_text)
+            if response_text:
+                await message.channel.send(response_text)
 
             # The bottom of this function will handle the auto-generation check!
             # logic continues to auto-gen block...
@@ -177,7 +223,7 @@ async def on_message(message):
             # Refactoring slightly to allow fall-through or duplicate the check.
 
             # Let's just duplicate the check for now to be safe and simple.
-            if os.path.exists(dm_utils.get_pending_image_path()) or dm_utils.extract_and_save_prompt_from_text(response_text):
+            if os.path.exists(dm_utils.get_pending_image_path()) or dm_utils.extract_and_save_prompt_from_text(response_text or ""):
                  await message.channel.send("🎨 Auto-generating scene visualization...")
                  image_bytes, result = await asyncio.to_thread(dm_utils.generate_image_from_pending)
                  if image_bytes:
@@ -299,8 +345,8 @@ async def on_message(message):
 
             # Delegate to Engine
             # Run in a separate thread to avoid blocking Discord heartbeat
-            response_text = await asyncio.to_thread(
-                engine.process_message,
+            response_text = await reply_with_stream(
+                message.channel,
                 user_id=user_id,
                 user_name=user_name,
                 message_text=text,
@@ -310,18 +356,6 @@ async def on_message(message):
                 server_id=server_id
             )
 
-            if not response_text:
-                response_text = "..."
-
-            # Split response if > 2000 chars (Discord limit)
-            if len(response_text) > 2000:
-                # Naive split
-                chunks = [response_text[i:i+2000] for i in range(0, len(response_text), 2000)]
-                for chunk in chunks:
-                    await message.channel.send(chunk)
-            else:
-                await message.channel.send(response_text)
-
 
 
             # 3. Check for Pending Image (Auto-Generate)
@@ -5,6 +5,7 @@ import json
 import datetime
 import re
 import glob
+import threading
 try:
     import google.genai as genai
     from google.genai import types
@@ -26,7 +27,9 @@ from core.campaign import (
     ACTIVE_CAMPAIGN,
     get_campaign_root,
     get_campaign_config,
-    get_current_session_dir
+    get_current_session_dir,
+    get_config_generation,
+    bump_config_generation
 )
 
 # --- Deep Memory Logic ---
@@ -34,6 +37,7 @@ from core.state_manager import (
     search_archived_summaries,
     read_archived_history,
     get_chat_history_path,
+    get_chat_collection,
     load_chat_snapshot,
     prune_empty_fields,
     save_chat_snapshot,
@@ -129,17 +133,36 @@ def start_new_session_logic(summary_of_previous: str) -> str:
     with open(os.path.join(next_session_dir, "secrets_log.md"), "w") as f:
         f.write(f"# DM Secrets: {next_session_name}\n\n")
         
+    event_log.append_sections(f"## Previously on...\n{summary_of_previous}\n", next_session_dir, source="new_session")
+        
     with open(current_session_file, "w") as f:
         f.write(next_session_name)
         
     return f"Successfully started the next chapter: **{next_session_name}**. The stage is set!"
 
+# Tool output kept in the event journal per call
+TOOL_LOG_MAX_CHARS = 500
+
+def log_system_tool_call(func_name: str, args: dict, output: str):
+    """Records a tool call made by the model in the session's event journal."""
+    try:
+        event_log.append_event("tool", str(output)[:TOOL_LOG_MAX_CHARS], secret=True,
+                               tool=func_name, args=json.loads(json.dumps(args, default=str)))
+    except Exception as e:
+        print(f"Failed to log tool call {func_name}: {e}")
+
 def request_player_roll_logic(check_type: str, dc: int, consequence: str) -> str:
     session_log, secrets_log = get_log_paths()
     log_message = f"**WAITING FOR PLAYER** | Type: {check_type} | DC: {dc} | Fail Consequence: {consequence}"
-    log_to_file(secrets_log, log_message)
+    log_to_file(secrets_log, log_message, event_type="secret", secret=True,
+                kind="dc", check_type=check_type, dc=dc)
     return "Logged DC and Consequence. You may now ask the player to roll."
 
+from core import combat
+from core import event_log
+from core import summarizer
+from core import rate_limiter
+
 from core.players import (
     register_player,
     get_character_name,
@@ -169,6 +192,9 @@ def read_campaign_log(log_type: str) -> str:
     if not os.path.exists(path):
         return f"File not found at {path}"
         
+    if log_type == "secrets":
+        return _read_secrets_log(path)
+        
     with open(path, "r") as f:
         return f.read()
 
@@ -253,8 +279,11 @@ def read_session(session_name: str = "current") -> str:
     # Secrets log (DM-only information)
     secrets_path = os.path.join(session_dir, "secrets_log.md")
     if os.path.exists(secrets_path):
-        with open(secrets_path, "r") as f:
-            content = f.read().strip()
+        if os.path.abspath(session_dir) == os.path.abspath(get_current_session_dir()):
+            content = _read_secrets_log(secrets_path).strip()
+        else:
+            with open(secrets_path, "r") as f:
+                content = f.read().strip()
         sections.append(f"## DM Secrets\n{content}\n")
 
     if len(sections) == 1:
@@ -279,6 +308,7 @@ def update_world_info(fact: str) -> str:
     try:
         with open(path, "a") as f:
             f.write(entry)
+        event_log.append_event("world_fact", fact)
         return f"Recorded in World Database: {fact}"
     except Exception as e:
         return f"Error updating World Info: {e}"
@@ -313,10 +343,33 @@ def summarize_and_compact_session_logic(manual_summary: str = None) -> str:
                 return "Skipped summarization: Feature disabled without GOOGLE_API_KEY. See README.md to set it up."
                 
             client = genai.Client(api_key=api_key)
-            
-            prompt = f"""
+            model_name = os.environ.get("MODEL_NAME", "gemini-1.5-flash")
+
+            def generate(prompt: str) -> str:
+                # Summaries wait behind players' turns for the shared quota
+                rate_limiter.admit("google", model_name, rate_limiter.estimate_tokens(len(prompt)), rate_limiter.BACKGROUND)
+                response = client.models.generate_content(model=model_name, contents=prompt)
+                return response.text or ""
+
+            def summarize_chunk(chunk: str, index: int, total: int) -> str:
+                return generate(f"""
+            You are an expert Dungeon Master assistant taking notes on part {index + 1} of {total} of a D&D Session Log.
+            Write dense bullet-point notes (max 250 words) covering, in order:
+            - Story events, character decisions and key interactions.
+            - HP/condition changes, items, loot, gold, XP and quest objectives.
+            - Critical hits/fails, clutch moments and 1-2 memorable quotes.
+            - NEW permanent facts about the world (NPCs, locations, alliances).
+            Omit transient dice rolls unless the outcome was critical. Keep the latest known state when it changes.
+
+            LOG PART:
+            {chunk}
+            """)
+
+            def reduce_notes(content: str, from_notes: bool) -> str:
+                source = "Session Log (given as ordered notes on each part of the log)" if from_notes else "Session Log"
+                return generate(f"""
             You are an expert Dungeon Master assistant.
-            Your task is to SUMMARIZE the following D&D Session Log into a processed update for the next session.
+            Your task is to SUMMARIZE the following D&D {source} into a processed update for the next session.
             
             PART 1: THE NARRATIVE ("previously on...")
             - Summarize the story, character decisions, and key interactions.
@@ -358,15 +411,16 @@ def summarize_and_compact_session_logic(manual_summary: str = None) -> str:
             - ...
             
             LOG CONTENT:
-            {full_content}
-            """
-            
-            response = client.models.generate_content(
-                model=os.environ.get("MODEL_NAME", "gemini-1.5-flash"),
-                contents=prompt
-            )
-            
-            summary_text = response.text
+            {content}
+            """)
+
+            # Long logs are summarized chunk by chunk (concurrently, with cached
+            # chunk notes) and the notes reduced into the format above.
+            with open(session_log, "r") as f:
+                summary_text = summarizer.map_reduce_summary(
+                    f, summarize_chunk, reduce_notes, os.path.dirname(session_log),
+                    salt=f"{model_name}:v1"
+                )
             if not summary_text:
                 return "Error: AI generation failed."
                 
@@ -398,9 +452,49 @@ def summarize_and_compact_session_logic(manual_summary: str = None) -> str:
         f.write(f"# Session Log (Compacted {timestamp})\n\n")
         f.write(f"## Summary\n{summary_text}\n\n")
         f.write(f"*(Full log archived to {os.path.basename(archive_path)})*")
+    # Previously on / Highlights / Party Status / World Updates become views
+    event_log.append_sections(summary_text, source="summary")
         
     return f"Session compacted! Full log saved to {os.path.basename(archive_path)}. Summary:\n{summary_text}"
 
+# Running summaries longer than this are trimmed to their most recent part
+RUNNING_SUMMARY_MAX_CHARS = 6000
+
+def fold_running_summary(previous_summary: str, transcript: str) -> str:
+    """
+    Extends the running summary of a chat session with older turns that are
+    leaving the context window. Uses Gemini when available; otherwise keeps a
+    condensed transcript so nothing is silently dropped.
+    """
+    api_key = os.environ.get("GOOGLE_API_KEY")
+    if api_key and genai:
+        client = genai.Client(api_key=api_key)
+        prompt = f"""
+        You are an expert Dungeon Master assistant keeping a running summary of a D&D chat session.
+        Update the CURRENT SUMMARY with the NEW TURNS below. Keep it under 400 words.
+        - Keep story beats, decisions, NPC names, promises, open threads and current character state.
+        - Drop dice mechanics and chatter unless the outcome mattered.
+        - Return only the updated summary.
+
+        CURRENT SUMMARY:
+        {previous_summary or "(none yet)"}
+
+        NEW TURNS:
+        {transcript}
+        """
+        model_name = os.environ.get("MODEL_NAME", "gemini-1.5-flash")
+        rate_limiter.admit("google", model_name, rate_limiter.estimate_tokens(len(prompt)), rate_limiter.BACKGROUND)
+        response = client.models.generate_content(
+            model=model_name,
+            contents=prompt
+        )
+        if response.text:
+            return response.text.strip()
+
+    condensed = "\n".join(line[:200] for line in transcript.splitlines() if line.strip())
+    summary = f"{previous_summary}\n{condensed}".strip()
+    return summary[-RUNNING_SUMMARY_MAX_CHARS:]
+
 # --- Image Generation Logic ---
 
 def get_pending_image_path():
@@ -503,8 +597,10 @@ def generate_image_from_pending() -> tuple[str, str]:
         
         
         # Use Imagen 4 Fast (Verified in list)
+        image_model = 'imagen-4.0-fast-generate-001'
+        rate_limiter.admit("google", image_model, rate_limiter.estimate_tokens(len(prompt)), rate_limiter.BACKGROUND)
         response = client.models.generate_images(
-            model='imagen-4.0-fast-generate-001',
+            model=image_model,
             prompt=prompt,
             config=types.GenerateImagesConfig(
                 number_of_images=1
@@ -547,16 +643,9 @@ def validate_game_mechanic(action: str, character_name: str) -> str:
     # 1. Gather Context
     # We need the character's known state (Class, Level, Slots)
     # This comes from the Session Log "Party Status" section.
-    session_log, _ = get_log_paths()
-    party_status = "Unknown"
-    
-    if os.path.exists(session_log):
-        with open(session_log, "r") as f:
-            content = f.read()
-            if "## Party Status" in content:
-                party_status = content.split("## Party Status")[1].split("##")[0].strip()
-            # If we have a compacted log, it might be there. 
-            # If not, we might be flying blind, which is fine (permissive).
+    # Served from the event journal's materialized view, not by re-reading the log.
+    # If no summary recorded it yet, we might be flying blind, which is fine (permissive).
+    party_status = event_log.get_section("Party Status") or "Unknown"
 
     # 2. Consult the Rules Sage (Gemini + D&D API)
     # We ask the LLM to perform the logic check using the tools it implicitly knows or we feed it.
@@ -605,8 +694,10 @@ def validate_game_mechanic(action: str, character_name: str) -> str:
         Be permissive. If status is missing, assume VALID.
         """
         
+        model_name = os.environ.get("MODEL_NAME", "gemini-1.5-flash")
+        rate_limiter.admit("google", model_name, rate_limiter.estimate_tokens(len(prompt)))
         response = client.models.generate_content(
-            model=os.environ.get("MODEL_NAME", "gemini-1.5-flash"),
+            model=model_name,
             contents=prompt
         )
         
@@ -809,64 +900,78 @@ def generate_random_name(race: str = "any", count: int = 1) -> str:
     except Exception as e:
         return None
 
+# secrets_log.md path -> (mtime, size) when it was last checked for a legacy combat table
+_legacy_combat_checked = {}
+
+def migrate_legacy_combat(secrets_log: str = None) -> bool:
+    """
+    One-time move of a combat table left in secrets_log.md by older versions
+    into the combat tracker. Runs when the engine loads a campaign session and
+    before combat tools change the tracker; reads never rewrite the file.
+    If the tracker already has a fight, the old table is not imported but kept
+    in secrets_log.legacy_combat.md. Returns True if the file was migrated.
+    """
+    if secrets_log is None:
+        _, secrets_log = get_log_paths()
+    signature = _stat_signature(secrets_log)
+    # Only look inside the file when it changed since the last check
+    if signature is None or _legacy_combat_checked.get(secrets_log) == signature:
+        return False
+
+    with open(secrets_log, "r") as f:
+        content = f.read()
+    section = combat.find_combat_section(content)
+    if section:
+        if not combat.import_legacy_combat(content):
+            backup = os.path.splitext(secrets_log)[0] + ".legacy_combat.md"
+            with open(backup, "a") as f:
+                f.write(section.rstrip() + "\n\n")
+            print(f"⚠️ [Combat] Legacy combat table in {secrets_log} was not imported (the tracker already has a fight); kept it in {backup}")
+        else:
+            print(f"⚔️ [Combat] Imported the legacy combat table from {secrets_log} into the combat tracker")
+        # The tracker is authoritative from now on; drop the stale copy
+        with open(secrets_log, "w") as f:
+            f.write(combat.strip_combat_section(content))
+    _legacy_combat_checked[secrets_log] = _stat_signature(secrets_log)
+    return bool(section)
+
+def _read_secrets_log(path: str) -> str:
+    """
+    Reads secrets_log.md with the live combat table spliced in. A combat table
+    left in the file by older versions is shown as is until it is migrated
+    (see migrate_legacy_combat), unless the tracker has a fight.
+    """
+    with open(path, "r") as f:
+        content = f.read()
+    if not combat.get_combatants() and combat.find_combat_section(content):
+        return content
+    return combat.splice_combat_section(content)
+
 def update_combat_state(entities: list) -> str:
     """
-    Writes or updates the '## Active Combat' section in secrets_log.md.
-    entities: List of dicts, e.g. [{"name": "Goblin 1", "hp": 7, "max_hp": 7, "ac": 15, "notes": ""}]
+    Starts (or restarts) combat in the structured combat tracker.
+    entities: List of dicts, e.g. [{"name": "Goblin 1", "hp": 7, "max_hp": 7, "ac": 15, "initiative": 12, "notes": ""}]
     """
-    _, secrets_log = get_log_paths()
-    
-    # Read existing content
-    content = ""
-    if os.path.exists(secrets_log):
-        with open(secrets_log, "r") as f:
-            content = f.read()
-            
-    # Prepare combat table
-    header = "## Active Combat\n\n| Name | HP | AC | Notes |\n| :--- | :--- | :--- | :--- |\n"
-    rows = ""
-    for e in entities:
-        hp_str = f"{e.get('hp', 0)}/{e.get('max_hp', 0)}"
-        rows += f"| {e.get('name', 'Unknown')} | {hp_str} | {e.get('ac', 0)} | {e.get('notes', '')} |\n"
-    
-    new_combat_section = header + rows + "\n"
-    
-    if "## Active Combat" in content:
-        # Replace existing section
-        import re
-        # Find everything from ## Active Combat to the next ## or end of file
-        pattern = r"## Active Combat\n.*?(?=\n##|$)"
-        updated_content = re.sub(pattern, new_combat_section.strip(), content, flags=re.DOTALL)
-    else:
-        # Append to end
-        updated_content = content.strip() + "\n\n" + new_combat_section
-        
-    with open(secrets_log, "w") as f:
-        f.write(updated_content.strip() + "\n")
-        
-    return "Combat state updated in secrets_log.md."
+    migrate_legacy_combat()
+    count = combat.start_combat(entities)
+    return f"Combat state updated ({count} combatants)."
+
+def get_combatants() -> list:
+    """
+    Returns the combat tracker's combatants, first migrating a combat table
+    left in secrets_log.md by older versions (for tools about to change them).
+    """
+    migrate_legacy_combat()
+    return combat.get_combatants()
 
 def get_combat_state() -> str:
     """
-    Retrieves the '## Active Combat' section from secrets_log.md.
+    Renders the '## Active Combat' table from the combat tracker.
     """
-    _, secrets_log = get_log_paths()
-    if not os.path.exists(secrets_log):
-        return "No combat state found (secrets_log.md missing)."
-        
-    with open(secrets_log, "r") as f:
-        content = f.read()
-        
-    if "## Active Combat" not in content:
+    combatants = combat.get_combatants()
+    if not combatants:
         return "No active combat section found."
-        
-    import re
-    pattern = r"## Active Combat\n.*?(?=\n##|$)"
-    match = re.search(pattern, content, flags=re.DOTALL)
-    if match:
-        return match.group(0).strip()
-        
-    return "Failed to parse combat state."
+    return combat.render_combat_section(combatants)
 
 from core.database import get_db_connection
 
@@ -922,20 +1027,13 @@ def manage_inventory(action: str, item_name: str = "", quantity: int = 1, weight
     
     with get_db_connection() as conn:
         if action == "add":
-            cursor = conn.execute("SELECT quantity FROM inventory WHERE character_id = ? AND item_name = ?", (slack_id, item_key))
-            row = cursor.fetchone()
-            
-            if row:
-                new_qty = row['quantity'] + quantity
-                conn.execute(
-                    "UPDATE inventory SET quantity = ?, weight = ? WHERE character_id = ? AND item_name = ?",
-                    (new_qty, weight, slack_id, item_key)
-                )
-            else:
-                conn.execute(
-                    "INSERT INTO inventory (character_id, item_name, quantity, weight) VALUES (?, ?, ?, ?)",
-                    (slack_id, item_key, quantity, weight)
-                )
+            # One row per (character, item): stack onto an existing row in a single statement
+            conn.execute('''
+                INSERT INTO inventory (character_id, item_name, quantity, weight) VALUES (?, ?, ?, ?)
+                ON CONFLICT(character_id, item_name) DO UPDATE SET
+                    quantity = quantity + excluded.quantity,
+                    weight = excluded.weight
+            ''', (slack_id, item_key, quantity, weight))
             return f"Added {quantity}x {item_name} to {character_name}'s inventory."
             
         elif action == "remove":
@@ -985,6 +1083,118 @@ def manage_inventory(action: str, item_name: str = "", quantity: int = 1, weight
         else:
             return f"Unknown action: {action}"
 
+def _parse_inventory_operation(op) -> dict:
+    """Normalizes a bulk inventory operation given as a dict or a (character, item, qty, weight, action) sequence."""
+    if isinstance(op, dict):
+        fields = dict(op)
+    else:
+        keys = ("character_name", "item_name", "quantity", "weight", "action")
+        fields = dict(zip(keys, op))
+    return {
+        "character_name": str(fields.get("character_name") or "").strip(),
+        "item_name": str(fields.get("item_name") or "").strip(),
+        "quantity": int(fields.get("quantity", 1) or 0),
+        "weight": float(fields.get("weight", 0.0) or 0.0),
+        "action": str(fields.get("action") or "add").strip().lower()
+    }
+
+def manage_inventory_bulk(operations: list) -> str:
+    """
+    Applies many inventory changes at once (e.g. splitting a treasure hoard).
+    All characters are resolved in one query and every change is applied in a
+    single transaction, so either the whole batch lands or none of it does.
+    Args:
+        operations: List of {"character_name", "item_name", "quantity", "weight", "action"}
+                    dicts (or tuples in that order); action is "add" (default) or "remove".
+    """
+    if not operations:
+        return "Error: No inventory operations given."
+    try:
+        ops = [_parse_inventory_operation(op) for op in operations]
+    except (TypeError, ValueError) as e:
+        return f"Error: Invalid inventory operation: {e}"
+
+    errors = []
+    valid = []
+    for i, op in enumerate(ops, 1):
+        if op["action"] not in ("add", "remove"):
+            errors.append(f"#{i}: unknown action '{op['action']}' (use add or remove)")
+        elif not op["character_name"] or not op["item_name"]:
+            errors.append(f"#{i}: character_name and item_name are required")
+        elif op["quantity"] <= 0:
+            errors.append(f"#{i}: quantity must be positive")
+        else:
+            valid.append(op)
+    if not valid:
+        return "Error: " + "; ".join(errors)
+
+    from core.players import get_user_ids_by_character_names, get_identity_map
+    import uuid
+
+    registered = []
+    changes = {}  # slack_id -> (character name as first given, list of change strings)
+    with get_db_connection() as conn:
+        slack_ids = get_user_ids_by_character_names([op["character_name"] for op in valid], conn)
+        new_ids = {}  # one NPC per name, however it was capitalized
+        for name, slack_id in slack_ids.items():
+            if not slack_id:
+                if name.lower() in new_ids:
+                    slack_ids[name] = new_ids[name.lower()]
+                    continue
+                # Auto-register if missing (graceful fallback), as manage_inventory does
+                slack_id = f"npc_{str(uuid.uuid4())[:8]}"
+                new_ids[name.lower()] = slack_id
+                conn.execute('''
+                    INSERT INTO players (slack_id, character_name) VALUES (?, ?)
+                    ON CONFLICT(slack_id) DO UPDATE SET character_name=excluded.character_name
+                ''', (slack_id, name))
+                slack_ids[name] = slack_id
+                registered.append((slack_id, name))
+
+        for op in valid:
+            slack_id = slack_ids[op["character_name"]]
+            _label, lines = changes.setdefault(slack_id, (op["character_name"], []))
+            if op["action"] == "add":
+                conn.execute('''
+                    INSERT INTO inventory (character_id, item_name, quantity, weight) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(character_id, item_name) DO UPDATE SET
+                        quantity = quantity + excluded.quantity,
+                        weight = excluded.weight
+                ''', (slack_id, op["item_name"], op["quantity"], op["weight"]))
+                lines.append(f"+{op['quantity']}x {op['item_name']}")
+            else:
+                cursor = conn.execute(
+                    "SELECT quantity FROM inventory WHERE character_id = ? AND item_name = ?",
+                    (slack_id, op["item_name"])
+                )
+                row = cursor.fetchone()
+                if row is None:
+                    errors.append(f"{op['character_name']} does not have {op['item_name']}")
+                    continue
+                remaining = row["quantity"] - op["quantity"]
+                if remaining <= 0:
+                    conn.execute("DELETE FROM inventory WHERE character_id = ? AND item_name = ?", (slack_id, op["item_name"]))
+                    lines.append(f"-all {op['item_name']}")
+                else:
+                    conn.execute(
+                        "UPDATE inventory SET quantity = ? WHERE character_id = ? AND item_name = ?",
+                        (remaining, slack_id, op["item_name"])
+                    )
+                    lines.append(f"-{op['quantity']}x {op['item_name']} (remaining {remaining})")
+
+    # Only after the transaction committed
+    identity = get_identity_map()
+    for slack_id, name in registered:
+        identity.remember(slack_id, name)
+
+    report = ["### 🎒 Inventory Updated"]
+    for name, lines in changes.values():
+        if lines:
+            report.append(f"- **{name}**: {', '.join(lines)}")
+    if errors:
+        report.append("**Skipped:** " + "; ".join(errors))
+    return "\n".join(report)
+
 def lookup_item_details(item_name: str) -> str:
     """
     Looks up an item in the D&D API to find its rarity, cost, and type.
@@ -1237,46 +1447,124 @@ def lookup_monster(monster_name: str) -> str:
 ..."""
 
 
+# skills/ lives at the project root, not the campaign root
+SKILLS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "skills")
+
+def _stat_signature(path: str):
+    """(mtime_ns, size) of a path, or None if it does not exist."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+# (((dir, signature), ...), [SKILL.md paths]) from the last walk of SKILLS_DIR
+_skill_files_cache = None
+
+def get_skill_files() -> list:
+    """
+    Returns the SKILL.md files under skills/, in walk order.
+    The walk is only repeated when a directory in the tree changes (a skill
+    folder or SKILL.md added or removed); otherwise this is one stat per directory.
+    """
+    global _skill_files_cache
+    cached = _skill_files_cache
+    if cached is not None and all(_stat_signature(d) == sig for d, sig in cached[0]):
+        return cached[1]
+
+    dirs_seen = []
+    skill_files = []
+    if os.path.exists(SKILLS_DIR):
+        for root_dir, dirs, files in os.walk(SKILLS_DIR):
+            dirs_seen.append((root_dir, _stat_signature(root_dir)))
+            if "SKILL.md" in files:
+                skill_files.append(os.path.join(root_dir, "SKILL.md"))
+    else:
+        dirs_seen.append((SKILLS_DIR, None))
+    _skill_files_cache = (tuple(dirs_seen), skill_files)
+    return skill_files
+
 def load_skills_content() -> str:
     """
     Scans the skills/ directory for SKILL.md files and formats them for the prompt.
     """
-    root = get_campaign_root()
-    # Assuming skills/ is at the project root, not campaign root
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    skills_dir = os.path.join(project_root, "skills")
-    
-    if not os.path.exists(skills_dir):
-        return ""
-        
     skill_content = "\n\n## Specialized Skills\nYou have access to the following specialized workflows. Use them when applicable:\n"
     
-    # Simple walk
     count = 0
-    for root_dir, dirs, files in os.walk(skills_dir):
-        if "SKILL.md" in files:
-            try:
-                path = os.path.join(root_dir, "SKILL.md")
-                with open(path, "r") as f:
-                    content = f.read()
-                    # Clean up frontmatter if present (between ---)
-                    if content.startswith("---"):
-                        parts = content.split("---", 2)
-                        if len(parts) >= 3:
-                            content = parts[2].strip()
-                            
-                    folder_name = os.path.basename(root_dir)
-                    skill_content += f"\n### Skill: {folder_name.replace('_', ' ').title()}\n{content}\n"
-                    count += 1
-            except Exception as e:
-                print(f"Error loading skill {path}: {e}")
+    for path in get_skill_files():
+        try:
+            with open(path, "r") as f:
+                content = f.read()
+                # Clean up frontmatter if present (between ---)
+                if content.startswith("---"):
+                    parts = content.split("---", 2)
+                    if len(parts) >= 3:
+                        content = parts[2].strip()
+                        
+                folder_name = os.path.basename(os.path.dirname(path))
+                skill_content += f"\n### Skill: {folder_name.replace('_', ' ').title()}\n{content}\n"
+                count += 1
+        except Exception as e:
+            print(f"Error loading skill {path}: {e}")
                 
     if count == 0:
         return ""
         
     return skill_content
 
+def get_system_instruction_sources() -> list:
+    """
+    Returns the files get_system_instruction reads: the system prompt candidates
+    (session dir, then campaign root) and every skill file.
+    """
+    return [
+        os.path.join(get_current_session_dir(), "system_prompt.txt"),
+        os.path.join(get_campaign_root(), "system_prompt.txt")
+    ] + get_skill_files()
+
+def get_system_instruction_signature() -> tuple:
+    """
+    Fingerprint of the system instruction's inputs: (path, mtime/size) of every
+    source file. Costs a handful of stat calls.
+    """
+    return tuple((path, _stat_signature(path)) for path in get_system_instruction_sources())
+
+# signature -> compiled prompt; one entry per distinct session/prompt combination
+_system_instruction_cache = {}
+_SYSTEM_INSTRUCTION_CACHE_SIZE = 32
+_system_instruction_stats = {"hits": 0, "builds": 0, "bytes": 0, "estimated_tokens": 0}
+_system_instruction_lock = threading.Lock()
+
+def get_system_instruction_stats() -> dict:
+    """
+    Returns cache counters and the size of the most recently served system
+    instruction (bytes and a ~4 bytes/token estimate), for monitoring.
+    """
+    return dict(_system_instruction_stats, cached_prompts=len(_system_instruction_cache))
+
 def get_system_instruction():
+    """
+    Returns the compiled system instruction for the active campaign/session.
+    Memoized on the mtimes of system_prompt.txt and the skill files, so an
+    unchanged prompt is served without re-reading anything.
+    """
+    signature = get_system_instruction_signature()
+    prompt = _system_instruction_cache.get(signature)
+    if prompt is not None:
+        _system_instruction_stats["hits"] += 1
+    else:
+        prompt = _build_system_instruction()
+        with _system_instruction_lock:
+            if len(_system_instruction_cache) >= _SYSTEM_INSTRUCTION_CACHE_SIZE:
+                _system_instruction_cache.pop(next(iter(_system_instruction_cache)))
+            _system_instruction_cache[signature] = prompt
+            _system_instruction_stats["builds"] += 1
+    size = len(prompt.encode("utf-8"))
+    _system_instruction_stats["bytes"] = size
+    _system_instruction_stats["estimated_tokens"] = size // 4
+    return prompt
+
+def _build_system_instruction():
     session_dir = get_current_session_dir()
     # Check session dir first, then campaign root
     prompt_path = os.path.join(session_dir, "system_prompt.txt")
@@ -1301,9 +1589,9 @@ When generating names for NPCs, locations, items, or anything else:
 ## Combat Management Rules
 To ensure mechanical consistency and prevent narration hallucinations:
 1. **Initialize Combat**: When a battle begins, ALWAYS use `initialize_combat` to set up the enemies (Name, HP, AC, Notes). Generate their stats based on official 5e rules if not provided.
-2. **Track Every Hit**: Every time a creature takes damage, heals, or uses a limited resource (like a spell slot), use `track_combat_change`.
+2. **Track Every Hit**: Every time a creature takes damage, heals, or uses a limited resource (like a spell slot), use `track_combat_change`. When one effect hits several creatures (e.g. Fireball), use `track_combat_changes` once for all of them. Call `end_combat` when the fight is over.
 3. **Verify Before Narrating**: Before you describe an enemy dying or being wounded, check their current state using `read_campaign_log(log_type='secrets')`.
-4. **Secret Tracking**: All combat stats are stored in `secrets_log.md`. DO NOT reveal exact HP numbers to players unless they have a specific ability to see them; use descriptive terms like "bloodied" (half HP) or "near death".
+4. **Secret Tracking**: All combat stats are shown in the secrets log. DO NOT reveal exact HP numbers to players unless they have a specific ability to see them; use descriptive terms like "bloodied" (half HP) or "near death".
 ---
 """
     skills_section = load_skills_content()
@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 import sys
-import json
-import urllib.request
-import urllib.error
+from src.dnd.core.http_client import get_client
 
 # D&D API endpoint
 API_BASE_URL = "https://www.dnd5eapi.co/api"
@@ -18,14 +16,14 @@ def validate_dnd_entity(endpoint: str, name: str) -> bool:
         url = f"{API_BASE_URL}/{endpoint}/{name}"
         print(f"Validating entity: {url}", file=sys.stderr)
 
-        with urllib.request.urlopen(url) as response:
-            return response.status == 200
-    except urllib.error.HTTPError as e:
-        if e.code == 404:
+        response = get_client().get(url)
+        if response.status_code == 404:
             print(f"Entity not found: {endpoint}/{name}", file=sys.stderr)
             return False
-        print(f"HTTP error validating entity: {e}", file=sys.stderr)
-        return False
+        if response.status_code != 200:
+            print(f"HTTP error validating entity: {response.status_code}", file=sys.stderr)
+            return False
+        return True
     except Exception as e:
         print(f"Error validating entity: {e}", file=sys.stderr)
         return False
@@ -41,12 +39,10 @@ def fetch_dnd_entity(endpoint: str, name: str) -> dict:
         url = f"{API_BASE_URL}/{endpoint}/{name}"
         print(f"Fetching entity: {url}", file=sys.stderr)
 
-        with urllib.request.urlopen(url) as response:
-            if response.status == 200:
-                return json.loads(response.read())
-            return {}
-    except urllib.error.HTTPError as e:
-        print(f"HTTP error fetching entity: {e}", file=sys.stderr)
+        response = get_client().get(url)
+        if response.status_code == 200:
+            return response.json()
+        print(f"HTTP error fetching entity: {response.status_code}", file=sys.stderr)
         return {}
     except Exception as e:
         print(f"Error fetching entity: {e}", file=sys.stderr)
@@ -1,35 +1,300 @@
+from collections import OrderedDict
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Dict, Any, Tuple, Optional
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Tuple, Optional
 import logging
 import json
 import os
 import pickle
+import sqlite3
+import threading
+import time
 
 logger = logging.getLogger(__name__)
 
+# Persistence backends supported by APICache
+CACHE_BACKENDS = ("sqlite", "pickle")
+
+# Filename of the SQLite store inside the cache directory
+CACHE_DB_FILENAME = "cache.sqlite3"
+
+# Index file written by the legacy pickle backend
+LEGACY_INDEX_FILENAME = "index.json"
+
+# Default seconds between proactive sweeps of expired entries
+DEFAULT_SWEEP_INTERVAL = 300
+
+# Key prefixes of D&D API entries: dnd_item_<category>_<index> and dnd_items_<category>
+ITEM_KEY_PREFIX = "dnd_item_"
+LISTING_KEY_PREFIX = "dnd_items_"
+
+
+def key_category(key: str) -> Optional[str]:
+    """Return the D&D API category a cache key belongs to, or None for other keys."""
+    if key.startswith(LISTING_KEY_PREFIX):
+        return key[len(LISTING_KEY_PREFIX):]
+    if key.startswith(ITEM_KEY_PREFIX):
+        # Categories never contain "_"
+        return key[len(ITEM_KEY_PREFIX):].split("_", 1)[0]
+    return None
+
+
+class SQLiteCacheStore:
+    """Single-file key/value store backing a persistent APICache.
+
+    Values are pickled into one SQLite database in WAL mode, so writes are
+    atomic, readers never see a half-written entry, and a batch of writes
+    costs a single commit.
+    """
+
+    def __init__(self, path: str):
+        """Open (or create) the store.
+
+        Args:
+            path: Path to the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                timestamp TEXT NOT NULL,
+                validators TEXT
+            )
+        ''')
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(entries)")]
+        if "validators" not in columns:
+            self._conn.execute("ALTER TABLE entries ADD COLUMN validators TEXT")
+        self._conn.commit()
+
+    def load_timestamps(self) -> Dict[str, datetime]:
+        """Return the timestamp of every stored key without loading values."""
+        with self._lock:
+            rows = self._conn.execute("SELECT key, timestamp FROM entries").fetchall()
+        return {key: datetime.fromisoformat(timestamp) for key, timestamp in rows}
+
+    def get(self, key: str) -> Any:
+        """Load and unpickle one value, or return None if it is not stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[Any, datetime, Dict[str, str]]]:
+        """Load one entry with its timestamp and HTTP validators, regardless of age."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, timestamp, validators FROM entries WHERE key = ?", (key,)).fetchone()
+        if not row:
+            return None
+        return pickle.loads(row[0]), datetime.fromisoformat(row[1]), json.loads(row[2] or "{}")
+
+    def put(self, key: str, value: Any, timestamp: datetime, commit: bool = True,
+            validators: Optional[Dict[str, str]] = None) -> None:
+        """Store one value.
+
+        Args:
+            key: The cache key
+            value: The value to store
+            timestamp: When the value was cached
+            commit: Whether to commit immediately (False inside a batch)
+            validators: Optional HTTP validators (ETag / Last-Modified) for revalidation
+        """
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, timestamp, validators) VALUES (?, ?, ?, ?)",
+                (key, data, timestamp.isoformat(), json.dumps(validators) if validators else None))
+            if commit:
+                self._conn.commit()
+
+    def touch(self, key: str, timestamp: datetime, commit: bool = True) -> None:
+        """Update the timestamp of a stored entry without rewriting its value."""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE entries SET timestamp = ? WHERE key = ?", (timestamp.isoformat(), key))
+            if commit:
+                self._conn.commit()
+
+    def get_timestamp(self, key: str) -> Optional[datetime]:
+        """Return the stored timestamp of one key, or None if it is not stored."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT timestamp FROM entries WHERE key = ?", (key,)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def delete_expired(self, keys: Iterable[str], commit: bool = True) -> None:
+        """Delete the given keys, keeping entries that can still be revalidated."""
+        with self._lock:
+            self._conn.executemany(
+                "DELETE FROM entries WHERE key = ? AND validators IS NULL", [(key,) for key in keys])
+            if commit:
+                self._conn.commit()
+
+    def commit(self) -> None:
+        with self._lock:
+            self._conn.commit()
+
+    def rollback(self) -> None:
+        with self._lock:
+            self._conn.rollback()
+
+    def clear(self) -> None:
+        """Delete every stored entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
 
 class APICache:
     """A time-based cache for API responses with optional persistence."""
 
-    def __init__(self, ttl_hours: int = 24, persistent: bool = True, cache_dir: str = "cache"):
+    def __init__(self, ttl_hours: int = 24, persistent: bool = True, cache_dir: str = "cache",
+                 backend: str = "sqlite", max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None,
+                 sweep_interval: float = DEFAULT_SWEEP_INTERVAL):
         """Initialize the cache with a specified TTL (time-to-live).
 
         Args:
             ttl_hours: Number of hours before cached items expire
             persistent: Whether to persist the cache to disk
             cache_dir: Directory to store persistent cache files
+            backend: Persistence backend, "sqlite" (single-file store with lazy
+                value loading) or "pickle" (legacy one file per key)
+            max_entries: Maximum number of values held in memory (None for no limit)
+            max_bytes: Approximate maximum size of the values held in memory,
+                measured by their pickled size (None for no limit)
+            sweep_interval: Seconds between proactive sweeps of expired entries
         """
-        self.cache: Dict[str, Tuple[Any, datetime]] = {}
+        if backend not in CACHE_BACKENDS:
+            raise ValueError(
+                f"Unknown cache backend '{backend}' (expected one of {', '.join(CACHE_BACKENDS)})")
+
+        # Values loaded into memory, least recently used first. Persistent
+        # entries are loaded lazily on first access and may be evicted from
+        # memory again without being lost.
+        self.cache: "OrderedDict[str, Tuple[Any, datetime]]" = OrderedDict()
+        # Timestamp of every known entry, loaded or not
+        self._timestamps: Dict[str, datetime] = {}
+        # HTTP validators (ETag / Last-Modified) of entries held in memory
+        self._validators: Dict[str, Dict[str, str]] = {}
         self.ttl = timedelta(hours=ttl_hours)
         self.persistent = persistent
         self.cache_dir = cache_dir
+        self.backend = backend
+        self._store: Optional[SQLiteCacheStore] = None
+        # The store has one connection, hence one transaction: a batch holds
+        # the write lock until it commits, so other threads' writes wait for it
+        # instead of landing in (and being rolled back with) its transaction.
+        self._write_lock = threading.RLock()
+        # Per thread: depth of nested batches and the keys written in them
+        self._batch_state = threading.local()
+        self._lock = threading.RLock()
+
+        # Memory bounds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._sizes: Dict[str, int] = {}
+        self._bytes = 0
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+
+        # Counters reported by stats()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._disk_loads = 0
+        # Incremented whenever cached data is replaced or dropped, so derived
+        # structures (e.g. attribute indexes) know when to rebuild: per D&D API
+        # category, plus a cache-wide count bumped by clear().
+        self.generation = 0
+        self._category_generations: Dict[str, int] = {}
+        # Callbacks notified of every write (see add_listener)
+        self._listeners: List[Callable[[Optional[str], Any], None]] = []
 
         if self.persistent:
             os.makedirs(self.cache_dir, exist_ok=True)
-            self._load_cache()
+            if self.backend == "sqlite":
+                self._open_store()
+            else:
+                self._load_cache()
 
         logger.debug(
-            f"Initialized API cache with TTL of {ttl_hours} hours (persistent: {persistent})")
+            f"Initialized API cache with TTL of {ttl_hours} hours (persistent: {persistent}, backend: {backend})")
+
+    def add_listener(self, listener: Callable[[Optional[str], Any], None]) -> None:
+        """Register a callback that is notified of cache writes.
+
+        The listener is called as ``listener(key, value)`` after every set,
+        and as ``listener(None, None)`` after the cache is cleared.
+
+        Args:
+            listener: The callback to register
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, key: Optional[str], value: Any) -> None:
+        for listener in self._listeners:
+            try:
+                listener(key, value)
+            except Exception as e:
+                logger.warning(f"Cache listener failed for key {key}: {e}")
+
+    def _open_store(self) -> None:
+        """Open the SQLite store and load its key index (values stay on disk)."""
+        try:
+            self._store = SQLiteCacheStore(os.path.join(self.cache_dir, CACHE_DB_FILENAME))
+            self._import_legacy_cache()
+            self._timestamps = self._store.load_timestamps()
+            logger.info(
+                f"Opened persistent cache with {len(self._timestamps)} items")
+        except Exception as e:
+            logger.warning(f"Failed to open persistent cache, continuing in memory: {e}")
+            self._store = None
+
+    def _import_legacy_cache(self) -> None:
+        """Move entries written by the pickle backend into the SQLite store."""
+        index_path = os.path.join(self.cache_dir, LEGACY_INDEX_FILENAME)
+        if not os.path.exists(index_path):
+            return
+
+        try:
+            with open(index_path, "r") as f:
+                index = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to read legacy cache index: {e}")
+            return
+
+        imported = 0
+        for key, timestamp_str in index.items():
+            cache_path = self._get_cache_path(key)
+            if not os.path.exists(cache_path):
+                continue
+            try:
+                with open(cache_path, "rb") as f:
+                    value = pickle.load(f)
+                self._store.put(key, value, datetime.fromisoformat(timestamp_str), commit=False)
+                imported += 1
+            except Exception as e:
+                logger.warning(f"Failed to import legacy cache item {key}: {e}")
+        self._store.commit()
+
+        # Only remove the legacy files once the import is committed
+        for key in index:
+            cache_path = self._get_cache_path(key)
+            if os.path.exists(cache_path):
+                os.unlink(cache_path)
+        os.unlink(index_path)
+        logger.info(f"Imported {imported} legacy cache items into {CACHE_DB_FILENAME}")
 
     def _get_cache_path(self, key: str) -> str:
         """Get the file path for a cache key.
@@ -48,7 +313,7 @@ class APICache:
         """Load the cache from disk."""
         try:
             # Load the cache index if it exists
-            index_path = os.path.join(self.cache_dir, "index.json")
+            index_path = os.path.join(self.cache_dir, LEGACY_INDEX_FILENAME)
             if os.path.exists(index_path):
                 with open(index_path, "r") as f:
                     index = json.load(f)
@@ -62,7 +327,8 @@ class APICache:
                             try:
                                 with open(cache_path, "rb") as f:
                                     value = pickle.load(f)
-                                    self.cache[key] = (value, timestamp)
+                                self._timestamps[key] = timestamp
+                                self._remember(key, value, timestamp)
                             except Exception as e:
                                 logger.warning(
                                     f"Failed to load cache item {key}: {e}")
@@ -72,17 +338,30 @@ class APICache:
         except Exception as e:
             logger.warning(f"Failed to load cache from disk: {e}")
 
-    def _save_cache_item(self, key: str, value: Any, timestamp: datetime) -> None:
+    def _save_cache_item(self, key: str, value: Any, timestamp: datetime,
+                         validators: Optional[Dict[str, str]] = None) -> None:
         """Save a cache item to disk.
 
         Args:
             key: The cache key
             value: The value to cache
             timestamp: The timestamp when the item was cached
+            validators: Optional HTTP validators stored alongside the value
         """
         if not self.persistent:
             return
 
+        if self.backend == "sqlite":
+            if self._store is None:
+                return
+            try:
+                with self._write_lock:
+                    self._store.put(key, value, timestamp, commit=not self._in_batch(),
+                                    validators=validators)
+            except Exception as e:
+                logger.warning(f"Failed to save cache item {key} to disk: {e}")
+            return
+
         try:
             # Save the cache item
             cache_path = self._get_cache_path(key)
@@ -90,7 +369,7 @@ class APICache:
                 pickle.dump(value, f)
 
             # Update the cache index
-            index_path = os.path.join(self.cache_dir, "index.json")
+            index_path = os.path.join(self.cache_dir, LEGACY_INDEX_FILENAME)
             index = {}
             if os.path.exists(index_path):
                 try:
@@ -106,6 +385,178 @@ class APICache:
         except Exception as e:
             logger.warning(f"Failed to save cache item {key} to disk: {e}")
 
+    def _in_batch(self) -> bool:
+        """Whether the calling thread is inside a batch."""
+        return getattr(self._batch_state, "depth", 0) > 0
+
+    def _track_batch_write(self, key: str) -> None:
+        if self._in_batch():
+            self._batch_state.keys.add(key)
+
+    @contextmanager
+    def batch(self) -> Iterator["APICache"]:
+        """Group writes into a single atomic commit.
+
+        Inside the block, ``set()`` updates memory immediately but the SQLite
+        store is only committed when the outermost batch exits; if the block
+        raises, uncommitted writes are rolled back on disk and the keys written
+        in the block are reloaded from disk (or dropped) in memory. Writes from
+        other threads wait until the batch ends.
+
+        Example:
+            with cache.batch():
+                for key, value in items:
+                    cache.set(key, value)
+        """
+        state = self._batch_state
+        self._write_lock.acquire()
+        if not self._in_batch():
+            state.depth = 0
+            state.keys = set()
+        state.depth += 1
+        failed = False
+        try:
+            yield self
+        except Exception:
+            failed = True
+            raise
+        finally:
+            state.depth -= 1
+            try:
+                if state.depth == 0 and self._store is not None:
+                    try:
+                        if failed:
+                            self._store.rollback()
+                        else:
+                            self._store.commit()
+                    except Exception as e:
+                        logger.warning(f"Failed to commit cache batch: {e}")
+                    if failed:
+                        self._revert(state.keys)
+            finally:
+                self._write_lock.release()
+
+    def _revert(self, keys: Iterable[str]) -> None:
+        """Bring memory back in line with disk after a batch was rolled back."""
+        with self._lock:
+            for key in keys:
+                self._forget(key)
+                self._validators.pop(key, None)
+                try:
+                    timestamp = self._store.get_timestamp(key)
+                except Exception:
+                    timestamp = None
+                if timestamp is None:
+                    self._timestamps.pop(key, None)
+                else:
+                    # The committed value is loaded again on next access
+                    self._timestamps[key] = timestamp
+                self._bump_generation(key)
+        if keys:
+            logger.debug(f"Reverted {len(keys)} cache entries written by a failed batch")
+
+    def _bump_generation(self, key: str) -> None:
+        """Mark the category of ``key`` as changed (caller holds the lock)."""
+        category = key_category(key)
+        if category is not None:
+            self._category_generations[category] = self._category_generations.get(category, 0) + 1
+
+    def category_generation(self, category: str) -> Tuple[int, int]:
+        """Return the generation of the cached data of a D&D API category.
+
+        It changes whenever an entry of the category is replaced or dropped,
+        or the whole cache is cleared.
+        """
+        with self._lock:
+            return self.generation, self._category_generations.get(category, 0)
+
+    def _size_of(self, value: Any) -> int:
+        if self.max_bytes is None:
+            return 0
+        try:
+            return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+        except Exception:
+            return 0
+
+    def _remember(self, key: str, value: Any, timestamp: datetime) -> None:
+        """Hold a value in memory as most recently used, then enforce the bounds."""
+        self._forget(key)
+        size = self._size_of(value)
+        self.cache[key] = (value, timestamp)
+        self._sizes[key] = size
+        self._bytes += size
+        self._enforce_bounds()
+
+    def _forget(self, key: str) -> None:
+        """Drop a value from memory (the entry itself may live on disk)."""
+        if self.cache.pop(key, None) is not None:
+            self._bytes -= self._sizes.pop(key, 0)
+
+    def _enforce_bounds(self) -> None:
+        """Evict least recently used values until the memory bounds hold."""
+        while self.cache and (
+                (self.max_entries is not None and len(self.cache) > self.max_entries) or
+                (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            key = next(iter(self.cache))
+            self._forget(key)
+            self._evictions += 1
+            if not self.persistent:
+                # Nothing to reload it from
+                self._timestamps.pop(key, None)
+                self._validators.pop(key, None)
+            logger.debug(f"Evicted cache key: {key}")
+
+    def _load_value(self, key: str) -> Any:
+        """Load a persisted value that is not held in memory."""
+        if not self.persistent:
+            return None
+        try:
+            if self._store is not None:
+                return self._store.get(key)
+            if self.backend == "pickle":
+                cache_path = self._get_cache_path(key)
+                if os.path.exists(cache_path):
+                    with open(cache_path, "rb") as f:
+                        return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load cache item {key}: {e}")
+        return None
+
+    def _maybe_sweep(self) -> None:
+        # A sweep inside a batch would become part of its transaction; the
+        # next get/set after the batch runs it instead
+        if self.sweep_interval is not None and not self._in_batch() and \
+                time.monotonic() - self._last_sweep >= self.sweep_interval:
+            self.sweep_expired()
+
+    def sweep_expired(self) -> int:
+        """Drop every expired entry from memory and from disk.
+
+        Returns:
+            The number of entries removed
+        """
+        now = datetime.now()
+        with self._lock:
+            self._last_sweep = time.monotonic()
+            expired = [key for key, timestamp in self._timestamps.items()
+                       if now - timestamp >= self.ttl]
+            for key in expired:
+                self._forget(key)
+                self._validators.pop(key, None)
+                del self._timestamps[key]
+            self._expirations += len(expired)
+
+        if expired and self._store is not None:
+            try:
+                # Entries with validators stay on disk so they can be revalidated
+                with self._write_lock:
+                    self._store.delete_expired(expired, commit=not self._in_batch())
+            except Exception as e:
+                logger.warning(f"Failed to delete expired cache items: {e}")
+        if expired:
+            logger.debug(f"Swept {len(expired)} expired cache entries")
+        return len(expired)
+
     def get(self, key: str) -> Any:
         """Get a value from the cache if it exists and is not expired.
 
@@ -115,37 +566,183 @@ class APICache:
         Returns:
             The cached value or None if not found or expired
         """
-        if key in self.cache:
-            value, timestamp = self.cache[key]
-            if datetime.now() - timestamp < self.ttl:
+        self._maybe_sweep()
+
+        with self._lock:
+            timestamp = self._timestamps.get(key)
+            if timestamp is None:
+                self._misses += 1
+                logger.debug(f"Cache miss for key: {key}")
+                return None
+            if datetime.now() - timestamp >= self.ttl:
+                self._misses += 1
+                logger.debug(f"Cache expired for key: {key}")
+                return None
+
+            entry = self.cache.get(key)
+            if entry is not None:
+                self.cache.move_to_end(key)
+                self._hits += 1
                 logger.debug(f"Cache hit for key: {key}")
+                return entry[0]
+
+            # Lazily load the value from disk on first access
+            value = self._load_value(key)
+            if value is not None:
+                self._remember(key, value, timestamp)
+                self._hits += 1
+                self._disk_loads += 1
+                logger.debug(f"Cache hit for key: {key} (loaded from disk)")
                 return value
-            else:
-                logger.debug(f"Cache expired for key: {key}")
-        else:
+
+            self._misses += 1
             logger.debug(f"Cache miss for key: {key}")
-        return None
+            return None
 
-    def set(self, key: str, value: Any) -> None:
+    def set(self, key: str, value: Any, validators: Optional[Dict[str, str]] = None) -> None:
         """Set a value in the cache with the current timestamp.
 
         Args:
             key: The cache key
             value: The value to cache
+            validators: Optional HTTP validators (e.g. {"ETag": ...}) used to
+                revalidate the entry once it expires
         """
         timestamp = datetime.now()
-        self.cache[key] = (value, timestamp)
+        with self._lock:
+            if key in self._timestamps:
+                self._bump_generation(key)
+            self._timestamps[key] = timestamp
+            if validators:
+                self._validators[key] = dict(validators)
+            else:
+                self._validators.pop(key, None)
+            self._remember(key, value, timestamp)
+            self._track_batch_write(key)
         logger.debug(f"Cached value for key: {key}")
 
         if self.persistent:
+            self._save_cache_item(key, value, timestamp, validators)
+
+        self._notify(key, value)
+        self._maybe_sweep()
+
+    def get_stale(self, key: str) -> Optional[Tuple[Any, Dict[str, str]]]:
+        """Get a value and its HTTP validators even if the entry has expired.
+
+        Used to revalidate an expired entry with a conditional request, or to
+        serve stale data while the API is unavailable.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            A (value, validators) tuple, or None if nothing is stored
+        """
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is not None:
+                return entry[0], dict(self._validators.get(key, {}))
+
+        if self._store is not None:
+            try:
+                stored = self._store.get_entry(key)
+            except Exception as e:
+                logger.warning(f"Failed to load cache item {key}: {e}")
+                stored = None
+            if stored is not None:
+                value, _timestamp, validators = stored
+                return value, validators
+
+        value = self._load_value(key)
+        if value is not None:
+            return value, {}
+        return None
+
+    def touch(self, key: str) -> bool:
+        """Mark an entry as fresh again, e.g. after a 304 Not Modified response.
+
+        Args:
+            key: The cache key
+
+        Returns:
+            True if the entry exists and was refreshed
+        """
+        stale = self.get_stale(key)
+        if stale is None:
+            return False
+        value, validators = stale
+
+        timestamp = datetime.now()
+        with self._lock:
+            self._timestamps[key] = timestamp
+            if validators:
+                self._validators[key] = validators
+            self._remember(key, value, timestamp)
+            self._track_batch_write(key)
+
+        if self._store is not None:
+            try:
+                with self._write_lock:
+                    self._store.touch(key, timestamp, commit=not self._in_batch())
+            except Exception as e:
+                logger.warning(f"Failed to refresh cache item {key} on disk: {e}")
+        elif self.persistent:
             self._save_cache_item(key, value, timestamp)
+        logger.debug(f"Revalidated cache key: {key}")
+        return True
+
+    def keys(self) -> List[str]:
+        """Return the keys of all unexpired entries, loaded or not."""
+        now = datetime.now()
+        with self._lock:
+            return [key for key, timestamp in self._timestamps.items()
+                    if now - timestamp < self.ttl]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters and current memory usage.
+
+        Returns:
+            A dictionary with hit/miss/eviction counters, the number of known
+            and memory-resident entries, and the configured bounds
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "disk_loads": self._disk_loads,
+                "entries": len(self._timestamps),
+                "resident_entries": len(self.cache),
+                "resident_bytes": self._bytes if self.max_bytes is not None else None,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "backend": self.backend if self.persistent else "memory"
+            }
 
     def clear(self) -> None:
         """Clear the entire cache."""
-        self.cache.clear()
+        with self._lock:
+            self.cache.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self._timestamps.clear()
+            self._validators.clear()
+            self.generation += 1
         logger.debug("Cache cleared")
+        self._notify(None, None)
 
-        if self.persistent:
+        if self.persistent and self._store is not None:
+            try:
+                with self._write_lock:
+                    self._store.clear()
+                logger.debug("Persistent cache cleared")
+            except Exception as e:
+                logger.warning(f"Failed to clear persistent cache: {e}")
+        elif self.persistent:
             try:
                 # Clear the cache directory
                 for filename in os.listdir(self.cache_dir):
@@ -158,4 +755,4 @@ class APICache:
 
     def __len__(self) -> int:
         """Return the number of items in the cache."""
-        return len(self.cache)
+        return len(self._timestamps)
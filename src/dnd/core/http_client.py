@@ -0,0 +1,324 @@
+"""
+Shared HTTP client for the D&D 5e API.
+
+Every dnd5eapi caller goes through one pooled ``requests.Session`` with
+per-host concurrency limits, jittered exponential backoff, conditional
+revalidation of APICache entries (ETag / If-Modified-Since) and a circuit
+breaker, so an API brownout fails fast instead of stalling each game turn.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.dnd.core.cache import APICache
+
+logger = logging.getLogger(__name__)
+
+# (connect, read) timeouts in seconds
+DEFAULT_TIMEOUT = (
+    float(os.environ.get("DND_API_CONNECT_TIMEOUT", "3")),
+    float(os.environ.get("DND_API_READ_TIMEOUT", "5"))
+)
+
+# Retries after the first attempt for transient failures
+DEFAULT_MAX_RETRIES = 2
+
+# Full-jitter backoff: sleep uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2**attempt))
+BACKOFF_BASE = 0.25
+BACKOFF_MAX = 2.0
+
+# Concurrent requests allowed per host
+DEFAULT_PER_HOST_LIMIT = 8
+
+# Consecutive failures that open the circuit, and how long it stays open
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+
+# Statuses worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """Raised instead of sending a request while a host's circuit is open."""
+
+
+@dataclass
+class ApiResponse:
+    """Result of a JSON fetch.
+
+    Attributes:
+        status_code: HTTP status (200 for data served from a revalidated or stale cache entry)
+        data: Decoded JSON body, or the cached value when ``from_cache`` is set
+        from_cache: Whether ``data`` is an already-cached (possibly transformed) value
+        stale: Whether the cached value was served without successful revalidation
+        validators: ETag / Last-Modified headers to store with the new cache entry
+    """
+    status_code: int
+    data: Any = None
+    from_cache: bool = False
+    stale: bool = False
+    validators: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code == 200
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one host.
+
+    Closed: requests flow. After ``failure_threshold`` consecutive failures
+    the circuit opens and requests fail immediately for ``reset_timeout``
+    seconds; then a single trial request is let through (half-open) and its
+    outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._opened_at is None:
+                return "closed"
+            if time.monotonic() - self._opened_at >= self.reset_timeout:
+                return "half-open"
+            return "open"
+
+    def allow(self) -> bool:
+        """Return whether a request may be sent now."""
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            # Half-open: let exactly one trial request through
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"Opening circuit after {self._failures} consecutive failures")
+                self._opened_at = time.monotonic()
+
+
+class DnDAPIClient:
+    """Pooled, retrying HTTP client shared by all dnd5eapi callers."""
+
+    def __init__(self, timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 per_host_limit: int = DEFAULT_PER_HOST_LIMIT,
+                 failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+                 reset_timeout: float = CIRCUIT_RESET_SECONDS,
+                 session: Optional[requests.Session] = None):
+        """Create a client.
+
+        Args:
+            timeout: Request timeout, or a (connect, read) tuple
+            max_retries: Retries after the first attempt for transient failures
+            per_host_limit: Maximum concurrent requests per host
+            failure_threshold: Consecutive failures that open a host's circuit
+            reset_timeout: Seconds a circuit stays open before a trial request
+            session: Optional preconfigured session (mainly for tests)
+        """
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.per_host_limit = per_host_limit
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+
+        if session is None:
+            session = requests.Session()
+            # Retries are handled here, with backoff and the breaker in the loop
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=per_host_limit, max_retries=0)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({"Accept": "application/json"})
+        self.session = session
+
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "retries": 0, "failures": 0,
+                          "not_modified": 0, "short_circuited": 0, "stale_served": 0}
+
+    def _host_state(self, url: str) -> Tuple[threading.BoundedSemaphore, CircuitBreaker]:
+        host = urlsplit(url).netloc
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.per_host_limit)
+                self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return self._semaphores[host], self._breakers[host]
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> None:
+        delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+        if retry_after:
+            try:
+                # Honour short Retry-After hints; never block a turn for long
+                delay = max(delay, min(float(retry_after), BACKOFF_MAX))
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None,
+            timeout: Union[float, Tuple[float, float], None] = None) -> requests.Response:
+        """Send a GET request through the pool, retrying transient failures.
+
+        Args:
+            url: Absolute URL to fetch
+            headers: Optional extra request headers
+            timeout: Optional override of the client timeout
+
+        Returns:
+            The final response (which may still be a non-200 status)
+
+        Raises:
+            CircuitOpenError: If the host's circuit is open
+            requests.RequestException: If every attempt failed to connect
+        """
+        semaphore, breaker = self._host_state(url)
+        last_error: Optional[Exception] = None
+
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                self._count("short_circuited")
+                raise CircuitOpenError(f"Circuit open for {urlsplit(url).netloc}; not requesting {url}")
+
+            if attempt:
+                self._count("retries")
+            self._count("requests")
+            try:
+                with semaphore:
+                    response = self.session.get(url, headers=headers, timeout=timeout or self.timeout)
+            except requests.RequestException as e:
+                breaker.record_failure()
+                self._count("failures")
+                last_error = e
+                logger.debug(f"Request to {url} failed (attempt {attempt + 1}): {e}")
+                if attempt < self.max_retries:
+                    self._backoff(attempt)
+                continue
+
+            if response.status_code in RETRY_STATUSES:
+                breaker.record_failure()
+                self._count("failures")
+                if attempt < self.max_retries:
+                    logger.debug(f"Retrying {url} after status {response.status_code}")
+                    self._backoff(attempt, response.headers.get("Retry-After"))
+                    continue
+                return response
+
+            breaker.record_success()
+            return response
+
+        raise last_error
+
+    def get_json(self, url: str, cache: Optional[APICache] = None,
+                 cache_key: Optional[str] = None,
+                 timeout: Union[float, Tuple[float, float], None] = None) -> ApiResponse:
+        """Fetch a JSON document, revalidating an expired cache entry if there is one.
+
+        Callers check the cache for a fresh entry first. When ``cache`` and
+        ``cache_key`` are given and an expired entry with validators exists,
+        a conditional request is sent; a 304 refreshes the entry and returns
+        the cached value with ``from_cache`` set. If the API is unreachable,
+        the expired value is served with ``stale`` set rather than failing.
+
+        Args:
+            url: Absolute URL to fetch
+            cache: Optional cache holding a previous copy of the resource
+            cache_key: Key of that copy
+            timeout: Optional override of the client timeout
+
+        Returns:
+            The fetch result
+
+        Raises:
+            requests.RequestException: If the request failed and no cached copy exists
+        """
+        stale = cache.get_stale(cache_key) if cache is not None and cache_key else None
+        headers = {}
+        if stale is not None:
+            _value, validators = stale
+            if validators.get("ETag"):
+                headers["If-None-Match"] = validators["ETag"]
+            if validators.get("Last-Modified"):
+                headers["If-Modified-Since"] = validators["Last-Modified"]
+
+        try:
+            response = self.get(url, headers=headers or None, timeout=timeout)
+        except requests.RequestException as e:
+            if stale is None:
+                raise
+            self._count("stale_served")
+            logger.warning(f"Serving stale cache entry {cache_key}: {e}")
+            return ApiResponse(200, stale[0], from_cache=True, stale=True)
+
+        if response.status_code == 304 and stale is not None:
+            self._count("not_modified")
+            cache.touch(cache_key)
+            return ApiResponse(200, stale[0], from_cache=True)
+
+        if response.status_code != 200:
+            if stale is not None and response.status_code in RETRY_STATUSES:
+                self._count("stale_served")
+                return ApiResponse(200, stale[0], from_cache=True, stale=True)
+            return ApiResponse(response.status_code)
+
+        validators = {name: response.headers[name] for name in ("ETag", "Last-Modified")
+                      if response.headers.get(name)}
+        return ApiResponse(200, response.json(), validators=validators)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return request counters and the circuit state of every host."""
+        with self._lock:
+            counters = dict(self._counters)
+            breakers = dict(self._breakers)
+        counters["circuits"] = {host: breaker.state for host, breaker in breakers.items()}
+        return counters
+
+
+_client: Optional[DnDAPIClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> DnDAPIClient:
+    """Return the process-wide shared client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = DnDAPIClient()
+    return _client
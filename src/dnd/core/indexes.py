@@ -0,0 +1,182 @@
+"""
+Precomputed attribute indexes for the D&D Knowledge Navigator.
+
+Range and equality filters over a whole category (spells by level, monsters
+by CR, magic items by rarity) are answered from columnar indexes built once
+per cache generation instead of walking every item's details on each call.
+"""
+
+import bisect
+import logging
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class AttributeIndex:
+    """Columnar index over the rows of one category.
+
+    Rows are kept sorted by ``order_key`` (then name), so a range on the
+    order column is a contiguous slice; without an order key they keep the
+    order they were given in. Other numeric columns are kept as
+    sorted (value, position) arrays and categorical columns as bitmasks of
+    row positions; filters are combined by AND-ing masks.
+    """
+
+    def __init__(self, rows: Iterable[Dict[str, Any]], order_key: Optional[str] = None,
+                 numeric: Iterable[str] = (), categorical: Iterable[str] = (),
+                 generation: Hashable = None, complete: bool = True):
+        """Build the index.
+
+        Args:
+            rows: Result rows (one per item) carrying the indexed columns
+            order_key: Numeric column that defines the result order (optional)
+            numeric: Additional numeric columns that support range filters
+            categorical: Columns that support equality/substring filters
+            generation: Source generation the rows were built from
+            complete: Whether every item of the category made it into the index
+        """
+        self.order_key = order_key
+        self.generation = generation
+        self.complete = complete
+        self.rows: List[Dict[str, Any]] = list(rows)
+        self._order_values: List[float] = []
+        if order_key is not None:
+            self.rows.sort(key=lambda r: (r[order_key], r.get("name", "")))
+            self._order_values = [row[order_key] for row in self.rows]
+        self._numeric: Dict[str, Tuple[List[float], List[int]]] = {}
+        for column in numeric:
+            pairs = sorted((row[column], pos) for pos, row in enumerate(self.rows))
+            self._numeric[column] = ([v for v, _ in pairs], [p for _, p in pairs])
+
+        self._categorical: Dict[str, Dict[Any, int]] = {}
+        for column in categorical:
+            masks: Dict[Any, int] = {}
+            for pos, row in enumerate(self.rows):
+                value = row.get(column)
+                if isinstance(value, str):
+                    value = value.lower()
+                masks[value] = masks.get(value, 0) | (1 << pos)
+            self._categorical[column] = masks
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    @property
+    def _all(self) -> int:
+        return (1 << len(self.rows)) - 1
+
+    def _range_mask(self, column: str, low: Optional[float], high: Optional[float]) -> int:
+        if self.order_key is not None and column == self.order_key:
+            start = 0 if low is None else bisect.bisect_left(self._order_values, low)
+            end = len(self.rows) if high is None else bisect.bisect_right(self._order_values, high)
+            if end <= start:
+                return 0
+            return ((1 << (end - start)) - 1) << start
+
+        values, positions = self._numeric[column]
+        start = 0 if low is None else bisect.bisect_left(values, low)
+        end = len(values) if high is None else bisect.bisect_right(values, high)
+        mask = 0
+        for pos in positions[start:end]:
+            mask |= 1 << pos
+        return mask
+
+    def _equals_mask(self, column: str, value: Any) -> int:
+        if isinstance(value, str):
+            value = value.lower()
+        return self._categorical[column].get(value, 0)
+
+    def _contains_mask(self, column: str, needle: str) -> int:
+        needle = needle.lower()
+        mask = 0
+        for value, value_mask in self._categorical[column].items():
+            if isinstance(value, str) and needle in value:
+                mask |= value_mask
+        return mask
+
+    def select(self, ranges: Optional[Dict[str, Tuple[Optional[float], Optional[float]]]] = None,
+               equals: Optional[Dict[str, Any]] = None,
+               contains: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """Return the rows matching every filter, in index order.
+
+        Args:
+            ranges: Column -> inclusive (low, high) bounds; None leaves a side open
+            equals: Column -> value (strings compare case-insensitively)
+            contains: Column -> substring that the column value must contain
+
+        Returns:
+            Copies of the matching rows
+        """
+        mask = self._all
+        for column, (low, high) in (ranges or {}).items():
+            mask &= self._range_mask(column, low, high)
+        for column, value in (equals or {}).items():
+            mask &= self._equals_mask(column, value)
+        for column, needle in (contains or {}).items():
+            mask &= self._contains_mask(column, needle)
+
+        results = []
+        while mask:
+            low_bit = mask & -mask
+            results.append(dict(self.rows[low_bit.bit_length() - 1]))
+            mask ^= low_bit
+        return results
+
+    def values(self, column: str) -> List[Any]:
+        """Return the distinct values of a categorical column."""
+        return list(self._categorical[column])
+
+
+class AttributeIndexCache:
+    """Holds one AttributeIndex per category and rebuilds it when its source changes."""
+
+    def __init__(self):
+        self._indexes: Dict[str, AttributeIndex] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    def _category_lock(self, category: str) -> threading.Lock:
+        with self._lock:
+            return self._locks.setdefault(category, threading.Lock())
+
+    def get_or_build(self, category: str, generation: Hashable,
+                     builder: Callable[[], Optional[AttributeIndex]]) -> Optional[AttributeIndex]:
+        """Return the index for ``category``, building it if stale or missing.
+
+        Args:
+            category: The D&D API category
+            generation: Current generation of the category's source data
+            builder: Callable producing a fresh index (or None on failure)
+
+        Returns:
+            The index, or None if it could not be built
+        """
+        index = self._indexes.get(category)
+        if index is not None and index.generation == generation and index.complete:
+            return index
+
+        # Builds are serialized per category so concurrent callers share one build
+        with self._category_lock(category):
+            # Another thread may have rebuilt it while we waited
+            index = self._indexes.get(category)
+            if index is not None and index.generation == generation and index.complete:
+                return index
+
+            index = builder()
+            if index is not None:
+                index.generation = generation
+                with self._lock:
+                    self._indexes[category] = index
+                logger.debug(
+                    f"Built attribute index for {category}: {len(index)} rows (complete: {index.complete})")
+            return index
+
+    def invalidate(self, category: Optional[str] = None) -> None:
+        """Drop one category's index, or all of them."""
+        with self._lock:
+            if category is None:
+                self._indexes.clear()
+            else:
+                self._indexes.pop(category, None)
@@ -1,10 +1,12 @@
 #!/usr/bin/env python3
 import sys
-import requests
 import json
 import logging
 from typing import List, Dict, Any, Optional
 from src.dnd.core.cache import APICache
+from src.dnd.core.http_client import get_client
+from src.dnd.core.warmer import warm_cache
+from src.dnd.core.snapshot import SRDSnapshot
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -12,9 +14,6 @@ logger = logging.getLogger(__name__)
 # Base URL for the D&D 5e API
 BASE_URL = "https://www.dnd5eapi.co/api"
 
-# Request timeout in seconds
-REQUEST_TIMEOUT = 10
-
 # Category descriptions for better resource discovery
 CATEGORY_DESCRIPTIONS = {
     "ability-scores": "The six abilities that describe a character's physical and mental characteristics",
@@ -43,75 +42,33 @@ CATEGORY_DESCRIPTIONS = {
     "weapon-properties": "Special properties of weapons"
 }
 
-def prefetch_category_items(category: str, cache: APICache) -> None:
+def prefetch_category_items(category: str, cache: APICache, snapshot: Optional[SRDSnapshot] = None) -> None:
     """Prefetch and cache all items in a category.
 
     Args:
         category: The D&D API category to prefetch
         cache: The API cache to use
+        snapshot: Optional offline SRD snapshot; categories it covers need no prefetch
     """
-    logger.info(f"Prefetching items for category: {category}")
-
-    # First get the list of items
-    cache_key = f"dnd_items_{category}"
-    category_data = cache.get(cache_key)
-
-    if not category_data:
-        try:
-            logger.debug(f"Fetching item list for category: {category}")
-            response = requests.get(
-                f"{BASE_URL}/{category}", timeout=REQUEST_TIMEOUT)
-            if response.status_code != 200:
-                logger.error(
-                    f"Failed to fetch items for {category}: {response.status_code}")
-                return
+    if snapshot is not None and snapshot.has_category(category):
+        logger.debug(f"Skipping prefetch for {category}: served from SRD snapshot")
+        return
 
-            data = response.json()
-
-            # Transform to resource format
-            items = []
-            for item in data.get("results", []):
-                items.append({
-                    "name": item["name"],
-                    "index": item["index"],
-                    "description": f"Details about {item['name']}",
-                    "uri": f"resource://dnd/item/{category}/{item['index']}"
-                })
-
-            category_data = {
-                "category": category,
-                "items": items,
-                "count": len(items)
-            }
+    logger.info(f"Prefetching items for category: {category}")
+    warm_cache(cache, [category], snapshot=snapshot)
 
-            # Cache the result
-            cache.set(cache_key, category_data)
-
-        except Exception as e:
-            logger.exception(
-                f"Error prefetching items for {category}: {e}")
-            return
-
-    # Now prefetch each individual item
-    for item in category_data["items"]:
-        item_cache_key = f"dnd_item_{category}_{item['index']}"
-        if not cache.get(item_cache_key):
-            try:
-                logger.debug(
-                    f"Prefetching item details: {category}/{item['index']}")
-                response = requests.get(
-                    f"{BASE_URL}/{category}/{item['index']}", timeout=REQUEST_TIMEOUT)
-                if response.status_code == 200:
-                    data = response.json()
-                    cache.set(item_cache_key, data)
-            except Exception as e:
-                logger.exception(
-                    f"Error prefetching item {category}/{item['index']}: {e}")
-
-def get_categories(cache: Optional[APICache] = None) -> Dict[str, Any]:
+def get_categories(cache: Optional[APICache] = None, snapshot: Optional[SRDSnapshot] = None) -> Dict[str, Any]:
     """List all available D&D 5e API categories for browsing the official content."""
     logger.debug("Fetching D&D API categories")
 
+    if snapshot is not None:
+        categories = [{
+            "name": key,
+            "description": CATEGORY_DESCRIPTIONS.get(key, f"Collection of D&D 5e {key}"),
+            "uri": f"resource://dnd/items/{key}"
+        } for key in snapshot.categories()]
+        return {"categories": categories, "count": len(categories)}
+
     # Check cache first
     if cache:
         cached_data = cache.get("dnd_categories")
@@ -120,13 +77,16 @@ def get_categories(cache: Optional[APICache] = None) -> Dict[str, Any]:
 
     # Fetch from API if not in cache
     try:
-        response = requests.get(f"{BASE_URL}/", timeout=REQUEST_TIMEOUT)
-        if response.status_code != 200:
+        response = get_client().get_json(
+            f"{BASE_URL}/", cache=cache, cache_key="dnd_categories" if cache else None)
+        if not response.ok:
             logger.error(
                 f"Failed to fetch categories: {response.status_code}")
             return {"error": f"API request failed with status {response.status_code}"}
+        if response.from_cache:
+            return response.data
 
-        data = response.json()
+        data = response.data
 
         # Transform to resource format with descriptions
         categories = []
@@ -146,17 +106,20 @@ def get_categories(cache: Optional[APICache] = None) -> Dict[str, Any]:
 
         # Cache the result
         if cache:
-            cache.set("dnd_categories", result)
+            cache.set("dnd_categories", result, validators=response.validators)
         return result
 
     except Exception as e:
         logger.exception(f"Error fetching categories: {e}")
         return {"error": f"Failed to fetch categories: {str(e)}"}
 
-def get_items(category: str, cache: Optional[APICache] = None) -> Dict[str, Any]:
+def get_items(category: str, cache: Optional[APICache] = None, snapshot: Optional[SRDSnapshot] = None) -> Dict[str, Any]:
     """Retrieve a list of all items available in a specific D&D 5e API category."""
     logger.debug(f"Fetching items for category: {category}")
 
+    if snapshot is not None and snapshot.has_category(category):
+        return snapshot.get_category_items(category)
+
     # Check cache first
     cache_key = f"dnd_items_{category}"
     if cache:
@@ -166,14 +129,16 @@ def get_items(category: str, cache: Optional[APICache] = None) -> Dict[str, Any]
 
     # Fetch from API if not in cache
     try:
-        response = requests.get(
-            f"{BASE_URL}/{category}", timeout=REQUEST_TIMEOUT)
-        if response.status_code != 200:
+        response = get_client().get_json(
+            f"{BASE_URL}/{category}", cache=cache, cache_key=cache_key if cache else None)
+        if not response.ok:
             logger.error(
                 f"Failed to fetch items for {category}: {response.status_code}")
             return {"error": f"Category '{category}' not found or API request failed"}
+        if response.from_cache:
+            return response.data
 
-        data = response.json()
+        data = response.data
 
         # Transform to resource format
         items = []
@@ -194,17 +159,23 @@ def get_items(category: str, cache: Optional[APICache] = None) -> Dict[str, Any]
 
         # Cache the result
         if cache:
-            cache.set(cache_key, result)
+            cache.set(cache_key, result, validators=response.validators)
         return result
 
     except Exception as e:
         logger.exception(f"Error fetching items for {category}: {e}")
         return {"error": f"Failed to fetch items for {category}: {str(e)}"}
 
-def get_item(category: str, index: str, cache: Optional[APICache] = None) -> Dict[str, Any]:
+def get_item(category: str, index: str, cache: Optional[APICache] = None, snapshot: Optional[SRDSnapshot] = None) -> Dict[str, Any]:
     """Retrieve detailed information about a specific D&D 5e item by its category and index."""
     logger.debug(f"Fetching item details: {category}/{index}")
 
+    if snapshot is not None and snapshot.has_category(category):
+        data = snapshot.get_item(category, index)
+        if data is None:
+            return {"error": f"Item '{index}' not found in category '{category}'"}
+        return data
+
     # Check cache first
     cache_key = f"dnd_item_{category}_{index}"
     if cache:
@@ -214,39 +185,36 @@ def get_item(category: str, index: str, cache: Optional[APICache] = None) -> Dic
 
     # Fetch from API if not in cache
     try:
-        response = requests.get(
-            f"{BASE_URL}/{category}/{index}", timeout=REQUEST_TIMEOUT)
-
-        # Handle redirects (common in the D&D API)
-        if response.status_code == 301 and 'Location' in response.headers:
-            redirect_url = response.headers['Location']
-            logger.debug(f"Following redirect to: {redirect_url}")
-            response = requests.get(redirect_url, timeout=REQUEST_TIMEOUT)
+        # Redirects (common in the D&D API) are followed by the client
+        response = get_client().get_json(
+            f"{BASE_URL}/{category}/{index}", cache=cache, cache_key=cache_key if cache else None)
 
-        if response.status_code != 200:
+        if not response.ok:
             logger.error(
                 f"Failed to fetch item {category}/{index}: {response.status_code}")
             return {"error": f"Item '{index}' not found in category '{category}' or API request failed"}
+        if response.from_cache:
+            return response.data
 
         # Add source attribution to the API response
-        data = response.json()
+        data = response.data
         data["source"] = "D&D 5e API (www.dnd5eapi.co)"
 
         # Cache the result
         if cache:
-            cache.set(cache_key, data)
+            cache.set(cache_key, data, validators=response.validators)
         return data
 
     except Exception as e:
         logger.exception(f"Error fetching item {category}/{index}: {e}")
         return {"error": f"Failed to fetch item {category}/{index}: {str(e)}"}
 
-def search_category(category: str, query: str, cache: Optional[APICache] = None) -> Dict[str, Any]:
+def search_category(category: str, query: str, cache: Optional[APICache] = None, snapshot: Optional[SRDSnapshot] = None) -> Dict[str, Any]:
     """Search for D&D 5e items within a specific category that match the provided query."""
     logger.debug(f"Searching in {category} for: {query}")
 
     # Get all items in the category
-    all_items = get_items(category, cache=cache)
+    all_items = get_items(category, cache=cache, snapshot=snapshot)
 
     # Handle error cases
     if "error" in all_items:
@@ -274,7 +242,7 @@ def check_api_status() -> Dict[str, Any]:
 
     try:
         start_time = datetime.now()
-        response = requests.get(BASE_URL, timeout=REQUEST_TIMEOUT)
+        response = get_client().get(BASE_URL)
         response_time = (datetime.now() - start_time).total_seconds()
 
         if response.status_code == 200:
@@ -303,31 +271,31 @@ def check_api_status() -> Dict[str, Any]:
             "source": "D&D 5e API Status Check"
         }
 
-def register_resources(app, cache: APICache):
+def register_resources(app, cache: APICache, snapshot: Optional[SRDSnapshot] = None):
     """Register D&D API resources with the FastMCP app."""
     print("Registering D&D API resources...", file=sys.stderr)
 
     # Start prefetching common categories in the background
     import threading
-    for category in ["spells", "equipment", "monsters", "classes", "races"]:
-        threading.Thread(target=prefetch_category_items,
-                         args=(category, cache), daemon=True).start()
+    threading.Thread(target=warm_cache,
+                     args=(cache, ["spells", "equipment", "monsters", "classes", "races"]),
+                     kwargs={"snapshot": snapshot}, daemon=True).start()
 
     @app.resource("resource://dnd/categories")
     def _get_categories() -> Dict[str, Any]:
-        return get_categories(cache=cache)
+        return get_categories(cache=cache, snapshot=snapshot)
 
     @app.resource("resource://dnd/items/{category}")
     def _get_items(category: str) -> Dict[str, Any]:
-        return get_items(category, cache=cache)
+        return get_items(category, cache=cache, snapshot=snapshot)
 
     @app.resource("resource://dnd/item/{category}/{index}")
     def _get_item(category: str, index: str) -> Dict[str, Any]:
-        return get_item(category, index, cache=cache)
+        return get_item(category, index, cache=cache, snapshot=snapshot)
 
     @app.resource("resource://dnd/search/{category}/{query}")
     def _search_category(category: str, query: str) -> Dict[str, Any]:
-        return search_category(category, query, cache=cache)
+        return search_category(category, query, cache=cache, snapshot=snapshot)
 
     @app.resource("resource://dnd/api_status")
     def _check_api_status() -> Dict[str, Any]:
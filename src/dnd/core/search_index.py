@@ -0,0 +1,366 @@
+"""
+Inverted full-text index for the D&D Knowledge Navigator.
+
+Entities are indexed by name, index and description text as they enter the
+APICache (or in bulk from an SRD snapshot), and queries are answered with a
+BM25 ranking over the postings lists instead of scanning every category.
+"""
+
+import bisect
+import json
+import logging
+import math
+import os
+import re
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from src.dnd.core.cache import APICache, ITEM_KEY_PREFIX, LISTING_KEY_PREFIX, key_category
+from src.dnd.core.snapshot import SRDSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Bump when the persisted layout changes; older files are discarded.
+SEARCH_INDEX_FORMAT_VERSION = 1
+
+# Default filename, stored in the API cache directory
+SEARCH_INDEX_FILENAME = "search_index.json"
+
+# Relative weight of a term occurrence in each field
+FIELD_WEIGHTS = {"name": 3.0, "index": 2.0, "description": 1.0}
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Weight of a vocabulary term reached by prefix expansion rather than exact match
+PREFIX_MATCH_WEIGHT = 0.7
+
+# Seconds save_soon() waits, so a burst of changes costs one rewrite of the file
+SAVE_DEBOUNCE_SECONDS = 30.0
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lower-cased alphanumeric terms."""
+    return _TOKEN_PATTERN.findall(text.lower()) if text else []
+
+
+def _description_text(details: Dict[str, Any]) -> str:
+    """Extract searchable description text from entity details."""
+    if "desc" in details:
+        desc = details["desc"]
+        return " ".join(str(d) for d in desc) if isinstance(desc, list) else str(desc)
+    if "description" in details:
+        return str(details["description"])
+    return ""
+
+
+class FullTextIndex:
+    """BM25-ranked inverted index over SRD entities.
+
+    Each document is one (category, index) entity. Postings map a term to
+    the weighted term frequency of every document containing it; a sorted
+    copy of the vocabulary supports prefix expansion by bisection.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """Create an empty index.
+
+        Args:
+            path: Optional file the index is persisted to
+        """
+        self.path = path
+        self.snapshot_version: Optional[str] = None
+        # doc id -> (category, index, name, has_details)
+        self._docs: Dict[str, Tuple[str, str, str, bool]] = {}
+        # doc id -> term -> weighted frequency
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._postings: Dict[str, Dict[str, float]] = {}
+        self._total_length = 0.0
+        self._vocabulary: Optional[List[str]] = None
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    @staticmethod
+    def _doc_id(category: str, index: str) -> str:
+        return f"{category}/{index}"
+
+    def _remove(self, doc_id: str) -> None:
+        terms = self._doc_terms.pop(doc_id, None)
+        if terms is None:
+            return
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self._postings[term]
+                    self._vocabulary = None
+        self._total_length -= self._doc_lengths.pop(doc_id, 0.0)
+        del self._docs[doc_id]
+
+    def _insert(self, doc_id: str, category: str, index: str, name: str,
+                terms: Dict[str, float], has_details: bool) -> None:
+        self._docs[doc_id] = (category, index, name, has_details)
+        self._doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self._doc_lengths[doc_id] = length
+        self._total_length += length
+        for term, weight in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                self._postings[term] = postings = {}
+                self._vocabulary = None
+            postings[doc_id] = weight
+
+    def add(self, category: str, index: str, name: str, description: str = "",
+            has_details: bool = True) -> None:
+        """Add or replace one entity.
+
+        Args:
+            category: The D&D API category
+            index: The entity index (e.g. "fireball")
+            name: Display name of the entity
+            description: Description text, if the details are known
+            has_details: Whether the description came from the entity's details
+        """
+        doc_id = self._doc_id(category, index)
+        terms: Dict[str, float] = {}
+        for field, text in (("name", name), ("index", index), ("description", description)):
+            weight = FIELD_WEIGHTS[field]
+            for term in tokenize(text):
+                terms[term] = terms.get(term, 0.0) + weight
+
+        with self._lock:
+            self._remove(doc_id)
+            self._insert(doc_id, category, index, name, terms, has_details)
+            self._dirty = True
+
+    def add_listing(self, category: str, items: Iterable[Dict[str, Any]]) -> None:
+        """Index the names of a category listing without overwriting known details."""
+        with self._lock:
+            for item in items:
+                index = item.get("index")
+                if not index:
+                    continue
+                if self._doc_id(category, index) not in self._docs:
+                    self.add(category, index, item.get("name", index), has_details=False)
+
+    def add_details(self, category: str, details: Dict[str, Any]) -> None:
+        """Index an entity from its full details."""
+        index = details.get("index")
+        if index:
+            self.add(category, index, details.get("name", index), _description_text(details))
+
+    def remove_category(self, category: str) -> None:
+        """Drop every entity of a category."""
+        with self._lock:
+            for doc_id in [d for d, doc in self._docs.items() if doc[0] == category]:
+                self._remove(doc_id)
+            self._dirty = True
+
+    def clear(self) -> None:
+        """Drop every entity."""
+        with self._lock:
+            self._docs.clear()
+            self._doc_terms.clear()
+            self._doc_lengths.clear()
+            self._postings.clear()
+            self._total_length = 0.0
+            self._vocabulary = None
+            self.snapshot_version = None
+            self._dirty = True
+
+    def on_cache_set(self, key: Optional[str], value: Any) -> None:
+        """APICache listener keeping the index in step with cached entities."""
+        if key is None:
+            self.clear()
+        elif not isinstance(value, dict):
+            return
+        elif key.startswith(LISTING_KEY_PREFIX):
+            category = value.get("category") or key_category(key)
+            self.add_listing(category, value.get("items", []))
+        elif key.startswith(ITEM_KEY_PREFIX):
+            self.add_details(key_category(key), value)
+
+    def attach(self, cache: APICache) -> None:
+        """Index everything already in ``cache`` and follow its future writes."""
+        for key in cache.keys():
+            if key.startswith(ITEM_KEY_PREFIX):
+                # Skip entities already indexed with details so their values
+                # never need to be loaded from a lazy cache
+                category, _, index = key[len(ITEM_KEY_PREFIX):].partition("_")
+                doc = self._docs.get(self._doc_id(category, index))
+                if doc is not None and doc[3]:
+                    continue
+            elif not key.startswith(LISTING_KEY_PREFIX):
+                continue
+            self.on_cache_set(key, cache.get(key))
+        cache.add_listener(self.on_cache_set)
+
+    def index_snapshot(self, snapshot: SRDSnapshot) -> bool:
+        """Index every entity of an SRD snapshot, unless this version is already indexed.
+
+        Returns:
+            True if the snapshot was indexed now
+        """
+        with self._lock:
+            if self.snapshot_version == snapshot.version:
+                return False
+            for category in snapshot.categories():
+                self.remove_category(category)
+                for details in snapshot.iter_items(category):
+                    self.add_details(category, details)
+            self.snapshot_version = snapshot.version
+            logger.info(
+                f"Indexed SRD snapshot v{snapshot.version} for search ({len(self._docs)} entities)")
+        return True
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Return the vocabulary terms matching ``token`` with their match weights."""
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self._postings)
+        matches = []
+        start = bisect.bisect_left(self._vocabulary, token)
+        for term in self._vocabulary[start:]:
+            if not term.startswith(token):
+                break
+            matches.append((term, 1.0 if term == token else PREFIX_MATCH_WEIGHT))
+        return matches
+
+    def search(self, tokens: Iterable[str], categories: Optional[Iterable[str]] = None,
+               prefix: bool = True) -> List[Dict[str, Any]]:
+        """Rank entities against query tokens with BM25.
+
+        Args:
+            tokens: Query terms
+            categories: Optional categories to restrict the results to
+            prefix: Whether a token also matches terms it is a prefix of
+
+        Returns:
+            Matches sorted by descending score, each with category, index,
+            name, score and the query tokens it matched
+        """
+        query_terms = []
+        for token in tokens:
+            query_terms.extend(tokenize(token))
+        allowed = set(categories) if categories is not None else None
+
+        with self._lock:
+            doc_count = len(self._docs)
+            if not doc_count or not query_terms:
+                return []
+            avg_length = self._total_length / doc_count or 1.0
+
+            scores: Dict[str, float] = {}
+            matched: Dict[str, set] = {}
+            for token in dict.fromkeys(query_terms):
+                expansions = self._expand(token) if prefix else (
+                    [(token, 1.0)] if token in self._postings else [])
+                for term, match_weight in expansions:
+                    postings = self._postings[term]
+                    df = len(postings)
+                    idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                    for doc_id, tf in postings.items():
+                        if allowed is not None and self._docs[doc_id][0] not in allowed:
+                            continue
+                        norm = BM25_K1 * (1 - BM25_B + BM25_B * self._doc_lengths[doc_id] / avg_length)
+                        scores[doc_id] = scores.get(doc_id, 0.0) + \
+                            match_weight * idf * tf * (BM25_K1 + 1) / (tf + norm)
+                        matched.setdefault(doc_id, set()).add(token)
+
+            results = []
+            for doc_id, score in scores.items():
+                category, index, name, _has_details = self._docs[doc_id]
+                results.append({
+                    "category": category,
+                    "index": index,
+                    "name": name,
+                    "score": score,
+                    "matched_tokens": sorted(matched[doc_id])
+                })
+
+        results.sort(key=lambda r: (-r["score"], r["name"]))
+        return results
+
+    def save_soon(self, delay: float = SAVE_DEBOUNCE_SECONDS) -> None:
+        """Persist the index in the background after ``delay`` seconds, if it changed.
+
+        Changes made before the save runs are written by the same save.
+        """
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            if self._save_timer is not None and self._save_timer.is_alive():
+                return
+            self._save_timer = threading.Timer(delay, self.save)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def save(self) -> None:
+        """Persist the index if it changed since it was last loaded or saved."""
+        if not self.path or not self._dirty:
+            return
+
+        with self._lock:
+            if self._save_timer is not None and self._save_timer is not threading.current_thread():
+                self._save_timer.cancel()
+            self._save_timer = None
+            payload = {
+                "format_version": SEARCH_INDEX_FORMAT_VERSION,
+                "snapshot_version": self.snapshot_version,
+                "docs": {
+                    doc_id: [category, index, name, has_details, self._doc_terms[doc_id]]
+                    for doc_id, (category, index, name, has_details) in self._docs.items()
+                }
+            }
+            self._dirty = False
+
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=directory)
+            with os.fdopen(fd, "w") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, self.path)
+            logger.debug(f"Saved search index ({len(payload['docs'])} entities) to {self.path}")
+        except Exception as e:
+            self._dirty = True
+            logger.warning(f"Failed to save search index to {self.path}: {e}")
+
+    @classmethod
+    def load(cls, path: str) -> "FullTextIndex":
+        """Load a persisted index, or return an empty one bound to ``path``.
+
+        Args:
+            path: File the index is persisted to
+
+        Returns:
+            The loaded (or empty) index
+        """
+        index = cls(path)
+        if not os.path.exists(path):
+            return index
+
+        try:
+            with open(path, "r") as f:
+                payload = json.load(f)
+            if payload.get("format_version") != SEARCH_INDEX_FORMAT_VERSION:
+                logger.info(f"Discarding search index with outdated format: {path}")
+                return index
+            for doc_id, (category, item_index, name, has_details, terms) in payload["docs"].items():
+                index._insert(doc_id, category, item_index, name, terms, has_details)
+            index.snapshot_version = payload.get("snapshot_version")
+            logger.info(f"Loaded search index with {len(index)} entities from {path}")
+        except Exception as e:
+            logger.warning(f"Failed to load search index from {path}: {e}")
+            index = cls(path)
+        return index
@@ -0,0 +1,341 @@
+"""
+Offline SRD snapshot store for the D&D Knowledge Navigator.
+
+A snapshot is a single SQLite file holding every entity of the SRD dataset,
+ingested once from a local JSON dump (a directory or a tarball). Tools read
+from the snapshot first so the hot path never touches the network.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tarfile
+import tempfile
+import threading
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout changes; older snapshots are rejected.
+SNAPSHOT_SCHEMA_VERSION = 1
+
+# Default filename, stored alongside the API cache
+DEFAULT_SNAPSHOT_FILENAME = "srd_snapshot.sqlite3"
+
+# Source label attached to entities served from the snapshot
+SNAPSHOT_SOURCE = "D&D 5e API (offline snapshot)"
+
+# Prefix used by the 5e-database dump files (e.g. 5e-SRD-Spells.json)
+DUMP_FILE_PREFIX = "5e-srd-"
+
+
+def _category_from_url(url: Any) -> Optional[str]:
+    """Extract the category from an entity URL such as ``/api/2014/spells/fireball``."""
+    if not isinstance(url, str):
+        return None
+    parts = [p for p in url.split("/") if p]
+    return parts[-2] if len(parts) >= 2 else None
+
+
+def _category_from_dump_name(path: str, is_listing: bool) -> Optional[str]:
+    """Derive the API category from a dump file path.
+
+    Supports both the 5e-database layout (``5e-SRD-Magic-Items.json``) and an
+    API mirror layout (``magic-items.json`` or ``magic-items/<index>.json``).
+
+    Args:
+        path: Relative path of the JSON file inside the dump
+        is_listing: Whether the file holds a list of entities rather than one
+
+    Returns:
+        The category name, or None if it cannot be determined
+    """
+    parts = [p for p in path.replace("\\", "/").split("/") if p]
+    if not parts:
+        return None
+
+    filename = os.path.splitext(parts[-1])[0].lower()
+    if filename.startswith(DUMP_FILE_PREFIX):
+        return filename[len(DUMP_FILE_PREFIX):]
+    if is_listing:
+        return filename
+    # Single entity: <category>/<index>.json
+    return parts[-2].lower() if len(parts) >= 2 else None
+
+
+def _iter_dump_files(source: str) -> Iterator[Tuple[str, bytes]]:
+    """Yield (relative_path, raw_bytes) for every JSON file in a dump.
+
+    Args:
+        source: Path to a dump directory or a (possibly compressed) tarball
+    """
+    if os.path.isdir(source):
+        for root_dir, _dirs, files in os.walk(source):
+            for filename in sorted(files):
+                if not filename.lower().endswith(".json"):
+                    continue
+                full_path = os.path.join(root_dir, filename)
+                with open(full_path, "rb") as f:
+                    yield os.path.relpath(full_path, source), f.read()
+    elif tarfile.is_tarfile(source):
+        # Read members in place rather than extracting to disk
+        with tarfile.open(source, "r:*") as tar:
+            for member in tar:
+                if not member.isfile() or not member.name.lower().endswith(".json"):
+                    continue
+                handle = tar.extractfile(member)
+                if handle is not None:
+                    yield member.name, handle.read()
+    else:
+        raise ValueError(
+            f"SRD dump source must be a directory or tarball: {source}")
+
+
+def _entities_from_payload(payload: Any) -> List[Dict[str, Any]]:
+    """Normalize the contents of one dump file to a list of entities."""
+    if isinstance(payload, list):
+        return [e for e in payload if isinstance(e, dict)]
+    if isinstance(payload, dict):
+        # An API listing ({"count": N, "results": [...]}) only carries
+        # references, which are useless without details.
+        if "results" in payload and "index" not in payload:
+            return []
+        return [payload]
+    return []
+
+
+class SRDSnapshot:
+    """Read-only access to an ingested SRD snapshot."""
+
+    def __init__(self, path: str):
+        """Open an existing snapshot file.
+
+        Args:
+            path: Path to the snapshot SQLite file
+        """
+        self.path = path
+        self._local = threading.local()
+        self._meta = self._load_meta()
+        self._categories = self._load_categories()
+        self._listings: Dict[str, Dict[str, Any]] = {}
+
+        logger.info(
+            f"Loaded SRD snapshot v{self.version} ({len(self._categories)} categories) from {path}")
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return the calling thread's read-only connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)
+            self._local.conn = conn
+        return conn
+
+    def _load_meta(self) -> Dict[str, str]:
+        rows = self._connection().execute("SELECT key, value FROM meta").fetchall()
+        meta = dict(rows)
+        schema = int(meta.get("schema_version", 0))
+        if schema != SNAPSHOT_SCHEMA_VERSION:
+            raise ValueError(
+                f"Unsupported SRD snapshot schema {schema} (expected {SNAPSHOT_SCHEMA_VERSION})")
+        return meta
+
+    def _load_categories(self) -> Dict[str, int]:
+        rows = self._connection().execute(
+            "SELECT category, COUNT(*) FROM entities GROUP BY category").fetchall()
+        return dict(rows)
+
+    @property
+    def version(self) -> str:
+        """Content hash identifying this snapshot's data."""
+        return self._meta.get("data_version", "unknown")
+
+    @property
+    def created_at(self) -> str:
+        return self._meta.get("created_at", "")
+
+    def categories(self) -> List[str]:
+        """Return all categories present in the snapshot."""
+        return sorted(self._categories)
+
+    def has_category(self, category: str) -> bool:
+        return category in self._categories
+
+    def get_category_items(self, category: str) -> Optional[Dict[str, Any]]:
+        """Return the item listing for a category in the tools' resource format.
+
+        Args:
+            category: The D&D API category
+
+        Returns:
+            The category listing, or None if the category is not in the snapshot
+        """
+        if category not in self._categories:
+            return None
+        if category in self._listings:
+            return self._listings[category]
+
+        rows = self._connection().execute(
+            "SELECT idx, name FROM entities WHERE category = ? ORDER BY idx",
+            (category,)).fetchall()
+
+        items = [{
+            "name": name,
+            "index": idx,
+            "description": f"Details about {name}",
+            "uri": f"resource://dnd/item/{category}/{idx}",
+            "source": SNAPSHOT_SOURCE
+        } for idx, name in rows]
+
+        listing = {
+            "category": category,
+            "items": items,
+            "count": len(items),
+            "source": SNAPSHOT_SOURCE
+        }
+        self._listings[category] = listing
+        return listing
+
+    def get_item(self, category: str, index: str) -> Optional[Dict[str, Any]]:
+        """Return the full details of a single entity.
+
+        Args:
+            category: The D&D API category
+            index: The entity index (e.g. "fireball")
+
+        Returns:
+            The entity details, or None if not present
+        """
+        row = self._connection().execute(
+            "SELECT data FROM entities WHERE category = ? AND idx = ?",
+            (category, index)).fetchone()
+        if not row:
+            return None
+
+        data = json.loads(row[0])
+        data["source"] = SNAPSHOT_SOURCE
+        return data
+
+    def iter_items(self, category: str) -> Iterator[Dict[str, Any]]:
+        """Iterate over the full details of every entity in a category."""
+        rows = self._connection().execute(
+            "SELECT data FROM entities WHERE category = ? ORDER BY idx",
+            (category,)).fetchall()
+        for (raw,) in rows:
+            data = json.loads(raw)
+            data["source"] = SNAPSHOT_SOURCE
+            yield data
+
+    def close(self) -> None:
+        """Close the calling thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @classmethod
+    def ingest(cls, source: str, dest_path: str) -> "SRDSnapshot":
+        """Build a snapshot from a local SRD JSON dump.
+
+        The new snapshot is written to a temporary file and atomically moved
+        into place, so readers never observe a half-written store.
+
+        Args:
+            source: Dump directory or tarball
+            dest_path: Where to write the snapshot file
+
+        Returns:
+            The freshly opened snapshot
+        """
+        dest_dir = os.path.dirname(os.path.abspath(dest_path))
+        os.makedirs(dest_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=".tmp", dir=dest_dir)
+        os.close(fd)
+
+        digest = hashlib.sha256()
+        count = 0
+        try:
+            conn = sqlite3.connect(tmp_path)
+            try:
+                conn.execute("PRAGMA journal_mode=OFF")
+                conn.execute("PRAGMA synchronous=OFF")
+                conn.execute(
+                    "CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+                conn.execute('''
+                    CREATE TABLE entities (
+                        category TEXT NOT NULL,
+                        idx TEXT NOT NULL,
+                        name TEXT NOT NULL,
+                        data TEXT NOT NULL,
+                        PRIMARY KEY (category, idx)
+                    ) WITHOUT ROWID
+                ''')
+
+                for rel_path, raw in _iter_dump_files(source):
+                    try:
+                        payload = json.loads(raw)
+                    except ValueError as e:
+                        logger.warning(f"Skipping unreadable dump file {rel_path}: {e}")
+                        continue
+
+                    file_category = _category_from_dump_name(
+                        rel_path, isinstance(payload, list))
+                    for entity in _entities_from_payload(payload):
+                        index = entity.get("index")
+                        # Prefer the entity's own URL over guessing from the path
+                        category = _category_from_url(entity.get("url")) or file_category
+                        if not index or not category:
+                            continue
+                        entity.pop("_id", None)
+                        data = json.dumps(entity, sort_keys=True)
+                        digest.update(f"{category}/{index}".encode())
+                        digest.update(data.encode())
+                        conn.execute(
+                            "INSERT OR REPLACE INTO entities (category, idx, name, data) VALUES (?, ?, ?, ?)",
+                            (category, index, entity.get("name", index), data))
+                        count += 1
+
+                if count == 0:
+                    raise ValueError(f"No SRD entities found in {source}")
+
+                meta = {
+                    "schema_version": str(SNAPSHOT_SCHEMA_VERSION),
+                    "data_version": digest.hexdigest()[:16],
+                    "created_at": datetime.now().isoformat(),
+                    "source": os.path.abspath(source),
+                    "entity_count": str(count)
+                }
+                conn.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?)", meta.items())
+                conn.commit()
+            finally:
+                conn.close()
+
+            os.replace(tmp_path, dest_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+        logger.info(f"Ingested {count} SRD entities from {source} into {dest_path}")
+        return cls(dest_path)
+
+
+def load_snapshot(path: str) -> Optional[SRDSnapshot]:
+    """Open the snapshot at ``path`` if one exists.
+
+    Args:
+        path: Path to the snapshot file
+
+    Returns:
+        The snapshot, or None if it is missing or unreadable
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        return SRDSnapshot(path)
+    except Exception as e:
+        logger.warning(f"Failed to open SRD snapshot {path}: {e}")
+        return None
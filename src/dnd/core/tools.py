@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
+import os
 import sys
+import atexit
 import json
 import traceback
 import urllib.request
@@ -8,10 +10,13 @@ import urllib.parse
 import mcp.types as types
 from src.dnd.core.api_helpers import API_BASE_URL
 from src.dnd.core.formatters import format_monster_data, format_spell_data, format_class_data
-import requests
 import logging
-from typing import List, Dict, Any, Optional
+from typing import Callable, List, Dict, Any, Optional, Tuple
 from src.dnd.core.cache import APICache
+from src.dnd.core.http_client import get_client
+from src.dnd.core.snapshot import SRDSnapshot
+from src.dnd.core.indexes import AttributeIndex, AttributeIndexCache
+from src.dnd.core.search_index import FullTextIndex, SEARCH_INDEX_FILENAME
 import src.dnd.core.formatters as formatters
 import src.dnd.core.resources as resources
 import time
@@ -46,19 +51,35 @@ logger = logging.getLogger(__name__)
 
 # Base URL for the D&D 5e API
 BASE_URL = "https://www.dnd5eapi.co/api"
-# Request timeout in seconds
-REQUEST_TIMEOUT = 10
 
+# Maximum number of matches search_all_categories returns across all categories
+SEARCH_RESULT_LIMIT = 50
 
-def register_tools(app, cache: APICache):
+
+def register_tools(app, cache: APICache, snapshot: Optional[SRDSnapshot] = None):
     """Register D&D API tools with the FastMCP app.
 
     Args:
         app: The FastMCP app instance
         cache: The shared API cache
+        snapshot: Optional offline SRD snapshot, consulted before the cache and network
     """
     print("Registering D&D API tools...", file=sys.stderr)
 
+    # Per-category attribute indexes backing the range/filter tools
+    attribute_indexes = AttributeIndexCache()
+
+    # Full-text index for search_all_categories, kept in step with the cache
+    if cache.persistent:
+        search_index = FullTextIndex.load(os.path.join(cache.cache_dir, SEARCH_INDEX_FILENAME))
+    else:
+        search_index = FullTextIndex()
+    search_index.attach(cache)
+    # Persist what was indexed from the cache now, and anything indexed later
+    # (debounced by search_all_categories) at the latest on shutdown
+    search_index.save()
+    atexit.register(search_index.save)
+
     @app.tool()
     def search_equipment_by_cost(max_cost: float, cost_unit: str = "gp") -> Dict[str, Any]:
         """Search for D&D equipment items that cost less than or equal to a specified maximum price.
@@ -76,34 +97,25 @@ def register_tools(app, cache: APICache):
         """
         logger.debug(f"Searching equipment by cost: {max_cost} {cost_unit}")
 
-        # Get equipment list (from cache if available)
-        equipment_list = _get_category_items("equipment", cache)
-        if "error" in equipment_list:
-            return equipment_list
+        equipment_index, error = _get_equipment_index()
+        if error:
+            return error
 
-        # Filter equipment by cost
+        # Narrow to candidates by gp value, then apply the exact comparison
+        # in the requested unit so boundary items match as before
+        max_gp = _convert_currency(max_cost, cost_unit, "gp") * (1 + 1e-9)
         results = []
-        for item in equipment_list.get("items", []):
-            # Get detailed item info (from cache if available)
-            item_index = item["index"]
-            item_details = _get_item_details("equipment", item_index, cache)
-            if "error" in item_details:
-                continue
-
-            # Check if item has cost and is within budget
-            if "cost" in item_details:
-                cost = item_details["cost"]
-                # Convert cost to requested unit for comparison
-                converted_cost = _convert_currency(
-                    cost["quantity"], cost["unit"], cost_unit)
-                if converted_cost <= max_cost:
-                    results.append({
-                        "name": item_details["name"],
-                        "cost": f"{cost['quantity']} {cost['unit']}",
-                        "description": _get_description(item_details),
-                        "category": item_details.get("equipment_category", {}).get("name", "Unknown"),
-                        "uri": f"resource://dnd/item/equipment/{item_index}"
-                    })
+        for row in equipment_index.select(ranges={"value_in_gp": (None, max_gp)}):
+            converted_cost = _convert_currency(
+                row["quantity"], row["unit"], cost_unit)
+            if converted_cost <= max_cost:
+                results.append({
+                    "name": row["name"],
+                    "cost": row["cost"],
+                    "description": row["description"],
+                    "category": row["category"],
+                    "uri": row["uri"]
+                })
 
         return {
             "query": f"Equipment costing {max_cost} {cost_unit} or less",
@@ -136,41 +148,15 @@ def register_tools(app, cache: APICache):
         if min_level < 0 or max_level > 9 or min_level > max_level:
             return {"error": "Invalid level range. Must be between 0 and 9."}
 
-        # Get spells list (from cache if available)
-        spells_list = _get_category_items("spells", cache)
-        if "error" in spells_list:
-            return spells_list
-
-        # Filter spells by level and school
-        results = []
-        for item in spells_list.get("items", []):
-            # Get detailed spell info (from cache if available)
-            item_index = item["index"]
-            spell_details = _get_item_details("spells", item_index, cache)
-            if "error" in spell_details:
-                continue
-
-            # Check if spell level is within range
-            spell_level = spell_details.get("level", 0)
-            if min_level <= spell_level <= max_level:
-                # Check school if specified
-                if school:
-                    spell_school = spell_details.get(
-                        "school", {}).get("name", "").lower()
-                    if school.lower() not in spell_school:
-                        continue
-
-                results.append({
-                    "name": spell_details["name"],
-                    "level": spell_level,
-                    "school": spell_details.get("school", {}).get("name", "Unknown"),
-                    "casting_time": spell_details.get("casting_time", "Unknown"),
-                    "description": _get_description(spell_details),
-                    "uri": f"resource://dnd/item/spells/{item_index}"
-                })
+        spell_index, error = _get_attribute_index(
+            "spells", _spell_row, order_key="level", categorical=("school",))
+        if error:
+            return error
 
-        # Sort results by level and name
-        results.sort(key=lambda x: (x["level"], x["name"]))
+        # Rows are already ordered by level and name
+        results = spell_index.select(
+            ranges={"level": (min_level, max_level)},
+            contains={"school": school} if school else None)
 
         return {
             "query": f"Spells of level {min_level}-{max_level}" + (f" in school {school}" if school else ""),
@@ -201,36 +187,15 @@ def register_tools(app, cache: APICache):
         """
         logger.debug(f"Finding monsters by CR: {min_cr}-{max_cr}")
 
-        # Get monsters list (from cache if available)
-        monsters_list = _get_category_items("monsters", cache)
-        if "error" in monsters_list:
-            return monsters_list
+        monster_index, error = _get_attribute_index(
+            "monsters", _monster_row, order_key="challenge_rating",
+            numeric=("hit_points", "armor_class"), categorical=("type", "size"))
+        if error:
+            return error
 
-        # Filter monsters by CR
-        results = []
-        for item in monsters_list.get("items", []):
-            # Get detailed monster info (from cache if available)
-            item_index = item["index"]
-            monster_details = _get_item_details("monsters", item_index, cache)
-            if "error" in monster_details:
-                continue
-
-            # Check if monster CR is within range
-            monster_cr = float(monster_details.get("challenge_rating", 0))
-            if min_cr <= monster_cr <= max_cr:
-                results.append({
-                    "name": monster_details["name"],
-                    "challenge_rating": monster_cr,
-                    "type": monster_details.get("type", "Unknown"),
-                    "size": monster_details.get("size", "Unknown"),
-                    "alignment": monster_details.get("alignment", "Unknown"),
-                    "hit_points": monster_details.get("hit_points", 0),
-                    "armor_class": monster_details.get("armor_class", [{"value": 0}])[0].get("value", 0),
-                    "uri": f"resource://dnd/item/monsters/{item_index}"
-                })
-
-        # Sort results by CR and name
-        results.sort(key=lambda x: (x["challenge_rating"], x["name"]))
+        # Rows are already ordered by CR and name
+        results = monster_index.select(
+            ranges={"challenge_rating": (min_cr, max_cr)})
 
         return {
             "query": f"Monsters with CR {min_cr}-{max_cr}",
@@ -352,9 +317,8 @@ def register_tools(app, cache: APICache):
             )
 
         # Get available categories
-        categories_response = requests.get(
-            f"{BASE_URL}", timeout=REQUEST_TIMEOUT)
-        if categories_response.status_code != 200:
+        categories = _get_categories(cache)
+        if categories is None:
             error_response = {
                 "error": "Failed to fetch categories",
                 "message": "API request failed, please try again",
@@ -377,8 +341,6 @@ def register_tools(app, cache: APICache):
                 {"error": error_attr_id, "message": error_attr_id}
             )
 
-        categories = list(categories_response.json().keys())
-
         # Enhance the query using our query enhancement module
         enhanced_query, enhancements = enhance_query(query)
 
@@ -415,149 +377,111 @@ def register_tools(app, cache: APICache):
             else:
                 category_priorities[category] = 1
 
-        # Search each category
+        # Make sure every searchable category is indexed; listings come from
+        # the snapshot or cache, so this only hits the network when cold
+        _ensure_search_index()
+        searchable = [c for c in categories if c not in ["rule-sections", "rules"]]
+        for category in searchable:
+            _get_category_items(category, cache)
+
+        # Rank candidates from the inverted index
+        matches = search_index.search(query_tokens, categories=searchable)
+        best_score = matches[0]["score"] if matches else 0
+
         results = {}
         total_count = 0
         all_matches = []
         attribution_map = {}
+        matches_by_category: Dict[str, List[Dict[str, Any]]] = {}
+
+        scored = []
+        for match in matches:
+            category = match["category"]
+            item_name = match["name"].lower()
+            item_index = match["index"].lower()
+
+            # Relevance relative to the best hit, scaled to the old 0-60 range
+            score = 60 * match["score"] / best_score
+
+            # Exact match in name or index
+            if query.lower() == item_name or query.lower() == item_index:
+                score += 100
+
+            # Also check for exact match with enhanced query
+            if enhanced_query.lower() != query.lower() and (
+                    enhanced_query.lower() == item_name or enhanced_query.lower() == item_index):
+                score += 90
+
+            # Apply category priority multiplier
+            scored.append((round(score * category_priorities.get(category, 1), 2), match))
+
+        # Only the best matches are returned (and attributed)
+        scored.sort(key=lambda pair: pair[0], reverse=True)
+        for score, match in scored[:SEARCH_RESULT_LIMIT]:
+            category = match["category"]
+            confidence_level = ConfidenceLevel.HIGH if score > 70 else (
+                ConfidenceLevel.MEDIUM if score > 40 else ConfidenceLevel.LOW
+            )
 
-        for category in categories:
-            # Skip rule-related categories for efficiency
-            if category in ["rule-sections", "rules"]:
-                continue
-
-            # Get category items (from cache if available)
-            category_data = _get_category_items(category, cache)
-            if "error" in category_data:
-                continue
-
-            # Search for matching items with relevance scoring
-            matching_items = []
-
-            for item in category_data.get("items", []):
-                item_name = item["name"].lower()
-                item_index = item.get("index", "").lower()
-
-                # Get item details for more comprehensive search
-                item_details = None
-                if any(token in item_name or token in item_index for token in query_tokens):
-                    # Only fetch details if there's a potential match to avoid unnecessary API calls
-                    item_details = _get_item_details(
-                        category, item["index"], cache)
-
-                # Calculate relevance score
-                score = 0
-
-                # Exact match in name or index
-                if query.lower() == item_name or query.lower() == item_index:
-                    score += 100
-
-                # Also check for exact match with enhanced query
-                if enhanced_query.lower() != query.lower() and (
-                        enhanced_query.lower() == item_name or enhanced_query.lower() == item_index):
-                    score += 90
-
-                # Partial matches in name or index
-                for token in query_tokens:
-                    if token in item_name:
-                        score += 20
-                    if token in item_index:
-                        score += 15
-
-                # Check if name contains all tokens
-                if all(token in item_name for token in query_tokens):
-                    score += 50
-
-                # Check if name starts with any token
-                if any(item_name.startswith(token) for token in query_tokens):
-                    score += 25
-
-                # Search in description if available
-                if item_details and isinstance(item_details, dict):
-                    description = ""
-
-                    # Extract description based on item type
-                    if "desc" in item_details:
-                        if isinstance(item_details["desc"], list):
-                            description = " ".join(item_details["desc"])
-                        else:
-                            description = str(item_details["desc"])
-                    elif "description" in item_details:
-                        description = str(item_details["description"])
-
-                    description = description.lower()
-
-                    # Score based on description matches
-                    for token in query_tokens:
-                        if token in description:
-                            score += 10
-
-                    # Bonus for multiple token matches in description
-                    matching_tokens = sum(
-                        1 for token in query_tokens if token in description)
-                    if matching_tokens > 1:
-                        score += matching_tokens * 5
-
-                # Apply category priority multiplier
-                score *= category_priorities.get(category, 1)
-
-                # Add to results if score is above threshold
-                if score > 0:
-                    # Create attribution for this item
-                    confidence_level = ConfidenceLevel.HIGH if score > 70 else (
-                        ConfidenceLevel.MEDIUM if score > 40 else ConfidenceLevel.LOW
-                    )
-
-                    item_attr_id = attribution_manager.add_attribution(
-                        attribution=SourceAttribution(
-                            source="D&D 5e API",
-                            api_endpoint=f"{BASE_URL}/{category}/{item['index']}",
-                            confidence=confidence_level,
-                            relevance_score=min(score, 100),
-                            tool_used="search_all_categories",
-                            metadata={
-                                "category": category,
-                                "score": score
-                            }
-                        )
-                    )
+            item_attr_id = attribution_manager.add_attribution(
+                attribution=SourceAttribution(
+                    source="D&D 5e API",
+                    api_endpoint=f"{BASE_URL}/{category}/{match['index']}",
+                    confidence=confidence_level,
+                    relevance_score=min(score, 100),
+                    tool_used="search_all_categories",
+                    metadata={
+                        "category": category,
+                        "score": score,
+                        "matched_terms": match["matched_tokens"]
+                    }
+                )
+            )
 
-                    item_with_score = item.copy()
-                    item_with_score["score"] = score
-                    item_with_score["attribution_id"] = item_attr_id
-                    matching_items.append(item_with_score)
+            item_with_score = {
+                "name": match["name"],
+                "index": match["index"],
+                "description": f"Details about {match['name']}",
+                "uri": f"resource://dnd/item/{category}/{match['index']}",
+                "source": "D&D 5e API",
+                "score": score,
+                "attribution_id": item_attr_id
+            }
+            matches_by_category.setdefault(category, []).append(item_with_score)
 
-                    # Add to all matches for cross-category top results
-                    all_matches.append({
-                        "category": category,
-                        "item": item_with_score
-                    })
+            # Add to all matches for cross-category top results
+            all_matches.append({
+                "category": category,
+                "item": item_with_score
+            })
 
+        for category, matching_items in matches_by_category.items():
             # Sort matching items by score
             matching_items.sort(key=lambda x: x["score"], reverse=True)
 
-            # Add to results if there are matches
-            if matching_items:
-                # Create attribution for this category's results
-                category_attr_id = attribution_manager.add_attribution(
-                    attribution=SourceAttribution(
-                        source="D&D 5e API",
-                        api_endpoint=f"{BASE_URL}/{category}",
-                        confidence=ConfidenceLevel.HIGH,
-                        relevance_score=85.0,
-                        tool_used="search_all_categories",
-                        metadata={
-                            "item_count": len(matching_items)
-                        }
-                    )
+            # Create attribution for this category's results
+            category_attr_id = attribution_manager.add_attribution(
+                attribution=SourceAttribution(
+                    source="D&D 5e API",
+                    api_endpoint=f"{BASE_URL}/{category}",
+                    confidence=ConfidenceLevel.HIGH,
+                    relevance_score=85.0,
+                    tool_used="search_all_categories",
+                    metadata={
+                        "item_count": len(matching_items)
+                    }
                 )
+            )
 
-                results[category] = {
-                    "items": matching_items,
-                    "count": len(matching_items),
-                }
-                attribution_map[f"results.{category}"] = category_attr_id
-                total_count += len(matching_items)
+            results[category] = {
+                "items": matching_items,
+                "count": len(matching_items),
+            }
+            attribution_map[f"results.{category}"] = category_attr_id
+            total_count += len(matching_items)
+
+        # Persist anything indexed while answering this query, off the request path
+        search_index.save_soon()
 
         # Sort all matches by score for top results across categories
         all_matches.sort(key=lambda x: x["item"]["score"], reverse=True)
@@ -575,7 +499,8 @@ def register_tools(app, cache: APICache):
                 metadata={
                     "query": query,
                     "enhanced_query": enhanced_query,
-                    "total_results": total_count
+                    "total_results": total_count,
+                    "total_matches": len(matches)
                 }
             )
         )
@@ -591,6 +516,7 @@ def register_tools(app, cache: APICache):
             },
             "results": results,
             "total_count": total_count,
+            "total_matches": len(matches),
             "top_results": [
                 {
                     "category": match["category"],
@@ -946,8 +872,7 @@ def register_tools(app, cache: APICache):
 
         # Check base API endpoint
         try:
-            base_response = requests.get(
-                f"{BASE_URL}", timeout=REQUEST_TIMEOUT)
+            base_response = get_client().get(f"{BASE_URL}")
             base_status = base_response.status_code == 200
             base_data = base_response.json() if base_status else {}
         except Exception as e:
@@ -990,8 +915,7 @@ def register_tools(app, cache: APICache):
         key_endpoints = ["spells", "monsters", "classes"]
         for endpoint in key_endpoints:
             try:
-                endpoint_response = requests.get(
-                    f"{BASE_URL}/{endpoint}", timeout=REQUEST_TIMEOUT)
+                endpoint_response = get_client().get(f"{BASE_URL}/{endpoint}")
                 endpoint_status = endpoint_response.status_code == 200
                 endpoint_data = endpoint_response.json() if endpoint_status else {}
                 count = endpoint_data.get("count", 0) if endpoint_status else 0
@@ -1047,6 +971,8 @@ def register_tools(app, cache: APICache):
                 "available_categories": list(base_data.keys()) if base_status else []
             },
             "key_endpoints": endpoints_status,
+            "cache": cache.stats(),
+            "http_client": get_client().stats(),
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S UTC", time.gmtime())
         }
 
@@ -1107,6 +1033,12 @@ def register_tools(app, cache: APICache):
 
                 formatted_content += "\n"
 
+            cache_stats = health_check["cache"]
+            formatted_content += "## Cache\n\n"
+            formatted_content += f"**Entries:** {cache_stats['entries']} ({cache_stats['resident_entries']} in memory)\n"
+            formatted_content += f"**Hit Rate:** {cache_stats['hit_rate']:.1%} ({cache_stats['hits']} hits, {cache_stats['misses']} misses)\n"
+            formatted_content += f"**Evictions:** {cache_stats['evictions']}, **Expired:** {cache_stats['expirations']}\n"
+
             health_check["content"] = formatted_content
 
         # Prepare the final response with all attributions
@@ -1166,13 +1098,13 @@ def register_tools(app, cache: APICache):
 
         # Get equipment from API
         equipment_items = _get_equipment_for_treasure(
-            cr_tier, treasure_type, cache)
+            cr_tier, treasure_type)
 
         # Get magic items from API for hoards
         magic_items = []
         if treasure_type == "hoard":
             magic_items = _get_magic_items_for_treasure(
-                cr_tier, is_final_treasure, cache)
+                cr_tier, is_final_treasure)
 
         # Apply final treasure bonus if applicable
         if is_final_treasure:
@@ -1282,13 +1214,12 @@ def register_tools(app, cache: APICache):
 
         return coins
 
-    def _get_equipment_for_treasure(cr_tier: str, treasure_type: str, cache: APICache) -> List[Dict[str, Any]]:
+    def _get_equipment_for_treasure(cr_tier: str, treasure_type: str) -> List[Dict[str, Any]]:
         """Get equipment items from the D&D 5e API based on CR tier."""
         import random
 
-        # Get all equipment from API
-        equipment_list = _get_category_items("equipment", cache)
-        if "error" in equipment_list:
+        equipment_index, error = _get_equipment_index()
+        if error:
             return []
 
         # Number of items to include
@@ -1316,29 +1247,13 @@ def register_tools(app, cache: APICache):
         min_value, max_value = value_ranges[cr_tier]
 
         # Filter equipment by value
-        valuable_items = []
-        for item in equipment_list.get("items", []):
-            item_index = item["index"]
-            item_details = _get_item_details("equipment", item_index, cache)
-
-            if "error" in item_details or not isinstance(item_details, dict):
-                continue
-
-            # Check if item has cost
-            if "cost" in item_details:
-                cost = item_details["cost"]
-                value_in_gp = _convert_currency(
-                    cost["quantity"], cost["unit"], "gp")
-
-                # Check if value is in appropriate range
-                if min_value <= value_in_gp <= max_value:
-                    valuable_items.append({
-                        "name": item_details["name"],
-                        "value": f"{cost['quantity']} {cost['unit']}",
-                        "value_in_gp": value_in_gp,
-                        "description": _get_description(item_details),
-                        "uri": f"resource://dnd/item/equipment/{item_index}"
-                    })
+        valuable_items = [{
+            "name": row["name"],
+            "value": row["cost"],
+            "value_in_gp": row["value_in_gp"],
+            "description": row["description"],
+            "uri": row["uri"]
+        } for row in equipment_index.select(ranges={"value_in_gp": (min_value, max_value)})]
 
         # Select random items
         selected_items = []
@@ -1349,13 +1264,13 @@ def register_tools(app, cache: APICache):
 
         return selected_items
 
-    def _get_magic_items_for_treasure(cr_tier: str, is_final_treasure: bool, cache: APICache) -> List[Dict[str, Any]]:
+    def _get_magic_items_for_treasure(cr_tier: str, is_final_treasure: bool) -> List[Dict[str, Any]]:
         """Get magic items from the D&D 5e API based on CR tier."""
         import random
 
-        # Get all magic items from API
-        magic_items_list = _get_category_items("magic-items", cache)
-        if "error" in magic_items_list:
+        magic_item_index, error = _get_attribute_index(
+            "magic-items", _magic_item_row, categorical=("rarity",))
+        if error:
             return []
 
         # Number of magic items by CR tier
@@ -1383,25 +1298,10 @@ def register_tools(app, cache: APICache):
 
         # Group items by rarity
         items_by_rarity = {
-            "Common": [],
-            "Uncommon": [],
-            "Rare": [],
-            "Very Rare": [],
-            "Legendary": []
+            rarity: magic_item_index.select(equals={"rarity": rarity})
+            for rarity in ["Common", "Uncommon", "Rare", "Very Rare", "Legendary"]
         }
 
-        # Categorize all magic items by rarity
-        for item in magic_items_list.get("items", []):
-            item_index = item["index"]
-            item_details = _get_item_details("magic-items", item_index, cache)
-
-            if "error" in item_details or not isinstance(item_details, dict):
-                continue
-
-            rarity = item_details.get("rarity", {}).get("name", "Unknown")
-            if rarity in items_by_rarity:
-                items_by_rarity[rarity].append(item_details)
-
         # Select magic items based on appropriate rarity for the tier
         selected_items = []
         for _ in range(num_items):
@@ -1439,16 +1339,13 @@ def register_tools(app, cache: APICache):
 
             # Select a random item of the chosen rarity
             if items_by_rarity[chosen_rarity]:
-                item_details = random.choice(items_by_rarity[chosen_rarity])
-
-                # Extract better description
-                description = _get_magic_item_description(item_details)
+                row = random.choice(items_by_rarity[chosen_rarity])
 
                 selected_items.append({
-                    "name": item_details.get("name", "Unknown Magic Item"),
+                    "name": row["name"],
                     "rarity": chosen_rarity,
-                    "description": description,
-                    "uri": f"resource://dnd/item/magic-items/{item_details.get('index', '')}"
+                    "description": row["description"],
+                    "uri": row["uri"]
                 })
 
         return selected_items
@@ -1486,9 +1383,130 @@ def register_tools(app, cache: APICache):
 
         return description
 
+    def _ensure_search_index() -> None:
+        """Index the offline snapshot, if any, before the first search."""
+        if snapshot is not None and search_index.index_snapshot(snapshot):
+            search_index.save()
+
+    # Attribute index helpers
+    def _index_generation(category: str) -> Tuple[str, Any]:
+        """Identify the data an index for ``category`` would be built from."""
+        if snapshot is not None and snapshot.has_category(category):
+            return ("snapshot", snapshot.version)
+        return ("cache", cache.category_generation(category))
+
+    def _get_attribute_index(category: str, row_builder: Callable[[str, Dict[str, Any]], Optional[Dict[str, Any]]],
+                             **index_options) -> Tuple[Optional[AttributeIndex], Optional[Dict[str, Any]]]:
+        """Get (building if needed) the attribute index for a category.
+
+        Args:
+            category: The D&D API category
+            row_builder: Maps (item index, item details) to an index row, or None to skip the item
+            **index_options: Column options passed through to AttributeIndex
+
+        Returns:
+            A tuple of (index, error response); exactly one of them is None
+        """
+        listing = _get_category_items(category, cache)
+        if "error" in listing:
+            return None, listing
+
+        def build() -> AttributeIndex:
+            rows = []
+            complete = True
+            for item in listing.get("items", []):
+                details = _get_item_details(category, item["index"], cache)
+                if not isinstance(details, dict) or "error" in details:
+                    # Leave the index marked incomplete so the next call retries
+                    complete = False
+                    continue
+                row = row_builder(item["index"], details)
+                if row is not None:
+                    rows.append(row)
+            return AttributeIndex(rows, complete=complete, **index_options)
+
+        return attribute_indexes.get_or_build(category, _index_generation(category), build), None
+
+    def _get_equipment_index() -> Tuple[Optional[AttributeIndex], Optional[Dict[str, Any]]]:
+        # Equipment keeps listing order; value ranges go through a numeric column
+        return _get_attribute_index(
+            "equipment", _equipment_row, numeric=("value_in_gp",))
+
+    def _spell_row(item_index: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "name": details["name"],
+            "level": details.get("level", 0),
+            "school": details.get("school", {}).get("name", "Unknown"),
+            "casting_time": details.get("casting_time", "Unknown"),
+            "description": _get_description(details),
+            "uri": f"resource://dnd/item/spells/{item_index}"
+        }
+
+    def _monster_row(item_index: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "name": details["name"],
+            "challenge_rating": float(details.get("challenge_rating", 0)),
+            "type": details.get("type", "Unknown"),
+            "size": details.get("size", "Unknown"),
+            "alignment": details.get("alignment", "Unknown"),
+            "hit_points": details.get("hit_points", 0),
+            "armor_class": details.get("armor_class", [{"value": 0}])[0].get("value", 0),
+            "uri": f"resource://dnd/item/monsters/{item_index}"
+        }
+
+    def _equipment_row(item_index: str, details: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if "cost" not in details:
+            return None
+        cost = details["cost"]
+        return {
+            "name": details["name"],
+            "cost": f"{cost['quantity']} {cost['unit']}",
+            "quantity": cost["quantity"],
+            "unit": cost["unit"],
+            "value_in_gp": _convert_currency(cost["quantity"], cost["unit"], "gp"),
+            "description": _get_description(details),
+            "category": details.get("equipment_category", {}).get("name", "Unknown"),
+            "uri": f"resource://dnd/item/equipment/{item_index}"
+        }
+
+    def _magic_item_row(item_index: str, details: Dict[str, Any]) -> Dict[str, Any]:
+        name = details.get("name", "Unknown Magic Item")
+        return {
+            "name": name,
+            "rarity": details.get("rarity", {}).get("name", "Unknown"),
+            "description": _get_magic_item_description(details),
+            "uri": f"resource://dnd/item/magic-items/{details.get('index', item_index)}"
+        }
+
     # Helper functions
+    def _get_categories(cache: APICache) -> Optional[List[str]]:
+        """Get the list of API categories, preferring the offline snapshot."""
+        if snapshot is not None:
+            return snapshot.categories()
+
+        cached_data = cache.get("dnd_category_names")
+        if cached_data:
+            return cached_data
+
+        try:
+            response = get_client().get_json(
+                f"{BASE_URL}", cache=cache, cache_key="dnd_category_names")
+            if not response.ok:
+                return None
+            if response.from_cache:
+                return response.data
+            categories = list(response.data.keys())
+            cache.set("dnd_category_names", categories, validators=response.validators)
+            return categories
+        except Exception as e:
+            logger.exception(f"Error fetching categories: {e}")
+            return None
+
     def _get_category_items(category: str, cache: APICache) -> Dict[str, Any]:
-        """Get all items in a category, using cache if available."""
+        """Get all items in a category, using the snapshot or cache if available."""
+        if snapshot is not None and snapshot.has_category(category):
+            return snapshot.get_category_items(category)
+
         cache_key = f"dnd_items_{category}"
         cached_data = cache.get(cache_key)
 
@@ -1499,16 +1517,19 @@ def register_tools(app, cache: APICache):
             return cached_data
 
         try:
-            response = requests.get(f"{BASE_URL}/{category}")
-            if response.status_code != 200:
+            response = get_client().get_json(
+                f"{BASE_URL}/{category}", cache=cache, cache_key=cache_key)
+            if not response.ok:
                 return {
                     "error": f"Category '{category}' not found or API request failed",
                     "status_code": response.status_code,
                     "message": "Please use only valid D&D 5e API categories",
                     "source": "D&D 5e API"
                 }
+            if response.from_cache:
+                return response.data
 
-            data = response.json()
+            data = response.data
 
             # Transform to resource format
             items = []
@@ -1529,7 +1550,7 @@ def register_tools(app, cache: APICache):
             }
 
             # Cache the result
-            cache.set(cache_key, result)
+            cache.set(cache_key, result, validators=response.validators)
             return result
 
         except Exception as e:
@@ -1541,7 +1562,18 @@ def register_tools(app, cache: APICache):
             }
 
     def _get_item_details(category: str, index: str, cache: APICache) -> Dict[str, Any]:
-        """Get detailed information about a specific item, using cache if available."""
+        """Get detailed information about a specific item, using the snapshot or cache if available."""
+        if snapshot is not None and snapshot.has_category(category):
+            # The snapshot is authoritative for its categories; never fall through to the network
+            data = snapshot.get_item(category, index)
+            if data is None:
+                return {
+                    "error": f"Item '{index}' not found in category '{category}'",
+                    "message": "Please use only valid D&D 5e API endpoints and parameters",
+                    "source": "D&D 5e API"
+                }
+            return data
+
         cache_key = f"dnd_item_{category}_{index}"
         cached_data = cache.get(cache_key)
 
@@ -1552,22 +1584,25 @@ def register_tools(app, cache: APICache):
             return cached_data
 
         try:
-            response = requests.get(f"{BASE_URL}/{category}/{index}")
-            if response.status_code != 200:
+            response = get_client().get_json(
+                f"{BASE_URL}/{category}/{index}", cache=cache, cache_key=cache_key)
+            if not response.ok:
                 return {
                     "error": f"Item '{index}' not found in category '{category}' or API request failed",
                     "status_code": response.status_code,
                     "message": "Please use only valid D&D 5e API endpoints and parameters",
                     "source": "D&D 5e API"
                 }
+            if response.from_cache:
+                return response.data
 
-            data = response.json()
+            data = response.data
 
             # Add source attribution
             data["source"] = "D&D 5e API"
 
             # Cache the result
-            cache.set(cache_key, data)
+            cache.set(cache_key, data, validators=response.validators)
             return data
 
         except Exception as e:
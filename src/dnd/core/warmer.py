@@ -0,0 +1,228 @@
+"""
+Concurrent cache warmer for the D&D Knowledge Navigator.
+
+Fetches category listings and item details from the D&D 5e API with a
+bounded thread pool, writing results to the APICache in batches. Entries
+that are already cached are skipped, so an interrupted warm-up resumes
+where it left off.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from src.dnd.core.api_helpers import API_BASE_URL
+from src.dnd.core.cache import APICache
+from src.dnd.core.http_client import DnDAPIClient, get_client
+from src.dnd.core.snapshot import SRDSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Categories warmed when none are given
+DEFAULT_WARM_CATEGORIES = ["spells", "equipment", "monsters", "magic-items", "classes", "races"]
+
+# Concurrent requests in flight (the client also caps requests per host)
+DEFAULT_CONCURRENCY = 8
+
+# Cache writes grouped into one commit
+DEFAULT_BATCH_SIZE = 50
+
+
+@dataclass
+class WarmProgress:
+    """Progress of a warm-up run.
+
+    Attributes:
+        total: Items (and listings) that needed work
+        fetched: Entries fetched or revalidated
+        skipped: Entries already fresh in the cache
+        failed: Entries that could not be fetched
+        categories: Categories covered by this run
+    """
+    total: int = 0
+    fetched: int = 0
+    skipped: int = 0
+    failed: int = 0
+    categories: List[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def done(self) -> int:
+        return self.fetched + self.failed
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "categories": self.categories,
+            "total": self.total,
+            "fetched": self.fetched,
+            "skipped": self.skipped,
+            "failed": self.failed,
+            "elapsed_seconds": round(self.elapsed, 2)
+        }
+
+
+def listing_from_api(category: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Transform an API category listing to the cached resource format."""
+    items = [{
+        "name": item["name"],
+        "index": item["index"],
+        "description": f"Details about {item['name']}",
+        "uri": f"resource://dnd/item/{category}/{item['index']}"
+    } for item in data.get("results", [])]
+
+    return {
+        "category": category,
+        "items": items,
+        "count": len(items)
+    }
+
+
+def _fetch(client: DnDAPIClient, cache: APICache, cache_key: str,
+           url: str) -> Tuple[str, Optional[Any], Dict[str, str], bool]:
+    """Fetch one entry on a worker thread.
+
+    Returns:
+        (cache_key, payload or None on failure, validators, from_cache)
+    """
+    try:
+        response = client.get_json(url, cache=cache, cache_key=cache_key)
+    except Exception as e:
+        logger.debug(f"Warm-up fetch failed for {url}: {e}")
+        return cache_key, None, {}, False
+    if not response.ok:
+        return cache_key, None, {}, False
+    return cache_key, response.data, response.validators, response.from_cache
+
+
+def _run_fetches(executor: ThreadPoolExecutor, client: DnDAPIClient, cache: APICache,
+                 jobs: Iterable[Tuple[str, str]], transform: Callable[[str, Any], Any],
+                 progress: WarmProgress, batch_size: int,
+                 progress_callback: Optional[Callable[[WarmProgress], None]]) -> Dict[str, Any]:
+    """Fan out fetch jobs and write their results to the cache in batches.
+
+    Args:
+        executor: Pool running the fetches
+        client: HTTP client
+        cache: Cache written to (only from the calling thread)
+        jobs: (cache_key, url) pairs
+        transform: Maps (cache_key, raw JSON) to the value to cache
+        progress: Progress record updated in place
+        batch_size: Writes per cache commit
+        progress_callback: Called after every committed batch
+
+    Returns:
+        The cached value of every successful job, by cache key
+    """
+    futures = [executor.submit(_fetch, client, cache, key, url) for key, url in jobs]
+    if not futures:
+        return {}
+    results: Dict[str, Any] = {}
+    pending: List[Tuple[str, Any, Dict[str, str]]] = []
+
+    def flush() -> None:
+        if pending:
+            with cache.batch():
+                for key, value, validators in pending:
+                    cache.set(key, value, validators=validators)
+            pending.clear()
+        logger.info(
+            f"Warmed {progress.done}/{progress.total} D&D entries ({progress.failed} failed, {progress.elapsed:.1f}s)")
+        if progress_callback is not None:
+            progress_callback(progress)
+
+    try:
+        for future in as_completed(futures):
+            key, payload, validators, from_cache = future.result()
+            if payload is None:
+                progress.failed += 1
+            else:
+                progress.fetched += 1
+                # Revalidated entries were refreshed in place by the client
+                value = payload if from_cache else transform(key, payload)
+                results[key] = value
+                if not from_cache:
+                    pending.append((key, value, validators))
+            if len(pending) >= batch_size:
+                flush()
+    finally:
+        # Keep whatever finished before an interruption
+        for future in futures:
+            future.cancel()
+        flush()
+
+    return results
+
+
+def warm_cache(cache: APICache, categories: Optional[Iterable[str]] = None,
+               snapshot: Optional[SRDSnapshot] = None,
+               concurrency: int = DEFAULT_CONCURRENCY,
+               batch_size: int = DEFAULT_BATCH_SIZE,
+               progress_callback: Optional[Callable[[WarmProgress], None]] = None,
+               client: Optional[DnDAPIClient] = None) -> WarmProgress:
+    """Warm the cache with every listing and item of the given categories.
+
+    Args:
+        cache: The API cache to fill
+        categories: Categories to warm (defaults to DEFAULT_WARM_CATEGORIES)
+        snapshot: Optional offline SRD snapshot; categories it covers are skipped
+        concurrency: Maximum concurrent requests
+        batch_size: Cache writes per commit
+        progress_callback: Called with the progress after every batch
+        client: HTTP client (defaults to the shared client)
+
+    Returns:
+        The final progress record
+    """
+    client = client or get_client()
+    categories = list(categories or DEFAULT_WARM_CATEGORIES)
+    categories = [c for c in categories if snapshot is None or not snapshot.has_category(c)]
+    progress = WarmProgress(categories=categories)
+    if not categories:
+        return progress
+
+    fresh = set(cache.keys())
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="dnd-warm") as executor:
+        # Listings first: they define which items exist
+        listings: Dict[str, Dict[str, Any]] = {}
+        listing_jobs = []
+        for category in categories:
+            cache_key = f"dnd_items_{category}"
+            if cache_key in fresh:
+                listing = cache.get(cache_key)
+                if listing:
+                    listings[category] = listing
+                    continue
+            listing_jobs.append((cache_key, f"{API_BASE_URL}/{category}"))
+
+        progress.total += len(listing_jobs)
+        fetched = _run_fetches(
+            executor, client, cache, listing_jobs,
+            lambda key, data: listing_from_api(key[len("dnd_items_"):], data),
+            progress, batch_size, progress_callback)
+        for key, listing in fetched.items():
+            listings[key[len("dnd_items_"):]] = listing
+
+        # Then every item not already cached
+        item_jobs = []
+        for category, listing in listings.items():
+            for item in listing.get("items", []):
+                cache_key = f"dnd_item_{category}_{item['index']}"
+                if cache_key in fresh:
+                    progress.skipped += 1
+                else:
+                    item_jobs.append((cache_key, f"{API_BASE_URL}/{category}/{item['index']}"))
+
+        progress.total += len(item_jobs)
+        _run_fetches(executor, client, cache, item_jobs, lambda key, data: data,
+                     progress, batch_size, progress_callback)
+
+    logger.info(
+        f"Cache warm-up finished for {', '.join(categories)}: {progress.fetched} fetched, "
+        f"{progress.skipped} already cached, {progress.failed} failed in {progress.elapsed:.1f}s")
+    return progress
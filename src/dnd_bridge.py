@@ -1,12 +1,15 @@
 import os
 import sys
+import threading
 
 # Resolve project root from this file's location (works regardless of cwd)
 _PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(_PROJECT_ROOT)
 
 from src.dnd.core.cache import APICache
+from src.dnd.core.snapshot import DEFAULT_SNAPSHOT_FILENAME, load_snapshot
 from src.dnd.core import tools as dnd_tools
+from src.dnd.core.warmer import warm_cache
 
 # Mock FastMCP App to capture the tools
 class MockApp:
@@ -25,15 +28,44 @@ class MockApp:
 CACHE_DIR = os.path.join(_PROJECT_ROOT, ".dnd_cache")
 os.makedirs(CACHE_DIR, exist_ok=True)
 
+# Offline SRD snapshot (build with scripts/build_srd_snapshot.py)
+SNAPSHOT_PATH = os.environ.get("DND_SRD_SNAPSHOT", os.path.join(CACHE_DIR, DEFAULT_SNAPSHOT_FILENAME))
+
 # Initialize components
 _app = MockApp()
-_cache = APICache(ttl_hours=24, persistent=True, cache_dir=CACHE_DIR)
+# Memory bounds for the API cache (values beyond them are reloaded from disk on demand)
+CACHE_MAX_ENTRIES = int(os.environ.get("DND_CACHE_MAX_ENTRIES", "2000"))
+CACHE_MAX_MB = float(os.environ.get("DND_CACHE_MAX_MB", "64"))
+
+_cache = APICache(ttl_hours=24, persistent=True, cache_dir=CACHE_DIR,
+                  backend=os.environ.get("DND_CACHE_BACKEND", "sqlite"),
+                  max_entries=CACHE_MAX_ENTRIES or None,
+                  max_bytes=int(CACHE_MAX_MB * 1024 * 1024) or None)
+_snapshot = load_snapshot(SNAPSHOT_PATH)
 
 # Register tools into our mock app
 print("Initializing D&D Tools Bridge...")
-dnd_tools.register_tools(_app, _cache)
+if _snapshot:
+    print(f"📚 Using offline SRD snapshot v{_snapshot.version} ({len(_snapshot.categories())} categories)")
+dnd_tools.register_tools(_app, _cache, snapshot=_snapshot)
 print("D&D Tools Bridge Initialized.")
 
+def _warm_categories_from_env(value: str):
+    """Parse DND_WARM_CACHE: empty/0 disables, 1/all uses the defaults, else a category list."""
+    value = value.strip().lower()
+    if value in ("", "0", "false", "no"):
+        return []
+    if value in ("1", "true", "yes", "all"):
+        return None
+    return [c.strip() for c in value.split(",") if c.strip()]
+
+# Optional background cache warm-up at startup
+_warm_categories = _warm_categories_from_env(os.environ.get("DND_WARM_CACHE", ""))
+if _warm_categories != []:
+    print("🔥 Warming D&D API cache in the background...")
+    threading.Thread(target=warm_cache, args=(_cache, _warm_categories),
+                     kwargs={"snapshot": _snapshot}, name="dnd-cache-warmer", daemon=True).start()
+
 # --- Public API for Bot ---
 
 def search_dnd_rules(query: str) -> dict:
@@ -72,3 +104,16 @@ def find_monster(min_cr: float = 0, max_cr: float = 30) -> dict:
     if func:
         return func(min_cr, max_cr)
     return {"error": "Tool not found"}
+
+def get_cache_stats() -> dict:
+    """
+    Report D&D API cache counters (hits, misses, evictions, memory use).
+    """
+    return _cache.stats()
+
+def warm_dnd_cache(categories: list = None) -> dict:
+    """
+    Fetch every listing and item of the given categories into the cache (blocking).
+    Already cached entries are skipped, so this can be re-run to resume.
+    """
+    return warm_cache(_cache, categories, snapshot=_snapshot).as_dict()
@@ -1,18 +1,202 @@
 import os
+import copy
+import hashlib
 import json
+import time
+import asyncio
 import requests
 import inspect
-from typing import List, Dict, Any, Optional, get_type_hints
+import functools
+import threading
+import contextvars
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import List, Dict, Any, Callable, Optional, get_type_hints
+from core import rate_limiter
 
 # Constants
 OLLAMA_DEFAULT_URL = "http://localhost:11434/api/chat"
 DEFAULT_LOCAL_MODEL = "llama3"
 DEFAULT_CLAUDE_MODEL = "claude-3-5-sonnet-20240620"
 
+# Tool calls of one model turn that may run at once
+TOOL_WORKERS = int(os.environ.get("DM_TOOL_WORKERS", "8"))
+
+# Seconds a tool may run before the model is told it timed out
+DEFAULT_TOOL_TIMEOUT = float(os.environ.get("DM_TOOL_TIMEOUT", "60"))
+
 class MockResponse:
     def __init__(self, text):
         self.text = text
 
+# --- Tool Execution ---
+
+def declare_tool(side_effects: bool = True, timeout: float = None):
+    """
+    Declares how the tool executor may schedule a tool.
+    side_effects: False for tools that only read state (lookups, searches); those
+      run concurrently. Tools that mutate state (inventory, combat, logs) keep
+      running one at a time, in the order the model asked for them.
+      Undeclared tools are treated as having side effects.
+    timeout: Seconds before the call is answered with a timeout error. Only
+      applies to tools without side effects: a mutation is never reported as
+      timed out, since it would still happen and the model would retry it.
+    """
+    def wrap(func):
+        func.side_effects = side_effects
+        func.tool_timeout = timeout
+        return func
+    return wrap
+
+@dataclass
+class ToolResult:
+    name: str
+    args: dict
+    output: Any = None
+    error: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return self.error if self.error else str(self.output)
+
+_tool_pool = None
+_tool_pool_lock = threading.Lock()
+
+def _get_tool_pool() -> ThreadPoolExecutor:
+    global _tool_pool
+    with _tool_pool_lock:
+        if _tool_pool is None:
+            _tool_pool = ThreadPoolExecutor(max_workers=TOOL_WORKERS, thread_name_prefix="dm-tool")
+        return _tool_pool
+
+class ToolExecutor:
+    """
+    Runs the tool calls of one model turn. Consecutive calls to tools without
+    side effects run concurrently on a shared thread pool; a tool with side
+    effects waits for the calls before it and runs alone. Results keep the
+    order of the calls. Tools run in a copy of the caller's context, so the
+    active campaign is the same as on the calling thread. Tools with side
+    effects run on the calling thread (a worker thread for run_async) and are
+    never timed out.
+    """
+    def __init__(self, tools: List[Any]):
+        self.tool_map = {f.__name__: f for f in tools}
+        # Callable() -> bool asked before each batch; False refuses it
+        # (a hedged turn already being answered by another provider)
+        self.claim: Callable[[], bool] = lambda: True
+        # Calls actually run since the owner last cleared it (FailoverChatSession
+        # carries them over when a turn moves to another provider)
+        self.completed: List[ToolResult] = []
+        # Keeps mutations of concurrent turns of this session one at a time
+        self._mutation_lock = threading.Lock()
+
+    def _has_side_effects(self, func_name: str) -> bool:
+        return getattr(self.tool_map[func_name], "side_effects", True)
+
+    def _call(self, func_name: str, args: dict):
+        func = self.tool_map[func_name]
+        try:
+            if self._has_side_effects(func_name):
+                with self._mutation_lock:
+                    return func(**args), None
+            return func(**args), None
+        except Exception as e:
+            return None, f"Error executing {func_name}: {e}"
+
+    def _timeout(self, func_name: str) -> float:
+        return getattr(self.tool_map[func_name], "tool_timeout", None) or DEFAULT_TOOL_TIMEOUT
+
+    def _submit(self, func_name: str, args: dict):
+        timeout = self._timeout(func_name)
+        future = _get_tool_pool().submit(contextvars.copy_context().run, self._call, func_name, args)
+        return future, time.monotonic() + timeout, timeout
+
+    def _collect(self, result: ToolResult, pending):
+        future, deadline, timeout = pending
+        try:
+            result.output, result.error = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            result.error = f"Error: {result.name} timed out after {timeout:g}s."
+
+    def _prepare(self, calls: List[tuple]) -> List[ToolResult]:
+        results = [ToolResult(name, args or {}) for name, args in calls]
+        if not self.claim():
+            for result in results:
+                result.error = "Error: This turn is being answered by another model."
+            return results
+        for result in results:
+            print(f"🛠️ Tool Call: {result.name}({result.args})")
+            if result.name not in self.tool_map:
+                result.error = f"Error: Tool {result.name} not found."
+        return results
+
+    def _log_results(self, results: List[ToolResult]):
+        import dm_utils
+        for result in results:
+            print(f"   -> {result.name}: {result.text[:100]}...")
+            dm_utils.log_system_tool_call(result.name, result.args, result.text)
+
+    def run(self, calls: List[tuple]) -> List[ToolResult]:
+        """
+        Executes (func_name, args) calls and returns their results in order.
+        Must be called with the campaign context set.
+        """
+        results = self._prepare(calls)
+        executed = [result for result in results if not result.error]
+        in_flight = []  # (result, pending) of concurrent calls not yet collected
+
+        def drain():
+            for result, pending in in_flight:
+                self._collect(result, pending)
+            in_flight.clear()
+
+        for result in results:
+            if result.error:
+                continue
+            if self._has_side_effects(result.name):
+                drain()
+                result.output, result.error = self._call(result.name, result.args)
+            else:
+                in_flight.append((result, self._submit(result.name, result.args)))
+        drain()
+        self.completed.extend(executed)
+
+        self._log_results(results)
+        return results
+
+    async def _run_one_async(self, result: ToolResult):
+        if self._has_side_effects(result.name):
+            result.output, result.error = await asyncio.to_thread(self._call, result.name, result.args)
+            return
+        timeout = self._timeout(result.name)
+        try:
+            # to_thread runs the (blocking) tool in a copy of this task's context
+            result.output, result.error = await asyncio.wait_for(
+                asyncio.to_thread(self._call, result.name, result.args), timeout
+            )
+        except asyncio.TimeoutError:
+            result.error = f"Error: {result.name} timed out after {timeout:g}s."
+
+    async def run_async(self, calls: List[tuple]) -> List[ToolResult]:
+        """run() for the async engine: no thread is blocked waiting on the calls."""
+        results = self._prepare(calls)
+        executed = [result for result in results if not result.error]
+        batch = []
+        for result in results:
+            if result.error:
+                continue
+            if self._has_side_effects(result.name):
+                await asyncio.gather(*batch)
+                batch = []
+                await self._run_one_async(result)
+            else:
+                batch.append(self._run_one_async(result))
+        await asyncio.gather(*batch)
+        self.completed.extend(executed)
+
+        await asyncio.to_thread(self._log_results, results)
+        return results
+
 def python_type_to_json_type(py_type):
     """Maps Python types to JSON schema types, handling typing generics."""
     from typing import get_origin, get_args
@@ -31,6 +215,11 @@ def python_type_to_json_type(py_type):
 
 def convert_to_ollama_tool(func):
     """Converts a Python function to an OpenAI/Ollama JSON schema tool definition."""
+    # Introspection is memoized per function; callers get their own copy
+    return copy.deepcopy(_ollama_tool_schema(func))
+
+@functools.lru_cache(maxsize=None)
+def _ollama_tool_schema(func):
     type_hints = get_type_hints(func)
     signature = inspect.signature(func)
     
@@ -75,10 +264,15 @@ def convert_to_ollama_tool(func):
 
 def convert_to_anthropic_tool(func):
     """Converts a Python function to Anthropic tool definition."""
+    # Memoized like the Ollama schema; callers get their own copy
+    return copy.deepcopy(_anthropic_tool_schema(func))
+
+@functools.lru_cache(maxsize=None)
+def _anthropic_tool_schema(func):
     # Anthropic uses nearly identical schema to OpenAI now, but strictly requires input_schema
     # Structure: { "name": "...", "description": "...", "input_schema": { ... } }
     
-    ollama_schema = convert_to_ollama_tool(func)["function"]
+    ollama_schema = _ollama_tool_schema(func)["function"]
     
     return {
         "name": ollama_schema["name"],
@@ -86,18 +280,272 @@ def convert_to_anthropic_tool(func):
         "input_schema": ollama_schema["parameters"]
     }
 
+# --- History Translation ---
+# Stored histories mix formats: Gemini Contents (or their JSON, with text,
+# function_call and function_response parts) and the plain text messages of
+# the Claude/Ollama sessions. Sessions translate whatever they are given.
+
+# Tool results longer than this are cut when rendered as text for another provider
+TOOL_RESULT_MAX_CHARS = 500
+
+def _part_text(part) -> str:
+    """Readable text of one history part (str, dict or SDK Part)."""
+    if isinstance(part, str):
+        return part
+    if not isinstance(part, dict):
+        part = part.model_dump(exclude_none=True) if hasattr(part, "model_dump") else {"text": str(part)}
+    if part.get("text"):
+        return str(part["text"])
+    if part.get("function_call"):
+        call = part["function_call"]
+        return f"[Tool call: {call.get('name')}({json.dumps(call.get('args') or {}, default=str)})]"
+    if part.get("function_response"):
+        response = part["function_response"]
+        return f"[Tool result: {response.get('name')}: {str(response.get('response'))[:TOOL_RESULT_MAX_CHARS]}]"
+    return ""
+
+def history_messages(history: list) -> List[Dict]:
+    """
+    Provider-neutral text view of a history: [{"role": "user"|"model", "text": ...}].
+    Tool calls are rendered as text, empty messages dropped and consecutive
+    messages of one role merged (Claude requires alternating roles).
+    """
+    messages = []
+    for msg in history or []:
+        if not isinstance(msg, dict):
+            msg = msg.model_dump(exclude_none=True) if hasattr(msg, "model_dump") else {"parts": [str(msg)]}
+        role = "model" if msg.get("role") in ("model", "assistant") else "user"
+        parts = msg.get("parts", [])
+        if not isinstance(parts, list):
+            parts = [parts]
+        text = "\n".join(t for t in (_part_text(p) for p in parts) if t)
+        if not text:
+            continue
+        if messages and messages[-1]["role"] == role:
+            messages[-1]["text"] += "\n\n" + text
+        else:
+            messages.append({"role": role, "text": text})
+    return messages
+
+def to_google_history(history: list) -> list:
+    """The history with other providers' text messages turned into Gemini contents."""
+    converted = []
+    for msg in history or []:
+        if isinstance(msg, dict):
+            parts = msg.get("parts", [])
+            if not isinstance(parts, list):
+                parts = [parts]
+            if msg.get("role") == "assistant" or any(isinstance(p, str) for p in parts):
+                msg = {
+                    "role": "model" if msg.get("role") in ("model", "assistant") else "user",
+                    "parts": [{"text": p} if isinstance(p, str) else p for p in parts]
+                }
+        converted.append(msg)
+    return converted
+
+# --- Prompt Prefix Caching ---
+# Every turn resends the same large prefix: the system instruction (base
+# prompt, rules, every skill file), all tool schemas and a history that only
+# grows at its end. Claude requests mark that prefix with cache breakpoints;
+# Gemini sessions keep the system instruction and tools in a CachedContent,
+# shared by every session built from the same prompt and replaced when the
+# prompt's files change. Cache hit rates are logged per provider.
+
+# Set DM_PROMPT_CACHE=0 to send the full prompt with every request
+PROMPT_CACHING = os.environ.get("DM_PROMPT_CACHE", "1") != "0"
+
+# Lifetime of a Gemini cache; it is extended while sessions keep using it
+GEMINI_CACHE_TTL = int(os.environ.get("DM_GEMINI_CACHE_TTL", "3600"))
+
+# A Gemini cache this close to expiry gets its TTL extended before the next request
+GEMINI_CACHE_REFRESH_SECONDS = 300
+
+# Seconds before retrying a Gemini cache creation that failed (429/5xx)
+GEMINI_CACHE_RETRY_SECONDS = 60
+
+CACHE_BREAKPOINT = {"type": "ephemeral"}
+
+_cache_stats = {}  # provider -> {"requests", "cached_tokens", "input_tokens"}
+# (model, prompt digest) -> [cache name, monotonic expiry], or None if the prompt can't be cached
+_gemini_caches = {}
+# campaign (or model outside a campaign) -> the (model, prompt digest) it last used
+_gemini_cache_slots = {}
+# Keys whose cache is being created or extended by some request
+_gemini_cache_busy = set()
+# key -> monotonic time before which a failed cache creation is not retried
+_gemini_cache_retry = {}
+_cache_lock = threading.Lock()
+
+def record_cache_usage(provider: str, cached_tokens: int, input_tokens: int):
+    """Counts the prompt tokens of one request (input_tokens includes cached_tokens)."""
+    with _cache_lock:
+        stats = _cache_stats.setdefault(provider, {"requests": 0, "cached_tokens": 0, "input_tokens": 0})
+        stats["requests"] += 1
+        stats["cached_tokens"] += cached_tokens
+        stats["input_tokens"] += input_tokens
+        overall = stats["cached_tokens"] / stats["input_tokens"] if stats["input_tokens"] else 0.0
+    print(f"💾 [Cache] {provider}: {cached_tokens}/{input_tokens} prompt tokens from cache ({overall:.0%} since start)")
+
+def cache_hit_rates() -> dict:
+    """provider -> share of prompt tokens served from cache since start."""
+    with _cache_lock:
+        return {
+            provider: stats["cached_tokens"] / stats["input_tokens"] if stats["input_tokens"] else 0.0
+            for provider, stats in _cache_stats.items()
+        }
+
+def _with_breakpoint(message: dict) -> dict:
+    """A copy of a Claude message whose last block is a cache breakpoint (SDK blocks are left alone)."""
+    content = message["content"]
+    if isinstance(content, str):
+        if not content:
+            return message
+        return dict(message, content=[{"type": "text", "text": content, "cache_control": CACHE_BREAKPOINT}])
+    if content and isinstance(content[-1], dict):
+        return dict(message, content=content[:-1] + [dict(content[-1], cache_control=CACHE_BREAKPOINT)])
+    return message
+
+def _gemini_cache_slot() -> str:
+    from core.campaign import active_campaign_ctx
+    return active_campaign_ctx.get() or ""
+
+def _release_gemini_cache(key: tuple) -> Optional[str]:
+    """Forgets a cache no campaign uses any more; returns its name to delete (must hold _cache_lock)."""
+    entry = _gemini_caches.get(key)
+    if not entry or key in _gemini_cache_slots.values():
+        return None
+    del _gemini_caches[key]
+    return entry[0]
+
+def _delete_gemini_cache(client, name: str):
+    try:
+        client.caches.delete(name=name)
+        print(f"💾 [Cache] Deleted stale Gemini cache {name}")
+    except Exception as e:
+        print(f"⚠️ [Cache] Could not delete Gemini cache {name}: {e}")
+
+def _cache_too_small(error: Exception) -> bool:
+    """The 400 Gemini answers for a prompt below the model's minimum cache size."""
+    text = str(error).lower()
+    return "too small" in text or "min_total_token_count" in text
+
+def _refresh_gemini_cache(client, key: tuple, name: Optional[str], system_instruction: str,
+                          tool_specs: Optional[list], tool_config) -> Optional[str]:
+    """Extends cache name, or creates the cache for key; network calls, made without _cache_lock."""
+    from google.genai import types
+
+    model, digest = key
+    if name:
+        try:
+            client.caches.update(name=name, config=types.UpdateCachedContentConfig(ttl=f"{GEMINI_CACHE_TTL}s"))
+            with _cache_lock:
+                _gemini_caches[key] = [name, time.monotonic() + GEMINI_CACHE_TTL]
+            return name
+        except Exception as e:
+            print(f"⚠️ [Cache] Could not extend Gemini cache {name} ({e}); creating a new one")
+
+    try:
+        cache = client.caches.create(model=model, config=types.CreateCachedContentConfig(
+            system_instruction=system_instruction,
+            tools=tool_specs,
+            tool_config=tool_config,
+            ttl=f"{GEMINI_CACHE_TTL}s",
+            display_name=f"deesim-{digest}"
+        ))
+    except Exception as e:
+        with _cache_lock:
+            _gemini_caches.pop(key, None)
+            if _cache_too_small(e):
+                # Only grows if the prompt's files change, which gives a new key
+                _gemini_caches[key] = None
+            else:
+                _gemini_cache_retry[key] = time.monotonic() + GEMINI_CACHE_RETRY_SECONDS
+        print(f"⚠️ [Cache] Gemini prompt not cached, sending it inline: {e}")
+        return None
+    with _cache_lock:
+        _gemini_caches[key] = [cache.name, time.monotonic() + GEMINI_CACHE_TTL]
+        _gemini_cache_retry.pop(key, None)
+    print(f"💾 [Cache] Created Gemini cache {cache.name} for {model} (ttl {GEMINI_CACHE_TTL}s)")
+    return cache.name
+
+def gemini_cached_content(client, model: str, system_instruction: str, tools: list, tool_config) -> Optional[str]:
+    """
+    Name of the CachedContent holding this system instruction and these tools
+    for model, created or extended as needed. None when caching is off, the
+    prompt can't be cached (below the model's minimum size), or the cache is
+    unavailable right now (being created, or creation just failed).
+    """
+    from google.genai import types
+
+    if not PROMPT_CACHING or not (system_instruction or tools):
+        return None
+    try:
+        tool_specs = [types.Tool(function_declarations=[
+            types.FunctionDeclaration.from_callable(client=client._api_client, callable=f) for f in tools
+        ])] if tools else None
+    except Exception as e:
+        print(f"⚠️ [Cache] Tool schemas can't be cached: {e}")
+        return None
+    digest = hashlib.sha256(json.dumps({
+        "system": system_instruction,
+        "tools": [t.model_dump(mode="json", exclude_none=True) for t in tool_specs or []]
+    }, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    key = (model, digest)
+
+    now = time.monotonic()
+    refresh = False
+    with _cache_lock:
+        slot = _gemini_cache_slot() or model
+        previous = _gemini_cache_slots.get(slot)
+        _gemini_cache_slots[slot] = key
+        # The prompt's files changed; the old cache only costs storage now
+        stale = _release_gemini_cache(previous) if previous and previous != key else None
+
+        entry = _gemini_caches.get(key)
+        name = entry[0] if entry and entry[1] > now else None
+        if key in _gemini_caches and entry is None:
+            pass
+        elif entry and entry[1] - now > GEMINI_CACHE_REFRESH_SECONDS:
+            pass
+        elif key not in _gemini_cache_busy and _gemini_cache_retry.get(key, 0) <= now:
+            # This request extends (or creates) it; concurrent ones use what there is
+            _gemini_cache_busy.add(key)
+            refresh = True
+
+    if stale:
+        _delete_gemini_cache(client, stale)
+    if not refresh:
+        return name
+    try:
+        return _refresh_gemini_cache(client, key, entry[0] if entry else None, system_instruction, tool_specs, tool_config)
+    finally:
+        with _cache_lock:
+            _gemini_cache_busy.discard(key)
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """
+    A 429/quota error. Sessions always raise these (instead of answering with
+    them) so the engine can slow every campaign down (see core.rate_limiter).
+    """
+    status = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    text = str(error)
+    return status == 429 or "429" in text or "RESOURCE_EXHAUSTED" in text
+
 class LocalChatSession:
     """
     A compatible wrapper for Ollama/Local LLM.
     """
     def __init__(self, model: str, history: List[Dict], system_instruction: str, tools: List[Any]):
         self.model = model
-        self.history = history if history else [] 
+        self.history = list(history) if history else [] 
         self.system_instruction = system_instruction
+        # Raise all API errors instead of answering with them (set by FailoverChatSession)
+        self.raise_errors = False
         self.api_url = os.environ.get("OLLAMA_HOST", OLLAMA_DEFAULT_URL)
         
         # Tool Setup
-        self.tool_map = {f.__name__: f for f in tools}
+        self.tool_executor = ToolExecutor(tools)
+        self.tool_map = self.tool_executor.tool_map
         self.ollama_tools = [convert_to_ollama_tool(f) for f in tools]
         
         # Normalize history to Ollama format
@@ -105,103 +553,146 @@ class LocalChatSession:
         if self.system_instruction:
             self.context_window.append({"role": "system", "content": self.system_instruction})
             
-        for msg in self.history:
-             role = msg.get("role", "user")
-             if role == "model": role = "assistant"
-             
-             parts = msg.get("parts", [])
-             content = ""
-             if isinstance(parts, list):
-                 content = " ".join([str(p) for p in parts])
-             else:
-                 content = str(parts)
-                 
-             self.context_window.append({"role": role, "content": content})
+        for msg in history_messages(self.history):
+             role = "assistant" if msg["role"] == "model" else "user"
+             self.context_window.append({"role": role, "content": msg["text"]})
 
     def send_message(self, content_parts: List[Any], max_turns=5, timeout=None) -> Any:
-        # 1. Parse Input
+        return MockResponse("".join(self.send_message_stream(content_parts, max_turns, timeout)))
+
+    async def send_message_async(self, content_parts: List[Any], max_turns=5, timeout=None) -> Any:
+        return MockResponse("".join([d async for d in self.send_message_stream_async(content_parts, max_turns, timeout)]))
+
+    def _add_user_turn(self, content_parts: List[Any]):
         user_text = ""
         for part in content_parts:
             if isinstance(part, str):
                 user_text += part + "\n"
-            
         self.context_window.append({"role": "user", "content": user_text})
         self.history.append({"role": "user", "parts": [user_text]}) 
+
+    def _estimate_tokens(self) -> int:
+        return rate_limiter.estimate_tokens(sum(len(str(m.get("content") or "")) for m in self.context_window))
+
+    def _payload(self) -> dict:
+        return {
+            "model": self.model,
+            "messages": self.context_window,
+            "stream": True,
+            "tools": self.ollama_tools
+        }
+
+    def _record_tool_turn(self, ai_text: str, tool_calls: list) -> list:
+        """Adds the model's tool-calling message; returns the (name, args) calls."""
+        self.context_window.append({"role": "assistant", "content": ai_text, "tool_calls": tool_calls})
+        return [
+            (tool_call.get("function", {}).get("name"), tool_call.get("function", {}).get("arguments", {}))
+            for tool_call in tool_calls
+        ]
+
+    def _record_tool_results(self, results: List[ToolResult]):
+        for result in results:
+            self.context_window.append({
+                "role": "tool",
+                "name": result.name,
+                "content": result.text
+            })
+
+    def _record_reply(self, ai_text: str):
+        self.context_window.append({"role": "assistant", "content": ai_text})
+        self.history.append({"role": "model", "parts": [ai_text]})
+
+    def send_message_stream(self, content_parts: List[Any], max_turns=5, timeout=None):
+        """Yields the reply as text deltas (Ollama streaming), running tool calls between model turns."""
+        self._add_user_turn(content_parts)
+        emitted = False
         
-        current_turn = 0
-        final_ai_text = ""
-        
-        while current_turn < max_turns:
-            current_turn += 1
-            
-            # 2. Call API
-            payload = {
-                "model": self.model,
-                "messages": self.context_window,
-                "stream": False,
-                "tools": self.ollama_tools
-            }
-            
+        for current_turn in range(1, max_turns + 1):
             try:
+                rate_limiter.admit("local", self.model, self._estimate_tokens())
                 print(f"📡 Sending to Local LLM ({self.api_url})... [Turn {current_turn}]")
-                response = requests.post(self.api_url, json=payload)
-                response.raise_for_status()
-                data = response.json()
-                
-                message = data.get("message", {})
-                ai_text = message.get("content", "")
-                tool_calls = message.get("tool_calls", [])
+                ai_text = ""
+                tool_calls = []
+                with requests.post(self.api_url, json=self._payload(), stream=True, timeout=timeout) as response:
+                    response.raise_for_status()
+                    # One JSON object per line; tool calls arrive whole in one of them
+                    for line in response.iter_lines():
+                        if not line:
+                            continue
+                        data = json.loads(line)
+                        message = data.get("message", {})
+                        delta = message.get("content", "")
+                        if delta:
+                            if emitted and not ai_text:
+                                yield "\n\n"
+                            ai_text += delta
+                            emitted = True
+                            yield delta
+                        tool_calls.extend(message.get("tool_calls") or [])
+                        if data.get("done"):
+                            break
+            except Exception as e:
+                if self.raise_errors or is_rate_limit_error(e):
+                    raise
+                yield f"Local LLM Error: {e}"
+                return
                 
-                if ai_text:
-                    if final_ai_text:
-                        final_ai_text += "\n\n" + ai_text
-                    else:
-                        final_ai_text = ai_text
-                    # print(f"🤖 AI Thought: {ai_text[:50]}...")
+            if tool_calls:
+                calls = self._record_tool_turn(ai_text, tool_calls)
+                self._record_tool_results(self.tool_executor.run(calls))
+                continue
+            
+            self._record_reply(ai_text)
+            return
                 
-                # 3. Handle Tool Calls
+        yield ("\n\n" if emitted else "") + "Max turns reached without final response."
+
+    async def send_message_stream_async(self, content_parts: List[Any], max_turns=5, timeout=None):
+        """send_message_stream on the event loop (httpx), for the async engine."""
+        import httpx
+
+        self._add_user_turn(content_parts)
+        emitted = False
+
+        async with httpx.AsyncClient(timeout=timeout) as client:
+            for current_turn in range(1, max_turns + 1):
+                try:
+                    await rate_limiter.admit_async("local", self.model, self._estimate_tokens())
+                    print(f"📡 Sending to Local LLM ({self.api_url})... [Turn {current_turn}]")
+                    ai_text = ""
+                    tool_calls = []
+                    async with client.stream("POST", self.api_url, json=self._payload()) as response:
+                        response.raise_for_status()
+                        async for line in response.aiter_lines():
+                            if not line:
+                                continue
+                            data = json.loads(line)
+                            message = data.get("message", {})
+                            delta = message.get("content", "")
+                            if delta:
+                                if emitted and not ai_text:
+                                    yield "\n\n"
+                                ai_text += delta
+                                emitted = True
+                                yield delta
+                            tool_calls.extend(message.get("tool_calls") or [])
+                            if data.get("done"):
+                                break
+                except Exception as e:
+                    if self.raise_errors or is_rate_limit_error(e):
+                        raise
+                    yield f"Local LLM Error: {e}"
+                    return
+
                 if tool_calls:
-                    self.context_window.append(message) 
-                    
-                    for tool_call in tool_calls:
-                        func_name = tool_call.get("function", {}).get("name")
-                        args = tool_call.get("function", {}).get("arguments", {})
-                        
-                        print(f"🛠️ Tool Call: {func_name}({args})")
-                        
-                        if func_name in self.tool_map:
-                            import dm_utils
-                            try:
-                                func = self.tool_map[func_name]
-                                result = func(**args)
-                                tool_output = str(result)
-                                dm_utils.log_system_tool_call(func_name, args, tool_output)
-                            except Exception as e:
-                                tool_output = f"Error executing {func_name}: {e}"
-                                dm_utils.log_system_tool_call(func_name, args, tool_output)
-                        else:
-                            tool_output = f"Error: Tool {func_name} not found."
-                            
-                        print(f"   -> Result: {tool_output[:50]}...")
-                        
-                        self.context_window.append({
-                            "role": "tool",
-                            "name": func_name,
-                            "content": tool_output
-                        })
-                    
+                    calls = self._record_tool_turn(ai_text, tool_calls)
+                    self._record_tool_results(await self.tool_executor.run_async(calls))
                     continue
-                
-                else:
-                    self.context_window.append({"role": "assistant", "content": ai_text})
-                    self.history.append({"role": "model", "parts": [ai_text]})
-                    
-                    return MockResponse(final_ai_text)
-                    
-            except Exception as e:
-                return MockResponse(f"Local LLM Error: {e}")
-                
-        return MockResponse("Max turns reached without final response.")
+
+                self._record_reply(ai_text)
+                return
+
+        yield ("\n\n" if emitted else "") + "Max turns reached without final response."
 
     def get_history(self):
         return self.history
@@ -213,126 +704,157 @@ class ClaudeChatSession:
     """
     def __init__(self, api_key: str, model_name: str, history: List[Dict], tools: List[Any], system_instruction: str):
         import anthropic
+        self.api_key = api_key
         self.client = anthropic.Anthropic(api_key=api_key)
+        self._async_client = None
         self.model = model_name or DEFAULT_CLAUDE_MODEL
         self.system = system_instruction
-        self.history = history if history else []
+        self.history = list(history) if history else []
+        # Raise all API errors instead of answering with them (set by FailoverChatSession)
+        self.raise_errors = False
         
-        self.tool_map = {f.__name__: f for f in tools}
+        self.tool_executor = ToolExecutor(tools)
+        self.tool_map = self.tool_executor.tool_map
         self.claude_tools = [convert_to_anthropic_tool(f) for f in tools]
         
         # Normalize History for Claude
         # Claude strictly alternates User/Assistant. 
         # We need to ensure valid conversation structure.
         self.messages = []
-        for msg in self.history:
-             role = msg.get("role", "user")
-             if role == "model": role = "assistant"
-             
-             parts = msg.get("parts", [])
-             content = ""
-             if isinstance(parts, list):
-                 content = " ".join([str(p) for p in parts])
-             else:
-                 content = str(parts)
-            
-             self.messages.append({"role": role, "content": content})
+        for msg in history_messages(self.history):
+             role = "assistant" if msg["role"] == "model" else "user"
+             self.messages.append({"role": role, "content": msg["text"]})
 
+    @property
+    def async_client(self):
+        if self._async_client is None:
+            import anthropic
+            self._async_client = anthropic.AsyncAnthropic(api_key=self.api_key)
+        return self._async_client
 
     def send_message(self, content_parts: List[Any], max_turns=10, timeout=None) -> Any:
-        # 1. Parse Input
+        return MockResponse("".join(self.send_message_stream(content_parts, max_turns, timeout)))
+
+    async def send_message_async(self, content_parts: List[Any], max_turns=10, timeout=None) -> Any:
+        return MockResponse("".join([d async for d in self.send_message_stream_async(content_parts, max_turns, timeout)]))
+
+    def _add_user_turn(self, content_parts: List[Any]):
         user_text = ""
         for part in content_parts:
             if isinstance(part, str):
                 user_text += part + "\n"
-        
         self.messages.append({"role": "user", "content": user_text})
         self.history.append({"role": "user", "parts": [user_text]})
-        
-        current_turn = 0
+
+    def _estimate_tokens(self) -> int:
+        chars = len(self.system or "") + sum(len(str(m["content"])) for m in self.messages)
+        return rate_limiter.estimate_tokens(chars)
+
+    def _request(self, timeout=None) -> dict:
+        request = {
+            "model": self.model,
+            "max_tokens": 2048,
+            "system": self.system,
+            "messages": self.messages,
+            "tools": self.claude_tools
+        }
+        if PROMPT_CACHING:
+            # Breakpoints after the tools, the system prompt and the newest message:
+            # the next request reads everything up to this one from the cache
+            if self.claude_tools:
+                request["tools"] = self.claude_tools[:-1] + [dict(self.claude_tools[-1], cache_control=CACHE_BREAKPOINT)]
+            if self.system:
+                request["system"] = [{"type": "text", "text": self.system, "cache_control": CACHE_BREAKPOINT}]
+            if self.messages:
+                request["messages"] = self.messages[:-1] + [_with_breakpoint(self.messages[-1])]
+        if timeout:
+            request["timeout"] = timeout
+        return request
+
+    def _record_usage(self, usage):
+        if usage is None:
+            return
+        cached = getattr(usage, "cache_read_input_tokens", None) or 0
+        written = getattr(usage, "cache_creation_input_tokens", None) or 0
+        record_cache_usage("claude", cached, usage.input_tokens + cached + written)
+
+    def _record_response(self, content_blocks) -> list:
+        """Adds the model's message; returns its tool_use blocks."""
+        # Claude expects the *exact* list of blocks returned for correct history
+        self.messages.append({
+            "role": "assistant",
+            "content": content_blocks
+        })
+        return [block for block in content_blocks if block.type == "tool_use"]
+
+    def _record_tool_results(self, tool_uses: list, results: List[ToolResult]):
+        self.messages.append({
+            "role": "user",
+            "content": [{
+                "type": "tool_result",
+                "tool_use_id": block.id,
+                "content": result.text
+            } for block, result in zip(tool_uses, results)]
+        })
+
+    def send_message_stream(self, content_parts: List[Any], max_turns=10, timeout=None):
+        """Yields the reply as text deltas (Anthropic streaming), running tool calls between model turns."""
+        self._add_user_turn(content_parts)
         final_text = ""
         
-        while current_turn < max_turns:
-            current_turn += 1
+        for current_turn in range(1, max_turns + 1):
+            rate_limiter.admit("claude", self.model, self._estimate_tokens())
             print(f"📡 Sending to Claude ({self.model})... [Turn {current_turn}]")
-            
             try:
-                response = self.client.messages.create(
-                    model=self.model,
-                    max_tokens=2048,
-                    system=self.system,
-                    messages=self.messages,
-                    tools=self.claude_tools
-                )
+                with self.client.messages.stream(**self._request(timeout)) as stream:
+                    for text in stream.text_stream:
+                        final_text += text
+                        yield text
+                    response = stream.get_final_message()
             except Exception as e:
-                return type('MockResponse', (object,), {"text": f"Claude Error: {e}"})()
+                if self.raise_errors or is_rate_limit_error(e):
+                    raise
+                yield f"Claude Error: {e}"
+                return
 
-            # Process Response
-            content_blocks = response.content
-            
-            # Helper to append assistant response to our message list in correct format
-            # Claude expects the *exact* list of blocks returned for correct history
-            self.messages.append({
-                "role": "assistant",
-                "content": content_blocks
-            })
-            
-            tool_results = []
-            has_tool_use = False
-            
-            text_part = ""
-            
-            for block in content_blocks:
-                if block.type == "text":
-                    # print(f"🤖 Claude Thought: {block.text[:50]}...")
-                    text_part += block.text
-                    final_text += block.text
-                
-                elif block.type == "tool_use":
-                    has_tool_use = True
-                    func_name = block.name
-                    args = block.input
-                    tool_use_id = block.id
-                    
-                    print(f"🛠️ Tool Call: {func_name}({args})")
-                    
-                    if func_name in self.tool_map:
-                        import dm_utils
-                        try:
-                            func = self.tool_map[func_name]
-                            result = func(**args)
-                            tool_output = str(result)
-                            dm_utils.log_system_tool_call(func_name, args, tool_output)
-                        except Exception as e:
-                            tool_output = f"Error executing {func_name}: {e}"
-                            dm_utils.log_system_tool_call(func_name, args, tool_output)
-                    else:
-                        tool_output = f"Error: Tool {func_name} not found."
-                        
-                    print(f"   -> Result: {tool_output[:50]}...")
-                    
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": tool_use_id,
-                        "content": tool_output
-                    })
-            
-            if has_tool_use:
-                # Add tool results to conversation and loop
-                self.messages.append({
-                    "role": "user",
-                    "content": tool_results
-                })
-                # Loop continues
-            else:
-                # Done
+            self._record_usage(response.usage)
+            tool_uses = self._record_response(response.content)
+            if not tool_uses:
                 self.history.append({"role": "model", "parts": [final_text]})
-                class MockResponse:
-                    def __init__(self, text):
-                        self.text = text
-                return MockResponse(final_text)
+                return
+            self._record_tool_results(tool_uses, self.tool_executor.run([(b.name, b.input) for b in tool_uses]))
+
+        yield ("\n\n" if final_text else "") + "Max turns reached."
+
+    async def send_message_stream_async(self, content_parts: List[Any], max_turns=10, timeout=None):
+        """send_message_stream on the event loop (AsyncAnthropic), for the async engine."""
+        self._add_user_turn(content_parts)
+        final_text = ""
+
+        for current_turn in range(1, max_turns + 1):
+            await rate_limiter.admit_async("claude", self.model, self._estimate_tokens())
+            print(f"📡 Sending to Claude ({self.model})... [Turn {current_turn}]")
+            try:
+                async with self.async_client.messages.stream(**self._request(timeout)) as stream:
+                    async for text in stream.text_stream:
+                        final_text += text
+                        yield text
+                    response = await stream.get_final_message()
+            except Exception as e:
+                if self.raise_errors or is_rate_limit_error(e):
+                    raise
+                yield f"Claude Error: {e}"
+                return
 
-        return type('MockResponse', (object,), {"text": "Max turns reached."})()
+            self._record_usage(response.usage)
+            tool_uses = self._record_response(response.content)
+            if not tool_uses:
+                self.history.append({"role": "model", "parts": [final_text]})
+                return
+            results = await self.tool_executor.run_async([(b.name, b.input) for b in tool_uses])
+            self._record_tool_results(tool_uses, results)
+
+        yield ("\n\n" if final_text else "") + "Max turns reached."
 
     def get_history(self):
         return self.history
@@ -352,7 +874,8 @@ class GoogleChatSession:
         timeout_config = httpx.Timeout(120.0, connect=60.0)
 
         # Store tool map for manual execution
-        self.tool_map = {f.__name__: f for f in tools}
+        self.tool_executor = ToolExecutor(tools)
+        self.tool_map = self.tool_executor.tool_map
 
         if vertex_project:
             print(f"☁️ Connecting to Vertex AI (Project: {vertex_project}, Loc: {vertex_location})")
@@ -374,33 +897,82 @@ class GoogleChatSession:
                 )
             )
             
-        # Simplify tool handling: Pass functions directly to the SDK
-        # The new Google GenAI SDK can handle python functions natively
+        # The SDK builds the declarations from the python functions; its own
+        # automatic calling is off so function calls reach the tool executor
         
+        self.model_name = model_name
+        self.tools = tools
+        self.chat_config = types.GenerateContentConfig(
+            tools=tools, # Pass raw tools list, not schemas
+            system_instruction=system_instruction,
+            tool_config={"function_calling_config": {"mode": "AUTO"}},
+            automatic_function_calling=types.AutomaticFunctionCallingConfig(disable=True)
+        )
         self.chat = self.client.chats.create(
             model=model_name,
-            history=history,
-            config=types.GenerateContentConfig(
-                tools=tools, # Pass raw tools list, not schemas
-                system_instruction=system_instruction,
-                tool_config={"function_calling_config": {"mode": "AUTO"}}
-            )
+            history=to_google_history(history),
+            config=self.chat_config
         )
+        # The async chat is created on first use from whichever chat holds the latest history
+        self._achat = None
+        self._current = self.chat
+
+    def _sync_chat(self):
+        if self._current is not self.chat:
+            self.chat = self.client.chats.create(
+                model=self.model_name, history=self._current.get_history(curated=True), config=self.chat_config
+            )
+            self._current = self.chat
+        return self.chat
+
+    def _async_chat(self):
+        if self._current is not self._achat:
+            self._achat = self.client.aio.chats.create(
+                model=self.model_name, history=self._current.get_history(curated=True), config=self.chat_config
+            )
+            self._current = self._achat
+        return self._achat
         
-    def send_message(self, content_parts: List[Any], timeout: int = None) -> Any:
+    def _estimate_tokens(self, current_input: list) -> int:
+        chars = len(str(self.chat_config.system_instruction or ""))
+        for content in self._current._curated_history:
+            chars += sum(len(part.text or "") for part in (content.parts or []))
+        chars += sum(len(part) if isinstance(part, str) else 0 for part in current_input)
+        return rate_limiter.estimate_tokens(chars)
+
+    def _request_config(self, timeout: int = None):
+        """
+        Config for the requests of one message: the cached system instruction
+        and tools when there is a cache, else the session's own config.
+        (A per-request config replaces the chat's, it is not merged into it.)
+        """
         from google.genai import types
         import httpx
-        
-        config = None
-        if timeout:
-            t_val = float(timeout)
-            t_conf = httpx.Timeout(t_val, connect=60.0)
-            config = types.GenerateContentConfig(
-                http_options=types.HttpOptions(
-                    timeout=None,
-                    client_args={"timeout": t_conf}
-                )
-            )
+
+        cache_name = gemini_cached_content(
+            self.client, self.model_name, self.chat_config.system_instruction, self.tools, self.chat_config.tool_config
+        )
+        if cache_name:
+            # Tools then come back as function calls, which the loops below run
+            config = types.GenerateContentConfig(cached_content=cache_name)
+        else:
+            config = self.chat_config
+        if not timeout:
+            return config
+        t_val = float(timeout)
+        t_conf = httpx.Timeout(t_val, connect=60.0)
+        return config.model_copy(update={"http_options": types.HttpOptions(
+            timeout=None,
+            client_args={"timeout": t_conf}
+        )})
+
+    def _record_usage(self, usage):
+        if usage is None or not usage.prompt_token_count:
+            return
+        record_cache_usage("google", usage.cached_content_token_count or 0, usage.prompt_token_count)
+
+    def send_message(self, content_parts: List[Any], timeout: int = None) -> Any:
+        config = self._request_config(timeout)
 
         final_text = ""
         current_input = content_parts
@@ -409,7 +981,10 @@ class GoogleChatSession:
         
         while turn < max_turns:
             turn += 1
-            response = self.chat.send_message(current_input, config=config)
+            chat = self._sync_chat()
+            rate_limiter.admit("google", self.model_name, self._estimate_tokens(current_input))
+            response = chat.send_message(current_input, config=config)
+            self._record_usage(response.usage_metadata)
             
             # 1. Accumulate text
             if response.text:
@@ -430,48 +1005,108 @@ class GoogleChatSession:
                 # No more tools, we're done
                 return MockResponse(final_text)
 
-            # 3. Execute tools
-            tool_responses = []
-            for fc in tool_calls:
-                func_name = fc.name
-                args = fc.args or {}
-                print(f"🛠️ [Google] Tool Call Attempt: {func_name}({args})")
-                
-                if func_name in self.tool_map:
-                    import dm_utils
-                    try:
-                        func = self.tool_map[func_name]
-                        result = func(**args)
-                        print(f"   -> Tool Execution Success: {str(result)[:100]}...")
-                        tool_output = result
-                        dm_utils.log_system_tool_call(func_name, args, str(tool_output))
-                    except Exception as e:
-                        print(f"   -> Tool Execution Error: {e}")
-                        tool_output = {"error": f"Error executing {func_name}: {e}"}
-                        dm_utils.log_system_tool_call(func_name, args, str(tool_output))
-                else:
-                    print(f"   -> Tool Not Found: {func_name}")
-                    tool_output = {"error": f"Error: Tool {func_name} not found."}
-                
-                # Format for Gemini Part
-                # Ensure it's a dict for function_response
-                if not isinstance(tool_output, dict):
-                    tool_output = {"result": str(tool_output)}
-                    
-                tool_responses.append(types.Part.from_function_response(
-                    name=func_name,
-                    response=tool_output
-                ))
-            
-            # 4. Prepare next turn
-            current_input = tool_responses
+            # 3. Execute tools, 4. Prepare next turn
+            current_input = self._run_tools(tool_calls)
             
         return MockResponse(final_text + "\n\n[Error: Max tool turns reached]")
+
+    def send_message_stream(self, content_parts: List[Any], timeout: int = None):
+        """Yields the reply as text deltas (Gemini send_message_stream), running tool calls between model turns."""
+        config = self._request_config(timeout)
+
+        current_input = content_parts
+        emitted = False
+        max_turns = 10
+        
+        for _turn in range(max_turns):
+            tool_calls = []
+            turn_has_text = False
+            usage = None
+            chat = self._sync_chat()
+            rate_limiter.admit("google", self.model_name, self._estimate_tokens(current_input))
+            for chunk in chat.send_message_stream(current_input, config=config):
+                usage = chunk.usage_metadata or usage
+                if chunk.text:
+                    if emitted and not turn_has_text:
+                        yield "\n\n"
+                    turn_has_text = emitted = True
+                    yield chunk.text
+                if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
+                    for part in chunk.candidates[0].content.parts:
+                        if part.function_call:
+                            tool_calls.append(part.function_call)
+            self._record_usage(usage)
+
+            if not tool_calls:
+                return
+            current_input = self._run_tools(tool_calls)
+
+        yield "\n\n[Error: Max tool turns reached]"
+
+    async def send_message_async(self, content_parts: List[Any], timeout: int = None) -> Any:
+        return MockResponse("".join([d async for d in self.send_message_stream_async(content_parts, timeout)]))
+
+    async def send_message_stream_async(self, content_parts: List[Any], timeout: int = None):
+        """send_message_stream on the event loop (client.aio), for the async engine."""
+        # Creating or extending the prompt cache is a blocking call
+        config = await asyncio.to_thread(self._request_config, timeout)
+        chat = self._async_chat()
+
+        current_input = content_parts
+        emitted = False
+        max_turns = 10
+
+        for _turn in range(max_turns):
+            tool_calls = []
+            turn_has_text = False
+            usage = None
+            await rate_limiter.admit_async("google", self.model_name, self._estimate_tokens(current_input))
+            async for chunk in await chat.send_message_stream(current_input, config=config):
+                usage = chunk.usage_metadata or usage
+                if chunk.text:
+                    if emitted and not turn_has_text:
+                        yield "\n\n"
+                    turn_has_text = emitted = True
+                    yield chunk.text
+                if chunk.candidates and chunk.candidates[0].content and chunk.candidates[0].content.parts:
+                    for part in chunk.candidates[0].content.parts:
+                        if part.function_call:
+                            tool_calls.append(part.function_call)
+            self._record_usage(usage)
+
+            if not tool_calls:
+                return
+            results = await self.tool_executor.run_async([(fc.name, fc.args or {}) for fc in tool_calls])
+            current_input = self._tool_responses(results)
+
+        yield "\n\n[Error: Max tool turns reached]"
+
+    def _run_tools(self, tool_calls: list) -> list:
+        """Executes the model's function calls and returns the function response parts."""
+        return self._tool_responses(self.tool_executor.run([(fc.name, fc.args or {}) for fc in tool_calls]))
+
+    def _tool_responses(self, results: List[ToolResult]) -> list:
+        from google.genai import types
+
+        tool_responses = []
+        for result in results:
+            # Format for Gemini Part
+            # Ensure it's a dict for function_response
+            if result.error:
+                tool_output = {"error": result.error}
+            elif isinstance(result.output, dict):
+                tool_output = result.output
+            else:
+                tool_output = {"result": str(result.output)}
+                
+            tool_responses.append(types.Part.from_function_response(
+                name=result.name,
+                response=tool_output
+            ))
+        return tool_responses
     
     def get_history(self):
-        return self.chat._curated_history
-
-        return self.chat._curated_history
+        return self._current._curated_history
 
 def resolve_model_config():
     """
@@ -497,34 +1132,366 @@ def resolve_model_config():
     # Priority 4: Local
     return "local", os.environ.get("LOCAL_MODEL_NAME", DEFAULT_LOCAL_MODEL)
 
+def provider_available(provider: str) -> bool:
+    """Whether credentials/configuration for a provider are present."""
+    if provider == "google":
+        return bool(os.environ.get("GOOGLE_API_KEY") or os.environ.get("GOOGLE_VERTEX_PROJECT"))
+    if provider == "claude":
+        return bool(os.environ.get("ANTHROPIC_API_KEY"))
+    if provider == "local":
+        return bool(os.environ.get("OLLAMA_HOST") or os.environ.get("LOCAL_MODEL_NAME"))
+    return False
+
+def provider_model(provider: str) -> str:
+    if provider == "google":
+        return os.environ.get("MODEL_NAME", "gemini-1.5-flash")
+    if provider == "claude":
+        return os.environ.get("CLAUDE_MODEL_NAME", DEFAULT_CLAUDE_MODEL)
+    return os.environ.get("LOCAL_MODEL_NAME", DEFAULT_LOCAL_MODEL)
+
+def create_session(provider: str, history: List[Dict], tools: List[Any], system_instruction: str):
+    """Opens a chat session on one provider."""
+    model = provider_model(provider)
+
+    if provider == "claude":
+        print(f"🧠 Switching to Claude: {model}")
+        return ClaudeChatSession(os.environ.get("ANTHROPIC_API_KEY"), model, history, tools, system_instruction)
+        
+    if provider == "google":
+        vertex_loc = os.environ.get("GOOGLE_VERTEX_LOCATION", "us-central1")
+        return GoogleChatSession(os.environ.get("GOOGLE_API_KEY"), model, history, tools, system_instruction, os.environ.get("GOOGLE_VERTEX_PROJECT"), vertex_loc)
+        
+    if provider == "local":
+        print(f"🔌 Switching to Local LLM: {model}")
+        return LocalChatSession(model, history, system_instruction, tools)
+
+    raise ValueError("Unknown provider configuration")
+
 def get_chat_session(model_name: str, history: List[Dict], tools: List[Any], system_instruction: str):
     """
     Factory to return either a Google Chat, Claude Chat, or a Local Chat.
     Uses resolve_model_config for defaults, but allows overrides if model_name is passed explicitly 
     (though currently model_name arg is often just the default env var value).
+    When other providers are configured too, the session fails over to them
+    (see FailoverChatSession).
     """
-    provider, config_model = resolve_model_config()
+    provider, _config_model = resolve_model_config()
     
     # If the passed model_name matches the 'gemini-1.5-flash' default we setup in other files, 
     # we prefer the resolved config_model which might be a Local/Claude model.
     # To avoid confusion, let's rely on the provider logic.
-    
-    google_key = os.environ.get("GOOGLE_API_KEY")
-    anthropic_key = os.environ.get("ANTHROPIC_API_KEY")
-    vertex_project = os.environ.get("GOOGLE_VERTEX_PROJECT")
-    
-    if provider == "claude":
-        print(f"🧠 Switching to Claude: {config_model}")
-        return ClaudeChatSession(anthropic_key, config_model, history, tools, system_instruction)
-        
-    if provider == "google":
-        vertex_loc = os.environ.get("GOOGLE_VERTEX_LOCATION", "us-central1")
-        # Use the config_model as authoritative source of truth for the name
-        return GoogleChatSession(google_key, config_model, history, tools, system_instruction, vertex_project, vertex_loc)
-        
-    if provider == "local":
-        print(f"🔌 Switching to Local LLM: {config_model}")
-        return LocalChatSession(config_model, history, system_instruction, tools)
+    chain = failover_chain(provider)
+    if len(chain) > 1:
+        return FailoverChatSession(chain, history, tools, system_instruction)
+    return create_session(provider, history, tools, system_instruction)
 
-    raise ValueError("Unknown provider configuration")
+# --- Provider Failover ---
+# A turn that fails on one provider (503, timeout, quota) continues on the next
+# configured provider within the same turn, with the history translated to its
+# format, instead of burning the engine's retries on the same provider.
+# Optionally, a streaming turn whose first token is slower than the provider's
+# recent p95 is hedged on the next provider; the first to respond wins.
+
+# Set DM_FAILOVER=0 to stay on the configured provider
+FAILOVER_ENABLED = os.environ.get("DM_FAILOVER", "1") != "0"
+
+# Failover order after the configured provider (unconfigured ones are skipped)
+FAILOVER_ORDER = [p.strip() for p in os.environ.get("DM_FAILOVER_PROVIDERS", "google,claude,local").split(",") if p.strip()]
+
+# Seconds a provider is skipped after it failed a turn
+FAILBACK_AFTER = float(os.environ.get("DM_FAILBACK_SECONDS", "60"))
+
+# Set DM_HEDGE_REQUESTS=1 to hedge slow streaming turns (can double token spend)
+HEDGE_REQUESTS = os.environ.get("DM_HEDGE_REQUESTS", "0") == "1"
+
+# First-token latencies kept per provider, and how many are needed before hedging
+LATENCY_SAMPLES = 100
+HEDGE_MIN_SAMPLES = 20
+
+# Never hedge sooner than this, whatever the p95
+HEDGE_FLOOR_SECONDS = float(os.environ.get("DM_HEDGE_FLOOR_SECONDS", "2"))
+
+FAILOVER_NOTE = "[System Note: The previous model failed mid-turn after these tool calls, which already took effect:\n{calls}\nContinue this turn from their results without calling them again.]"
+
+_latencies = {}  # provider -> recent first-token latencies (seconds)
+_failures = {}   # provider -> monotonic time of its last failed turn
+_router_lock = threading.Lock()
+
+def failover_note(results: List[ToolResult]) -> str:
+    """Tells the next provider which tools the failed one already ran this turn."""
+    calls = "\n".join(
+        f"- {r.name}({json.dumps(r.args, default=str)}) -> {r.text[:TOOL_RESULT_MAX_CHARS]}" for r in results
+    )
+    return FAILOVER_NOTE.format(calls=calls)
+
+def failover_chain(primary: str) -> List[str]:
+    """The configured provider followed by the available failover providers."""
+    if not FAILOVER_ENABLED:
+        return [primary]
+    return [primary] + [p for p in FAILOVER_ORDER if p != primary and provider_available(p)]
+
+def record_first_token(provider: str, seconds: float):
+    with _router_lock:
+        samples = _latencies.setdefault(provider, [])
+        samples.append(seconds)
+        del samples[:-LATENCY_SAMPLES]
+
+def hedge_delay(provider: str) -> Optional[float]:
+    """Seconds to wait for a first token before hedging, or None to not hedge."""
+    if not HEDGE_REQUESTS:
+        return None
+    with _router_lock:
+        samples = sorted(_latencies.get(provider, []))
+    if len(samples) < HEDGE_MIN_SAMPLES:
+        return None
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return max(p95, HEDGE_FLOOR_SECONDS)
+
+def mark_failed(provider: str):
+    with _router_lock:
+        _failures[provider] = time.monotonic()
+
+def recently_failed(provider: str) -> bool:
+    with _router_lock:
+        failed_at = _failures.get(provider)
+    return failed_at is not None and time.monotonic() - failed_at < FAILBACK_AFTER
+
+class _StreamAttempt:
+    """One provider's run of a turn, pumped into a queue by its own task."""
+    def __init__(self, session, index: int, content_parts: List[Any], timeout, claim):
+        self.session = session
+        self.index = index
+        # History length before the turn (the session adds the user message itself)
+        self.start = len(session.get_history())
+        self.started = time.monotonic()
+        self.queue = asyncio.Queue()
+        session.tool_executor.claim = lambda: claim(self)
+        self.task = asyncio.ensure_future(self._pump(content_parts, timeout))
+
+    async def _pump(self, content_parts, timeout):
+        try:
+            async for delta in self.session.send_message_stream_async(content_parts, timeout=timeout):
+                if delta:
+                    await self.queue.put(("delta", delta))
+            await self.queue.put(("done", None))
+        except Exception as e:
+            await self.queue.put(("error", e))
+
+    def stop(self):
+        self.session.tool_executor.claim = lambda: True
+        if not self.task.done():
+            self.task.cancel()
+
+class FailoverChatSession:
+    """
+    A chat session that moves across providers (see failover_chain) and
+    exposes the same interface as the provider sessions. get_history() is the
+    history it was opened with plus the turns answered since, whichever
+    provider answered them.
+    """
+    def __init__(self, providers: List[str], history: List[Dict], tools: List[Any], system_instruction: str):
+        self.providers = providers
+        self.tools = tools
+        self.system_instruction = system_instruction
+        self._winner = None
+        self._attempts = []
+        # Tool calls already run in the current turn, by providers that then failed
+        self._turn_tools: List[ToolResult] = []
+        index = self._preferred_index()
+        while True:
+            try:
+                self._use(index, list(history or []))
+                break
+            except Exception as e:
+                if index + 1 >= len(self.providers):
+                    raise
+                print(f"⚠️ [Failover] Could not open {self.providers[index]}: {e}")
+                index += 1
+
+    @property
+    def provider(self) -> str:
+        return self.providers[self.index]
+
+    @property
+    def tool_executor(self):
+        return self.session.tool_executor
+
+    def _preferred_index(self) -> int:
+        for index, provider in enumerate(self.providers):
+            if not recently_failed(provider):
+                return index
+        return 0
+
+    def _has_next(self) -> bool:
+        return self.index + 1 < len(self.providers)
+
+    def _open(self, index: int, history: list):
+        session = create_session(self.providers[index], history, self.tools, self.system_instruction)
+        # Errors must reach us to fail over
+        session.raise_errors = True
+        return session
+
+    def _use(self, index: int, history: list, session=None, start: int = None):
+        """Makes session (or a new one on providers[index] opened from history) the active one."""
+        self.session = session or self._open(index, history)
+        self.index = index
+        self._prefix = list(history)
+        self._start = len(self.session.get_history()) if start is None else start
+
+    def get_history(self):
+        return self._prefix + list(self.session.get_history())[self._start:]
+
+    def _fail_back(self):
+        """Returns to a preferred provider once its failure has cooled down."""
+        preferred = self._preferred_index()
+        if preferred >= self.index:
+            return
+        try:
+            self._use(preferred, self.get_history())
+            print(f"🔁 [Failover] Back on {self.provider}")
+        except Exception as e:
+            print(f"⚠️ [Failover] Could not return to {self.providers[preferred]}: {e}")
+
+    def _begin_turn(self) -> list:
+        """Starts a turn; returns the history before it."""
+        self._fail_back()
+        self._turn_tools = []
+        self.session.tool_executor.completed.clear()
+        return self.get_history()
+
+    def _collect_tools(self, session):
+        """Takes over the tool calls session ran this turn."""
+        self._turn_tools.extend(session.tool_executor.completed)
+        session.tool_executor.completed.clear()
+
+    def _fail_over(self, error: Exception, turn_prefix: list, content_parts: List[Any]) -> List[Any]:
+        """
+        Moves the current turn to the next provider, opened from the history
+        before the turn. Returns what to send it: the player's message, plus a
+        note with the results of the tools already run this turn so they are
+        not run (and their side effects applied) twice.
+        """
+        failed = self.provider
+        mark_failed(failed)
+        self._collect_tools(self.session)
+        for index in range(self.index + 1, len(self.providers)):
+            try:
+                self._use(index, turn_prefix)
+                break
+            except Exception as e:
+                print(f"⚠️ [Failover] Could not open {self.providers[index]}: {e}")
+        else:
+            raise error
+        print(f"🔀 [Failover] {failed} failed ({error}); continuing the turn on {self.provider}")
+        if not self._turn_tools:
+            return content_parts
+        return list(content_parts) + [failover_note(self._turn_tools)]
+
+    def send_message(self, content_parts: List[Any], timeout: int = None) -> Any:
+        return MockResponse("".join(self.send_message_stream(content_parts, timeout)))
+
+    async def send_message_async(self, content_parts: List[Any], timeout: int = None) -> Any:
+        return MockResponse("".join([d async for d in self.send_message_stream_async(content_parts, timeout)]))
+
+    def send_message_stream(self, content_parts: List[Any], timeout: int = None):
+        """The active provider's stream; fails over while nothing was yielded yet."""
+        turn_prefix = self._begin_turn()
+        original = content_parts
+        while True:
+            emitted = False
+            started = time.monotonic()
+            try:
+                for delta in self.session.send_message_stream(content_parts, timeout=timeout):
+                    if delta and not emitted:
+                        record_first_token(self.provider, time.monotonic() - started)
+                        emitted = True
+                    yield delta
+                return
+            except Exception as e:
+                if emitted or not self._has_next():
+                    raise
+                content_parts = self._fail_over(e, turn_prefix, original)
+
+    def _claim(self, attempt: _StreamAttempt) -> bool:
+        """The first attempt to answer (text or tool calls) wins the turn."""
+        if self._winner is None:
+            self._winner = attempt
+            attempt.queue.put_nowait(("progress", None))
+        return self._winner is attempt
+
+    async def _race(self, content_parts: List[Any], timeout, turn_prefix: list):
+        """
+        Runs the turn on the active provider, hedged on the next one if its first
+        token is late. Returns (attempt, first_event, attempts); attempt is the
+        winner, or None when every attempt failed (first_event is then the error).
+        """
+        self._winner = None
+        attempts = [_StreamAttempt(self.session, self.index, content_parts, timeout, self._claim)]
+        # Every attempt of this race, including failed ones (their tool calls may have run)
+        self._attempts = list(attempts)
+        delay = hedge_delay(self.provider) if self._has_next() else None
+        error = None
+        while attempts:
+            gets = {asyncio.ensure_future(a.queue.get()): a for a in attempts}
+            done, pending = await asyncio.wait(gets, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+            for get in pending:
+                get.cancel()
+            if not done:
+                # Late first token: hedge once on the next provider
+                delay = None
+                try:
+                    session = self._open(self.index + 1, turn_prefix)
+                except Exception as e:
+                    print(f"⚠️ [Failover] Could not hedge on {self.providers[self.index + 1]}: {e}")
+                    continue
+                print(f"🪁 [Failover] {self.provider} is slow; hedging on {self.providers[self.index + 1]}")
+                attempts.append(_StreamAttempt(session, self.index + 1, content_parts, timeout, self._claim))
+                self._attempts.append(attempts[-1])
+                continue
+            for get in done:
+                attempt = gets[get]
+                kind, value = get.result()
+                if kind == "error":
+                    attempts.remove(attempt)
+                    error = value
+                    if attempt.index == self.index:
+                        mark_failed(self.provider)
+                elif self._winner is None or self._winner is attempt:
+                    self._winner = attempt
+                    return attempt, (kind, value), attempts
+        return None, ("error", error), attempts
+
+    async def send_message_stream_async(self, content_parts: List[Any], timeout: int = None):
+        """send_message_stream for the async engine, with optional hedging."""
+        turn_prefix = self._begin_turn()
+        original = content_parts
+        while True:
+            winner, (kind, value), attempts = await self._race(content_parts, timeout, turn_prefix)
+            try:
+                for attempt in attempts:
+                    if attempt is not winner:
+                        attempt.stop()
+                if winner is not None and winner.index != self.index:
+                    print(f"🪁 [Failover] {self.providers[winner.index]} answered first")
+                    self._use(winner.index, turn_prefix, session=winner.session, start=winner.start)
+
+                emitted = False
+                while kind != "error":
+                    if kind == "delta":
+                        if not emitted:
+                            record_first_token(self.provider, time.monotonic() - winner.started)
+                            emitted = True
+                        yield value
+                    elif kind == "done":
+                        return
+                    kind, value = await winner.queue.get()
+            finally:
+                if winner is not None:
+                    winner.stop()
 
+            if emitted or not self._has_next():
+                raise value
+            for attempt in self._attempts:
+                if attempt.session is not self.session:
+                    self._collect_tools(attempt.session)
+            content_parts = self._fail_over(value, turn_prefix, original)
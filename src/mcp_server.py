@@ -50,6 +50,8 @@ def start_new_session(summary_of_previous: str) -> str:
     with open(os.path.join(next_session_dir, "secrets_log.md"), "w") as f:
         f.write(f"# DM Secrets: {next_session_name}\n\n")
         
+    dm_utils.event_log.append_sections(f"## Previously on...\n{summary_of_previous}\n", next_session_dir, source="new_session")
+        
     # 4. Update pointer
     with open(current_session_file, "w") as f:
         f.write(next_session_name)
@@ -84,7 +86,8 @@ def request_player_roll(check_type: str, dc: int, consequence: str) -> str:
     session_log, secrets_log = get_log_paths()
     
     log_message = f"**WAITING FOR PLAYER** | Type: {check_type} | DC: {dc} | Fail Consequence: {consequence}"
-    dm_utils.log_to_file(secrets_log, log_message)
+    dm_utils.log_to_file(secrets_log, log_message, event_type="secret", secret=True,
+                         kind="dc", check_type=check_type, dc=dc)
     
     response = "Logged DC and Consequence. You may now ask the player to roll."
     
@@ -117,7 +120,8 @@ def roll_dice(expression: str, purpose: str, is_secret: bool = False) -> str:
     log_type = "SECRET ROLL" if is_secret else "PUBLIC ROLL"
     
     log_message = f"**{log_type}** | Purpose: {purpose} | Result: {result['total']} ({result['rolls']} {result['modifier']})"
-    dm_utils.log_to_file(log_file, log_message)
+    dm_utils.log_to_file(log_file, log_message, event_type="roll", secret=is_secret,
+                         expression=expression, purpose=purpose, total=result['total'])
     
     base_response = f"Rolled {expression} for {purpose}. Result: {result['total']} (Details: {result['rolls']} + {result['modifier']})"
     
@@ -153,7 +157,7 @@ def log_event(message: str, is_secret: bool = False) -> str:
     log_file = secrets_log if is_secret else session_log
     prefix = "[SECRET]" if is_secret else "[PUBLIC]"
     
-    dm_utils.log_to_file(log_file, f"{prefix} {message}")
+    dm_utils.log_to_file(log_file, f"{prefix} {message}", event_type="secret" if is_secret else "narration", secret=is_secret)
     
     base_resp = f"Logged to {'secrets' if is_secret else 'public'} log."
     
@@ -304,6 +308,28 @@ def track_combat_change(character_name: str, hp_change: int = 0, notes_update: s
     import common_tools
     return common_tools.track_combat_change(character_name, hp_change, notes_update)
 
+@mcp.tool()
+def track_combat_changes(changes: str) -> str:
+    """
+    Applies HP/condition changes to several combatants at once (e.g. an area spell).
+    changes: JSON string of list of dicts, e.g. '[{"name": "Goblin 1", "hp_change": -8}, {"name": "Goblin 2", "hp_change": -8, "conditions": ["Prone"]}]'
+    """
+    import json
+    import common_tools
+    try:
+        data = json.loads(changes)
+    except Exception as e:
+        return f"Error parsing changes JSON: {e}"
+    return common_tools.track_combat_changes(data)
+
+@mcp.tool()
+def end_combat() -> str:
+    """
+    Ends the current combat encounter and clears the combat tracker.
+    """
+    import common_tools
+    return common_tools.end_combat()
+
 @mcp.tool()
 def undo_last_message() -> str:
     """
@@ -325,6 +351,19 @@ def manage_inventory(action: str, item_name: str, quantity: int = 1, weight: flo
     """
     return dm_utils.manage_inventory(action, item_name, quantity, weight, character_name)
 
+@mcp.tool()
+def manage_inventory_bulk(operations: str) -> str:
+    """
+    Applies many inventory changes in a single transaction (e.g. splitting loot).
+    operations: JSON string of list of dicts, e.g. '[{"character_name": "Vax", "item_name": "Rope", "quantity": 1, "weight": 10, "action": "add"}]'
+    """
+    import json
+    try:
+        data = json.loads(operations)
+    except Exception as e:
+        return f"Error parsing operations JSON: {e}"
+    return dm_utils.manage_inventory_bulk(data)
+
 @mcp.tool()
 def lookup_item_details(item_name: str) -> str:
     """
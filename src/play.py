@@ -57,7 +57,9 @@ tools_list = [
     common_tools.submit_character_sheet,
     common_tools.generate_name,
     common_tools.initialize_combat,
-    common_tools.track_combat_change
+    common_tools.track_combat_change,
+    common_tools.track_combat_changes,
+    common_tools.end_combat
 ]
 
 # Colors
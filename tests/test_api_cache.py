@@ -0,0 +1,118 @@
+import sys
+import os
+import json
+import pickle
+import threading
+from datetime import datetime
+
+# Add project root to python path so the src.dnd package resolves
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dnd.core.cache import APICache
+
+def test_sqlite_backend_persists_and_loads_lazily(tmp_path):
+    cache = APICache(cache_dir=str(tmp_path))
+    with cache.batch():
+        for i in range(50):
+            cache.set(f"dnd_item_spells_{i}", {"index": str(i)})
+
+    reopened = APICache(cache_dir=str(tmp_path))
+    assert len(reopened) == 50
+    assert reopened.cache == {}  # Nothing unpickled until requested
+    assert reopened.get("dnd_item_spells_7") == {"index": "7"}
+    assert list(reopened.cache) == ["dnd_item_spells_7"]
+
+    reopened.clear()
+    assert len(APICache(cache_dir=str(tmp_path))) == 0
+
+def test_failed_batch_is_not_committed(tmp_path):
+    cache = APICache(cache_dir=str(tmp_path))
+    cache.set("kept", 1)
+    other = threading.Thread(target=cache.set, args=("other_thread", 3))
+    try:
+        with cache.batch():
+            cache.set("lost", 2)
+            cache.set("kept", 5)
+            # Another thread's write waits for the batch instead of joining it
+            other.start()
+            other.join(timeout=0.2)
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    other.join()
+
+    # Memory agrees with disk after the rollback
+    assert cache.get("lost") is None
+    assert cache.get("kept") == 1
+    reopened = APICache(cache_dir=str(tmp_path))
+    assert reopened.get("kept") == 1
+    assert reopened.get("lost") is None
+    assert reopened.get("other_thread") == 3
+
+def test_imports_legacy_pickle_cache(tmp_path):
+    with open(tmp_path / "dnd_items_spells.pickle", "wb") as f:
+        pickle.dump({"count": 0}, f)
+    with open(tmp_path / "index.json", "w") as f:
+        json.dump({"dnd_items_spells": datetime.now().isoformat()}, f)
+
+    cache = APICache(cache_dir=str(tmp_path))
+    assert cache.get("dnd_items_spells") == {"count": 0}
+    assert not os.path.exists(tmp_path / "index.json")
+    assert not os.path.exists(tmp_path / "dnd_items_spells.pickle")
+
+def test_lru_eviction_and_stats(tmp_path):
+    cache = APICache(persistent=False, max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    stats = cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+
+    # Persistent entries evicted from memory are reloaded from disk
+    disk = APICache(cache_dir=str(tmp_path), max_entries=1)
+    disk.set("a", 1)
+    disk.set("b", 2)
+    assert list(disk.cache) == ["b"]
+    assert disk.get("a") == 1
+    assert disk.stats()["disk_loads"] == 1
+
+def test_sweep_removes_expired_entries(tmp_path):
+    cache = APICache(ttl_hours=0, cache_dir=str(tmp_path))
+    cache.set("a", 1)
+    assert cache.sweep_expired() == 1
+    assert len(cache) == 0
+    assert len(APICache(cache_dir=str(tmp_path))) == 0
+
+def test_sweep_due_inside_a_batch_does_not_commit_it(tmp_path):
+    cache = APICache(ttl_hours=0, cache_dir=str(tmp_path), sweep_interval=0)
+    cache.set("expired", 1)
+    try:
+        with cache.batch():
+            # Kept on disk by the sweep (it can be revalidated), but not committed
+            cache.set("revalidatable", 2, validators={"ETag": "x"})
+            cache.get("expired")  # a sweep is due on every call
+            raise RuntimeError("boom")
+    except RuntimeError:
+        pass
+    assert APICache(cache_dir=str(tmp_path)).get_stale("revalidatable") is None
+
+def test_generations_are_tracked_per_category():
+    cache = APICache(persistent=False)
+    cache.set("dnd_items_spells", {"items": []})
+    cache.set("dnd_item_monsters_goblin", {"name": "Goblin"})
+    spells, monsters = cache.category_generation("spells"), cache.category_generation("monsters")
+
+    # Refreshing one entry only invalidates its own category
+    cache.set("dnd_item_monsters_goblin", {"name": "Goblin", "hit_points": 7})
+    cache.set("unrelated", 1)
+    cache.set("unrelated", 2)
+    assert cache.category_generation("spells") == spells
+    assert cache.category_generation("monsters") != monsters
+
+    cache.clear()
+    assert cache.category_generation("spells") != spells
@@ -0,0 +1,89 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import asyncio
+import json
+import time
+
+import dm_utils
+import llm_bridge
+from core import campaign, engine as engine_module, state_manager
+from core.engine import GameEngine
+
+
+class FakeAsyncSession:
+    def __init__(self, history):
+        self.history = list(history)
+
+    async def send_message_stream_async(self, content, timeout=None):
+        self.history.append({"role": "user", "parts": [content[0]]})
+        for delta in ["The torch ", "flickers."]:
+            await asyncio.sleep(0.1)
+            yield delta
+        self.history.append({"role": "model", "parts": [f"The torch flickers ({dm_utils.active_campaign_ctx.get()})."]})
+
+
+def test_turns_for_different_campaigns_share_one_event_loop(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    monkeypatch.setattr(dm_utils, "get_campaign_for_channel", lambda platform, channel: f"camp_{channel}")
+    monkeypatch.setattr(engine_module, "is_allowed", lambda **kwargs: True)
+    monkeypatch.setattr(state_manager.chat_indexer, "submit", lambda *args: None)
+    monkeypatch.setattr(llm_bridge, "get_chat_session",
+                        lambda model_name, history, tools, system_instruction: FakeAsyncSession(history))
+    engine = GameEngine([])
+
+    async def turn(channel):
+        return [d async for d in engine.process_message_stream_async("U1", "Vex", "I light a torch", "slack", channel_id=channel)]
+
+    async def both():
+        return await asyncio.gather(turn("a"), turn("b"))
+
+    started = time.monotonic()
+    replies = asyncio.run(both())
+    # The model calls interleave instead of running back to back
+    assert time.monotonic() - started < 0.4
+    assert replies == [["The torch ", "flickers."]] * 2
+
+    for name in ("camp_a", "camp_b"):
+        token = dm_utils.set_active_campaign(name)
+        try:
+            with open(dm_utils.get_chat_history_path()) as f:
+                saved = json.load(f)
+        finally:
+            dm_utils.active_campaign_ctx.reset(token)
+        assert saved[-1] == {"role": "model", "parts": [f"The torch flickers ({name})."]}
+
+
+def test_run_async_keeps_side_effect_calls_ordered(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    events = []
+
+    @llm_bridge.declare_tool(side_effects=False)
+    def lookup_monster(monster_name: str) -> str:
+        time.sleep(0.2)
+        events.append(f"lookup {monster_name}")
+        return f"{monster_name} ({dm_utils.active_campaign_ctx.get()})"
+
+    def manage_inventory(item_name: str) -> str:
+        events.append(f"mutate {item_name}")
+        return "ok"
+
+    executor = llm_bridge.ToolExecutor([lookup_monster, manage_inventory])
+    calls = [("lookup_monster", {"monster_name": n}) for n in ("Goblin", "Orc", "Troll")]
+    calls.append(("manage_inventory", {"item_name": "Rope"}))
+
+    async def run():
+        token = dm_utils.set_active_campaign("zeta")
+        try:
+            return await executor.run_async(calls)
+        finally:
+            dm_utils.active_campaign_ctx.reset(token)
+
+    started = time.monotonic()
+    results = asyncio.run(run())
+    assert time.monotonic() - started < 0.5
+    assert [r.text for r in results] == ["Goblin (zeta)", "Orc (zeta)", "Troll (zeta)", "ok"]
+    assert events[-1] == "mutate Rope"
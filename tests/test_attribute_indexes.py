@@ -0,0 +1,52 @@
+import sys
+import os
+
+# Add project root to python path so the src.dnd package resolves
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dnd.core.indexes import AttributeIndex, AttributeIndexCache
+
+MONSTERS = [
+    {"name": "Ogre", "challenge_rating": 2.0, "type": "giant", "hit_points": 59},
+    {"name": "Goblin", "challenge_rating": 0.25, "type": "humanoid", "hit_points": 7},
+    {"name": "Bugbear", "challenge_rating": 1.0, "type": "humanoid", "hit_points": 27},
+    {"name": "Wolf", "challenge_rating": 0.25, "type": "beast", "hit_points": 11},
+]
+
+def test_select_ranges_and_categories():
+    index = AttributeIndex(MONSTERS, order_key="challenge_rating",
+                           numeric=("hit_points",), categorical=("type",))
+
+    names = [r["name"] for r in index.select(ranges={"challenge_rating": (0, 1)})]
+    assert names == ["Goblin", "Wolf", "Bugbear"]
+
+    names = [r["name"] for r in index.select(
+        ranges={"hit_points": (10, None)}, equals={"type": "HUMANOID"})]
+    assert names == ["Bugbear"]
+
+    assert [r["name"] for r in index.select(contains={"type": "ian"})] == ["Ogre"]
+    assert index.select(ranges={"challenge_rating": (5, 10)}) == []
+
+    # Results are copies
+    index.select()[0]["name"] = "Changed"
+    assert index.rows[0]["name"] == "Goblin"
+
+def test_cache_rebuilds_on_new_generation():
+    cache = AttributeIndexCache()
+    builds = []
+
+    def builder():
+        builds.append(1)
+        return AttributeIndex(MONSTERS, order_key="challenge_rating")
+
+    first = cache.get_or_build("monsters", 1, builder)
+    assert cache.get_or_build("monsters", 1, builder) is first
+    assert len(builds) == 1
+
+    cache.get_or_build("monsters", 2, builder)
+    assert len(builds) == 2
+
+    # Incomplete indexes are retried on the next call
+    cache.get_or_build("partial", 1, lambda: AttributeIndex([], complete=False))
+    cache.get_or_build("partial", 1, builder)
+    assert len(builds) == 3
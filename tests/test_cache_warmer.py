@@ -0,0 +1,41 @@
+import sys
+import os
+
+# Add project root to python path so the src.dnd package resolves
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dnd.core.cache import APICache
+from src.dnd.core.http_client import ApiResponse
+from src.dnd.core.warmer import warm_cache
+
+class FakeClient:
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.urls = []
+
+    def get_json(self, url, cache=None, cache_key=None):
+        self.urls.append(url)
+        index = url.rsplit("/", 1)[-1]
+        if index in self.fail:
+            return ApiResponse(500)
+        if index == "spells":
+            return ApiResponse(200, {"results": [
+                {"index": f"s{i}", "name": f"Spell {i}"} for i in range(5)]})
+        return ApiResponse(200, {"index": index, "name": index.upper()})
+
+def test_warm_cache_batches_and_resumes(tmp_path):
+    cache = APICache(cache_dir=str(tmp_path))
+    batches = []
+
+    progress = warm_cache(cache, ["spells"], client=FakeClient(fail={"s3"}), batch_size=2,
+                          progress_callback=lambda p: batches.append(p.done))
+    assert progress.fetched == 5 and progress.failed == 1
+    assert cache.get("dnd_items_spells")["count"] == 5
+    assert cache.get("dnd_item_spells_s0") == {"index": "s0", "name": "S0"}
+    assert len(batches) >= 3
+
+    # A second run only fetches what is still missing
+    client = FakeClient()
+    progress = warm_cache(APICache(cache_dir=str(tmp_path)), ["spells"], client=client)
+    assert client.urls == ["https://www.dnd5eapi.co/api/spells/s3"]
+    assert progress.skipped == 4 and progress.fetched == 1
@@ -0,0 +1,55 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from core import state_manager
+from core.state_manager import ChatHistoryIndexer
+
+
+class FakeCollection:
+    def __init__(self):
+        self.upserted = []
+
+    def upsert(self, ids, documents, metadatas):
+        self.upserted.append(list(ids))
+
+
+def _msg(role, text):
+    return {"role": role, "parts": [text]}
+
+
+def test_only_new_messages_are_embedded(tmp_path, monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(state_manager, "get_chat_collection", lambda db_path=None: collection)
+    session_dir = str(tmp_path / "session_1")
+    os.makedirs(session_dir)
+
+    history = [_msg("user", "We enter the cave."), _msg("model", "A goblin leaps out!")]
+    indexer = ChatHistoryIndexer()
+    assert indexer.sync("unused", session_dir, history) == 2
+
+    history += [_msg("user", "I swing my axe."), _msg("model", "The goblin falls.")]
+    assert indexer.sync("unused", session_dir, history) == 2
+    assert indexer.sync("unused", session_dir, history) == 0
+
+    # The mark survives a restart
+    assert ChatHistoryIndexer().sync("unused", session_dir, history) == 0
+
+    # Undo, then a different reply: only the replaced position is embedded
+    history = history[:3] + [_msg("model", "The goblin dodges.")]
+    assert indexer.sync("unused", session_dir, history) == 1
+    assert [len(ids) for ids in collection.upserted] == [2, 2, 1]
+
+
+def test_save_chat_snapshot_indexes_in_background(tmp_path, monkeypatch):
+    collection = FakeCollection()
+    monkeypatch.setattr(state_manager, "get_chat_collection", lambda db_path=None: collection)
+    monkeypatch.setattr(state_manager, "get_current_session_dir", lambda: str(tmp_path))
+    monkeypatch.setattr(state_manager, "get_chat_history_path", lambda: str(tmp_path / "chat_history.json"))
+    monkeypatch.setattr(state_manager, "get_chroma_path", lambda: str(tmp_path / "chroma_db"))
+
+    state_manager.save_chat_snapshot([_msg("user", "Hello there, DM.")])
+    assert state_manager.chat_indexer.flush(timeout=5)
+    assert collection.upserted and len(collection.upserted[-1]) == 1
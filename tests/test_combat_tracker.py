@@ -0,0 +1,104 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import dm_utils
+import common_tools
+from core import campaign
+from core.database import close_all_connections
+
+
+def _setup_campaign(tmp_path, monkeypatch, name):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    return dm_utils.set_active_campaign(name)
+
+
+def test_combat_tracker_round_trip(tmp_path, monkeypatch):
+    token = _setup_campaign(tmp_path, monkeypatch, "arena")
+    try:
+        common_tools.initialize_combat([
+            {"name": "Goblin 1", "hp": 7, "max_hp": 7, "ac": 15, "initiative": 8},
+            {"name": "Goblin 2", "hp": 7, "max_hp": 7, "ac": 15, "initiative": 17},
+            {"name": "Ogre", "hp": 59, "max_hp": 59, "ac": 11},
+        ])
+        res = common_tools.track_combat_changes([
+            {"name": "goblin 1", "hp_change": -9},
+            {"name": "Goblin 2", "hp_change": -4, "conditions": ["Prone"]},
+            {"name": "Dragon", "hp_change": -4},
+        ])
+        assert "Goblin 1: 0/7 HP (down)" in res
+        assert "Dragon: not in combat." in res
+        common_tools.track_combat_change("Ogre", -10, "Enraged")
+
+        state = dm_utils.get_combat_state()
+        rows = [line for line in state.split("\n") if line.startswith("| ") and "Name" not in line and ":---" not in line]
+        # Initiative order, creatures without initiative last
+        assert rows == [
+            "| 17 | Goblin 2 | 3/7 | 15 | Prone |  |",
+            "| 8 | Goblin 1 | 0/7 | 15 |  |  |",
+            "|  | Ogre | 49/59 | 11 |  | Enraged |",
+        ]
+        # Nothing is written to the secrets file; it is rendered on read
+        _, secrets_log = dm_utils.get_log_paths()
+        assert not os.path.exists(secrets_log)
+
+        with open(secrets_log, "w") as f:
+            f.write("# DM Secrets\n\nThe innkeeper is a spy.\n")
+        secrets = dm_utils.read_campaign_log("secrets")
+        assert "The innkeeper is a spy." in secrets
+        assert "| Ogre | 49/59 |" in secrets
+
+        assert "cleared" in common_tools.end_combat()
+        assert dm_utils.get_combat_state() == "No active combat section found."
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+        close_all_connections()
+
+
+def test_legacy_combat_table_is_imported(tmp_path, monkeypatch):
+    token = _setup_campaign(tmp_path, monkeypatch, "legacy")
+    try:
+        _, secrets_log = dm_utils.get_log_paths()
+        with open(secrets_log, "w") as f:
+            f.write("# DM Secrets\n\n## Active Combat\n\n| Name | HP | AC | Notes |\n| :--- | :--- | :--- | :--- |\n"
+                    "| Bandit | 11/11 | 12 | Crossbow |\n\n## Clues\nThe map is fake.\n")
+
+        # Reading does not rewrite the file
+        assert "| Bandit | 11/11 | 12 | Crossbow |" in dm_utils.read_campaign_log("secrets")
+        with open(secrets_log) as f:
+            assert "## Active Combat" in f.read()
+
+        assert "Bandit: 6/11 HP" in common_tools.track_combat_change("Bandit", -5)
+
+        secrets = dm_utils.read_campaign_log("secrets")
+        assert "| Bandit | 6/11 | 12 |  | Crossbow |" in secrets
+        assert "The map is fake." in secrets
+        with open(secrets_log) as f:
+            assert "## Active Combat" not in f.read()
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+        close_all_connections()
+
+
+def test_legacy_combat_table_is_kept_when_tracker_has_a_fight(tmp_path, monkeypatch):
+    token = _setup_campaign(tmp_path, monkeypatch, "legacy_busy")
+    try:
+        common_tools.initialize_combat([{"name": "Wolf", "hp": 11, "max_hp": 11, "ac": 13}])
+        _, secrets_log = dm_utils.get_log_paths()
+        with open(secrets_log, "w") as f:
+            f.write("# DM Secrets\n\n## Active Combat\n\n| Name | HP | AC | Notes |\n| :--- | :--- | :--- | :--- |\n"
+                    "| Bandit | 11/11 | 12 | Crossbow |\n")
+
+        assert dm_utils.migrate_legacy_combat()
+        assert [c["name"] for c in dm_utils.get_combatants()] == ["Wolf"]
+        with open(secrets_log) as f:
+            assert "## Active Combat" not in f.read()
+        with open(os.path.join(os.path.dirname(secrets_log), "secrets_log.legacy_combat.md")) as f:
+            assert "| Bandit | 11/11 | 12 | Crossbow |" in f.read()
+        # One-time: nothing left to migrate
+        assert not dm_utils.migrate_legacy_combat()
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+        close_all_connections()
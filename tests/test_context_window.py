@@ -0,0 +1,56 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from core import context_window
+
+
+def _turns(start: int, count: int) -> list:
+    history = []
+    for i in range(start, start + count):
+        history.append({"role": "user", "parts": [f"Turn {i}: I search the room carefully."]})
+        history.append({"role": "model", "parts": [f"Turn {i}: You find a dusty lantern and a note."]})
+    return history
+
+
+def test_older_turns_fold_into_a_cached_running_summary(tmp_path, monkeypatch):
+    monkeypatch.setenv("DM_CONTEXT_TOKENS", "200")
+    folds = []
+
+    def fold(previous, transcript):
+        folds.append(transcript)
+        return (previous + " | " if previous else "") + f"{transcript.count('Players:')} turns"
+
+    history = _turns(0, 20)
+    window = context_window.build_window(history, "local", str(tmp_path), fold)
+    assert window.folded and window.synthetic == 2
+    assert window.messages[0]["parts"][0].startswith(context_window.SUMMARY_PREAMBLE)
+    assert window.messages[window.synthetic]["role"] == "user"
+    kept = window.messages[window.synthetic:]
+    assert sum(context_window.count_message_tokens(m, "local") for m in kept) <= 200
+    assert "Turn 0:" in folds[0] and "Turn 19:" not in folds[0]
+
+    # The session's history maps back to the full history for saving
+    session_history = window.messages + _turns(20, 1)
+    assert window.full_history(session_history) == history + _turns(20, 1)
+
+    # A rebuild within the fold batch reuses the summary without folding
+    history += _turns(20, 1)
+    context_window.build_window(history, "local", str(tmp_path), fold)
+    assert len(folds) == 1
+
+    # Past the batch only the newly folded turns are summarized
+    history += _turns(21, 6)
+    window = context_window.build_window(history, "local", str(tmp_path), fold)
+    assert len(folds) == 2
+    assert "Turn 0:" not in folds[1]
+    assert window.base == history[:len(window.base)]
+
+
+def test_short_history_is_kept_verbatim(tmp_path):
+    history = _turns(0, 3)
+    window = context_window.build_window(history, "google", str(tmp_path), lambda p, t: "unused")
+    assert not window.folded
+    assert window.messages == history
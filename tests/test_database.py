@@ -12,7 +12,7 @@ from unittest.mock import patch, MagicMock
 @pytest.fixture(scope="function")
 def mock_get_db_connection():
     """Creates a temp DB, initializes it, and patches get_db_path so all DB ops use it."""
-    from core.database import init_db
+    from core.database import init_db, close_all_connections
     
     fd, path = tempfile.mkstemp(suffix=".sqlite")
     
@@ -21,6 +21,7 @@ def mock_get_db_connection():
         init_db()  # Creates tables using the real code against the temp file
         yield path # Tests run here, picking up the patched path
         
+    close_all_connections()
     os.close(fd)
     os.remove(path)
 
@@ -96,3 +97,80 @@ def test_inventory_management(mock_get_db_connection):
     # Remove all
     res = manage_inventory("remove", item_name="Dagger", quantity=1, character_name="Vax")
     assert "Removed all Dagger" in res
+
+def test_connections_are_pooled_with_wal(mock_get_db_connection):
+    from core.database import get_db_connection
+    
+    with get_db_connection() as conn:
+        first = conn
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 5000
+        
+        # A nested checkout gets its own connection
+        with get_db_connection() as inner:
+            assert inner is not conn
+            
+    with get_db_connection() as conn:
+        assert conn is first
+
+def test_migrations_upgrade_legacy_database(tmp_path):
+    from core.database import run_migrations, get_schema_version, SCHEMA_VERSION
+    
+    conn = sqlite3.connect(str(tmp_path / "legacy.db"))
+    conn.row_factory = sqlite3.Row
+    # A pre-migration database: no context_buffer, duplicate inventory stacks
+    conn.execute("CREATE TABLE players (slack_id TEXT PRIMARY KEY, character_name TEXT NOT NULL)")
+    conn.execute("CREATE TABLE inventory (id INTEGER PRIMARY KEY AUTOINCREMENT, character_id TEXT NOT NULL, item_name TEXT NOT NULL, quantity INTEGER DEFAULT 1, weight REAL DEFAULT 0.0)")
+    conn.executemany("INSERT INTO inventory (character_id, item_name, quantity, weight) VALUES (?, ?, ?, ?)",
+                     [("U1", "Rope", 1, 10.0), ("U1", "Rope", 2, 5.0), ("U1", "Torch", 3, 1.0)])
+    conn.commit()
+    
+    assert run_migrations(conn) == SCHEMA_VERSION
+    assert run_migrations(conn) == SCHEMA_VERSION  # idempotent
+    
+    rows = {r["item_name"]: (r["quantity"], r["weight"]) for r in conn.execute("SELECT * FROM inventory")}
+    assert rows == {"Rope": (3, 5.0), "Torch": (3, 1.0)}
+    conn.execute("INSERT INTO context_buffer (author, content) VALUES ('Vax', 'hello')")
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO inventory (character_id, item_name) VALUES ('U1', 'Rope')")
+    conn.close()
+
+def test_bulk_inventory(mock_get_db_connection):
+    from core.players import register_player
+    from dm_utils import manage_inventory, manage_inventory_bulk
+    
+    register_player("U1", "Vax")
+    register_player("U2", "Keyleth")
+    
+    res = manage_inventory_bulk([
+        {"character_name": "vax", "item_name": "Gold Piece", "quantity": 50, "weight": 0.02},
+        ("Keyleth", "Potion of Healing", 2, 0.5, "add"),
+        ("Vax", "Gold Piece", 10, 0.02, "remove"),
+        ("Vax", "Rope", 1, 10.0, "remove"),
+        ("Grog", "Greataxe", 1, 7.0, "add"),
+    ])
+    assert "**vax**: +50x Gold Piece, -10x Gold Piece (remaining 40)" in res
+    assert "Vax does not have Rope" in res
+    assert "has 40x Gold Piece" in manage_inventory("check", item_name="Gold Piece", character_name="Vax")
+    assert "has 2x Potion of Healing" in manage_inventory("check", item_name="Potion of Healing", character_name="Keyleth")
+    # Unknown characters are auto-registered, like manage_inventory
+    assert "has 1x Greataxe" in manage_inventory("check", item_name="Greataxe", character_name="Grog")
+
+def test_identity_cache_serves_lookups_without_queries(mock_get_db_connection):
+    from core import players
+    from core.players import register_player, get_character_name, get_user_id_by_character_name
+    
+    register_player("U1", "Vex'ahlia")
+    get_character_name("U1")  # loads the map
+    
+    with patch("core.players.get_db_connection", side_effect=AssertionError("unexpected query")):
+        assert get_character_name("U1") == "Vex'ahlia"
+        assert get_character_name("U404") == "Unknown Hero"
+        assert get_user_id_by_character_name("  VEX'AHLIA ") == "U1"
+        assert get_user_id_by_character_name("ahlia") == "U1"
+        assert get_user_id_by_character_name("Scanlan") is None
+    
+    # Write-through on rename
+    register_player("U1", "Vex")
+    assert get_user_id_by_character_name("Vex'ahlia") is None
+    assert get_character_name("U1") == "Vex"
@@ -0,0 +1,94 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import json
+
+import dm_utils
+import llm_bridge
+from core import campaign
+from core.engine import GameEngine
+
+
+class FakeSession:
+    def __init__(self, history):
+        self.history = history
+
+
+def test_campaign_session_reused_until_inputs_change(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    built = []
+
+    def fake_get_chat_session(model_name, history, tools, system_instruction):
+        session = FakeSession(history)
+        built.append(session)
+        return session
+
+    monkeypatch.setattr(llm_bridge, "get_chat_session", fake_get_chat_session)
+    engine = GameEngine([])
+
+    token = dm_utils.set_active_campaign("alpha")
+    try:
+        first = engine.get_campaign_session("alpha")
+        assert engine.get_campaign_session("alpha") is first
+
+        # The engine's own history save keeps the session warm
+        with open(dm_utils.get_chat_history_path(), "w") as f:
+            json.dump([{"role": "user", "parts": ["hi"]}], f)
+        engine._remember_session("alpha", first)
+        assert engine.get_campaign_session("alpha") is first
+
+        # An external edit to the history (e.g. undo) forces a rebuild
+        with open(dm_utils.get_chat_history_path(), "w") as f:
+            json.dump([], f)
+        second = engine.get_campaign_session("alpha")
+        assert second is not first
+        assert second.history == []
+
+        # So does a prompt change or a registry/config change
+        with open(os.path.join(dm_utils.get_campaign_root(), "system_prompt.txt"), "w") as f:
+            f.write("You are a terse DM.")
+        third = engine.get_campaign_session("alpha")
+        assert third is not second
+
+        dm_utils.bump_config_generation()
+        assert engine.get_campaign_session("alpha") is not third
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+
+    assert len(built) == 4
+
+
+def test_system_instruction_memoized_on_file_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    token = dm_utils.set_active_campaign("beta")
+    try:
+        first = dm_utils.get_system_instruction()
+        builds = dm_utils.get_system_instruction_stats()["builds"]
+        assert dm_utils.get_system_instruction() == first
+        assert dm_utils.get_system_instruction_stats()["builds"] == builds
+
+        with open(os.path.join(dm_utils.get_campaign_root(), "system_prompt.txt"), "w") as f:
+            f.write("You are a grim DM.")
+        updated = dm_utils.get_system_instruction()
+        assert updated.startswith("You are a grim DM.")
+        stats = dm_utils.get_system_instruction_stats()
+        assert stats["builds"] == builds + 1
+        assert stats["bytes"] == len(updated.encode("utf-8"))
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+
+
+def test_tool_schemas_are_built_once_per_function():
+    def roll_dice(expression: str, advantage: bool = False) -> str:
+        """Rolls dice."""
+        return expression
+
+    first = llm_bridge.convert_to_anthropic_tool(roll_dice)
+    first["input_schema"]["properties"].clear()  # callers get their own copy
+    second = llm_bridge.convert_to_anthropic_tool(roll_dice)
+    assert second["input_schema"]["required"] == ["expression"]
+    assert set(second["input_schema"]["properties"]) == {"expression", "advantage"}
+    assert llm_bridge._anthropic_tool_schema.cache_info().hits >= 1
@@ -0,0 +1,50 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import dm_utils
+from core import campaign, event_log
+
+
+def test_views_catch_up_incrementally(tmp_path):
+    session_dir = str(tmp_path)
+    event_log.append_event("roll", "Vax rolled 1d20: 17", session_dir, total=17)
+    event_log.append_event("world_fact", "The bridge at Emon is out.", session_dir)
+
+    views = event_log.get_views(session_dir)
+    assert views["recent_rolls"] == ["Vax rolled 1d20: 17"]
+    assert views["world_facts"] == ["The bridge at Emon is out."]
+    offset = views["offset"]
+    assert offset == os.path.getsize(os.path.join(session_dir, event_log.EVENTS_FILENAME))
+
+    event_log.append_sections("## Party Status\nVax: 12/30 HP\n\n## World Updates\nNone\n", session_dir)
+    views = event_log.get_views(session_dir)
+    assert views["offset"] > offset
+    assert views["counts"] == {"roll": 1, "world_fact": 1, "section": 2, "meta": 1}
+    assert event_log.get_section("Party Status", session_dir) == "Vax: 12/30 HP"
+
+    # Views persist across processes and resume from the stored offset
+    event_log._views_cache.clear()
+    assert event_log.get_views(session_dir)["offset"] == views["offset"]
+
+
+def test_legacy_session_log_imported_once(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    token = dm_utils.set_active_campaign("gamma")
+    try:
+        session_log, _ = dm_utils.get_log_paths()
+        with open(session_log, "w") as f:
+            f.write("# Session Log\n\n## Summary\nThe party rested.\n\n## Party Status\nAll healthy.\n")
+
+        assert event_log.get_section("Party Status") == "All healthy."
+        assert event_log.get_section("Missing") is None
+        assert event_log.get_views()["counts"]["meta"] == 1
+
+        # The validator reads the view instead of the file
+        os.remove(session_log)
+        monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+        assert "All healthy." in dm_utils.validate_game_mechanic("I cast Fireball", "Vax")
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
@@ -0,0 +1,135 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import asyncio
+import time
+
+import llm_bridge
+
+
+class FakeSession:
+    def __init__(self, provider, history, tools=(), delay=0.0, fail=False, run_tool=None):
+        self.provider = provider
+        self.history = list(history)
+        self.delay = delay
+        self.fail = fail
+        self.run_tool = run_tool
+        self.tool_executor = llm_bridge.ToolExecutor(list(tools))
+        self.cancelled = False
+        self.received = []
+
+    def get_history(self):
+        return self.history
+
+    def send_message_stream(self, content, timeout=None):
+        self.received.append(list(content))
+        self.history.append({"role": "user", "parts": [content[0]]})
+        if self.run_tool:
+            # Like Claude/Ollama: tool rounds are not part of get_history()
+            self.tool_executor.run([self.run_tool])
+        if self.fail:
+            raise RuntimeError("503 UNAVAILABLE")
+        yield f"{self.provider} answers."
+        self.history.append({"role": "model", "parts": [f"{self.provider} answers."]})
+
+    async def send_message_stream_async(self, content, timeout=None):
+        self.history.append({"role": "user", "parts": [content[0]]})
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise RuntimeError("503 UNAVAILABLE")
+        yield f"{self.provider} answers."
+        self.history.append({"role": "model", "parts": [f"{self.provider} answers."]})
+
+
+def _patch_providers(monkeypatch, **behaviour):
+    opened = {}
+
+    def create_session(provider, history, tools, system_instruction):
+        opened[provider] = FakeSession(provider, history, tools, **behaviour.get(provider, {}))
+        return opened[provider]
+
+    monkeypatch.setattr(llm_bridge, "create_session", create_session)
+    monkeypatch.setattr(llm_bridge, "_failures", {})
+    monkeypatch.setattr(llm_bridge, "_latencies", {})
+    return opened
+
+
+def test_history_translates_between_provider_formats():
+    gemini_history = [
+        {"role": "user", "parts": [{"text": "I attack the goblin"}]},
+        {"role": "model", "parts": [{"function_call": {"name": "roll_dice", "args": {"expression": "1d20"}}}]},
+        {"role": "user", "parts": [{"function_response": {"name": "roll_dice", "response": {"result": "17"}}}]},
+        {"role": "model", "parts": [{"text": "You hit!"}]},
+    ]
+    messages = llm_bridge.history_messages(gemini_history + [{"role": "assistant", "parts": ["It flees."]}])
+    assert [m["role"] for m in messages] == ["user", "model", "user", "model"]
+    assert messages[1]["text"].startswith("[Tool call: roll_dice(")
+    assert "17" in messages[2]["text"]
+    assert messages[3]["text"] == "You hit!\n\nIt flees."
+
+    google = llm_bridge.to_google_history([{"role": "assistant", "parts": ["It flees."]}])
+    assert google == [{"role": "model", "parts": [{"text": "It flees."}]}]
+
+
+def test_failed_turn_continues_on_the_next_provider(monkeypatch):
+    opened = _patch_providers(monkeypatch, google={"fail": True})
+    history = [{"role": "user", "parts": [{"text": "Hello"}]}, {"role": "model", "parts": [{"text": "Welcome."}]}]
+    session = llm_bridge.FailoverChatSession(["google", "claude"], history, [], "You are a DM.")
+
+    assert session.send_message(["I open the door"]).text == "claude answers."
+    assert session.provider == "claude"
+    # The original history is kept as is; only the new turn comes from Claude
+    assert session.get_history() == history + [
+        {"role": "user", "parts": ["I open the door"]},
+        {"role": "model", "parts": ["claude answers."]},
+    ]
+    # New sessions skip the provider that just failed
+    assert llm_bridge.FailoverChatSession(["google", "claude"], history, [], "").provider == "claude"
+    assert opened["claude"].history[:2] == history
+
+
+def test_slow_first_token_is_hedged_on_the_next_provider(monkeypatch):
+    opened = _patch_providers(monkeypatch, google={"delay": 1.0}, claude={"delay": 0.05})
+    monkeypatch.setattr(llm_bridge, "HEDGE_REQUESTS", True)
+    monkeypatch.setattr(llm_bridge, "HEDGE_FLOOR_SECONDS", 0.1)
+    for _ in range(llm_bridge.HEDGE_MIN_SAMPLES):
+        llm_bridge.record_first_token("google", 0.05)
+    session = llm_bridge.FailoverChatSession(["google", "claude"], [], [], "")
+
+    async def turn():
+        return [d async for d in session.send_message_stream_async(["I sneak past"])]
+
+    started = time.monotonic()
+    deltas = asyncio.run(turn())
+    assert time.monotonic() - started < 0.6
+    assert deltas == ["claude answers."]
+    assert session.provider == "claude" and opened["google"].cancelled
+    assert session.get_history()[-1] == {"role": "model", "parts": ["claude answers."]}
+
+
+def test_tools_run_before_a_failure_are_not_run_again(monkeypatch):
+    added = []
+
+    def update_player_inventory(item_name: str) -> str:
+        added.append(item_name)
+        return f"Added {item_name}."
+
+    monkeypatch.setattr(llm_bridge.ToolExecutor, "_log_results", lambda self, results: None)
+    opened = _patch_providers(monkeypatch, claude={
+        "fail": True, "run_tool": ("update_player_inventory", {"item_name": "Rope"})})
+    session = llm_bridge.FailoverChatSession(["claude", "local"], [], [update_player_inventory], "")
+
+    assert session.send_message(["I take the rope"]).text == "local answers."
+    assert added == ["Rope"]
+    # The next provider gets the player's message and what already happened
+    sent = opened["local"].received[0]
+    assert sent[0] == "I take the rope"
+    assert "update_player_inventory" in sent[1] and "Added Rope." in sent[1]
+    assert opened["local"].history[:-2] == []
@@ -0,0 +1,69 @@
+import sys
+import os
+import json
+
+import pytest
+import requests
+
+# Add project root to python path so the src.dnd package resolves
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dnd.core.cache import APICache
+from src.dnd.core.http_client import CircuitOpenError, DnDAPIClient
+
+URL = "https://api.test/api/spells/fireball"
+
+def _response(status, body=None, headers=None):
+    response = requests.Response()
+    response.status_code = status
+    response._content = json.dumps(body).encode() if body is not None else b""
+    response.headers.update(headers or {})
+    return response
+
+class FakeSession:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.calls = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.calls.append(headers or {})
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+def test_revalidates_expired_entry_with_etag():
+    cache = APICache(ttl_hours=0, persistent=False, sweep_interval=None)
+    session = FakeSession(
+        _response(200, {"name": "Fireball"}, {"ETag": '"v1"'}),
+        _response(304))
+    client = DnDAPIClient(session=session, max_retries=0)
+
+    first = client.get_json(URL, cache=cache, cache_key="k")
+    assert first.data == {"name": "Fireball"} and not first.from_cache
+    cache.set("k", {"name": "Fireball", "source": "D&D 5e API"}, validators=first.validators)
+
+    # The entry is already expired (ttl 0), so the next fetch is conditional
+    second = client.get_json(URL, cache=cache, cache_key="k")
+    assert session.calls[1] == {"If-None-Match": '"v1"'}
+    assert second.from_cache and not second.stale
+    assert second.data["source"] == "D&D 5e API"
+    assert client.stats()["not_modified"] == 1
+
+def test_circuit_opens_and_serves_stale(monkeypatch):
+    monkeypatch.setattr("time.sleep", lambda _s: None)
+    cache = APICache(ttl_hours=0, persistent=False, sweep_interval=None)
+    cache.set("k", {"name": "cached"})
+    failure = requests.exceptions.ConnectionError("down")
+    session = FakeSession(failure, failure)
+    client = DnDAPIClient(session=session, max_retries=1, failure_threshold=2)
+
+    # Both attempts fail; the expired copy is served instead of an error
+    result = client.get_json(URL, cache=cache, cache_key="k")
+    assert result.stale and result.data == {"name": "cached"}
+
+    # The circuit is now open, so no request is sent at all
+    with pytest.raises(CircuitOpenError):
+        client.get(URL)
+    assert len(session.calls) == 2
+    assert client.stats()["circuits"]["api.test"] == "open"
@@ -0,0 +1,146 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+from types import SimpleNamespace
+
+import dm_utils
+import llm_bridge
+
+
+def roll_dice(expression: str) -> str:
+    """Rolls dice, e.g. 1d20+3."""
+    return "17"
+
+
+def look_up(name: str) -> str:
+    """Looks up a rule."""
+    return name
+
+
+class FakeCaches:
+    def __init__(self):
+        self.created, self.updated, self.deleted = [], [], []
+        self.fail = None
+
+    def create(self, model, config):
+        # Network calls must not hold up other campaigns' requests
+        assert not llm_bridge._cache_lock.locked()
+        if self.fail:
+            raise RuntimeError(self.fail)
+        self.created.append(config)
+        return SimpleNamespace(name=f"cachedContents/{len(self.created)}")
+
+    def update(self, name, config):
+        assert not llm_bridge._cache_lock.locked()
+        self.updated.append(name)
+
+    def delete(self, name):
+        assert not llm_bridge._cache_lock.locked()
+        self.deleted.append(name)
+
+
+def test_claude_requests_mark_the_stable_prefix():
+    session = llm_bridge.ClaudeChatSession(
+        "test-key", "claude-test", [{"role": "user", "parts": ["Hello"]}, {"role": "model", "parts": ["Welcome."]}],
+        [roll_dice, look_up], "You are a DM."
+    )
+    session._add_user_turn(["I roll to hit"])
+    request = session._request()
+
+    assert "cache_control" not in request["tools"][0]
+    assert request["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert request["system"] == [{"type": "text", "text": "You are a DM.", "cache_control": {"type": "ephemeral"}}]
+    assert request["messages"][-1]["content"][0]["cache_control"] == {"type": "ephemeral"}
+    assert request["messages"][:-1] == session.messages[:-1]
+    # The stored conversation is left untouched
+    assert session.messages[-1]["content"] == "I roll to hit\n"
+
+    session._record_tool_results([SimpleNamespace(id="toolu_1")], [llm_bridge.ToolResult("roll_dice", {}, "17")])
+    last = session._request()["messages"][-1]["content"]
+    assert last[0]["tool_use_id"] == "toolu_1" and last[0]["cache_control"] == {"type": "ephemeral"}
+    assert "cache_control" not in session.messages[-1]["content"][0]
+
+
+def test_gemini_cache_is_shared_extended_and_replaced(monkeypatch):
+    monkeypatch.setattr(llm_bridge, "_gemini_caches", {})
+    monkeypatch.setattr(llm_bridge, "_gemini_cache_slots", {})
+    monkeypatch.setattr(llm_bridge, "_gemini_cache_busy", set())
+    monkeypatch.setattr(llm_bridge, "_gemini_cache_retry", {})
+    monkeypatch.setattr(llm_bridge, "_cache_stats", {})
+    session = llm_bridge.GoogleChatSession("test-key", "gemini-test", [], [roll_dice], "You are a DM.")
+    caches = FakeCaches()
+    client = SimpleNamespace(_api_client=session.client._api_client, caches=caches)
+
+    def cached(system, tools=(roll_dice,)):
+        return llm_bridge.gemini_cached_content(client, "gemini-test", system, list(tools), None)
+
+    token = dm_utils.set_active_campaign("camp_a")
+    try:
+        name = cached("You are a DM.")
+        assert name == "cachedContents/1" and cached("You are a DM.") == name
+        assert caches.created[0].system_instruction == "You are a DM."
+        assert caches.created[0].tools[0].function_declarations[0].name == "roll_dice"
+
+        # Close to expiry: the TTL is extended instead of creating a new cache
+        monkeypatch.setattr(llm_bridge, "GEMINI_CACHE_REFRESH_SECONDS", llm_bridge.GEMINI_CACHE_TTL + 1)
+        assert cached("You are a DM.") == name and caches.updated == [name]
+        monkeypatch.setattr(llm_bridge, "GEMINI_CACHE_REFRESH_SECONDS", 300)
+
+        # A skill file changed: a new cache replaces the old one
+        assert cached("You are a DM. Skills: stealth.") == "cachedContents/2"
+        assert caches.deleted == [name]
+        assert cached("You are a DM. Skills: stealth.", tools=(roll_dice, look_up)) == "cachedContents/3"
+
+        # Prompts the API refuses to cache are sent inline and not retried
+        caches.fail = "400 INVALID_ARGUMENT. Cached content is too small"
+        assert cached("Short prompt") is None
+        caches.fail = None
+        assert cached("Short prompt") is None
+        assert len(caches.created) == 3
+
+        # Transient failures are retried once the backoff has passed
+        caches.fail = "503 UNAVAILABLE"
+        assert cached("Busy prompt") is None
+        caches.fail = None
+        assert cached("Busy prompt") is None and len(caches.created) == 3
+        key, retry_at = next(iter(llm_bridge._gemini_cache_retry.items()))
+        llm_bridge._gemini_cache_retry[key] = retry_at - llm_bridge.GEMINI_CACHE_RETRY_SECONDS
+        assert cached("Busy prompt") == "cachedContents/4"
+        assert llm_bridge._gemini_cache_retry == {}
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+
+    llm_bridge.record_cache_usage("google", 3000, 4000)
+    llm_bridge.record_cache_usage("google", 0, 1000)
+    assert llm_bridge.cache_hit_rates() == {"google": 0.6}
+
+
+def test_uncached_gemini_function_calls_go_through_the_tool_executor(monkeypatch):
+    from google.genai import types
+
+    monkeypatch.setattr(llm_bridge, "PROMPT_CACHING", False)
+    monkeypatch.setattr(llm_bridge.ToolExecutor, "_log_results", lambda self, results: None)
+    session = llm_bridge.GoogleChatSession("test-key", "gemini-test", [], [roll_dice], "You are a DM.")
+    replies = [
+        types.Part.from_function_call(name="roll_dice", args={"expression": "1d20"}),
+        types.Part.from_text(text="You hit.")
+    ]
+    requests = []
+
+    def generate(model, contents, config=None):
+        requests.append(contents)
+        return types.GenerateContentResponse(candidates=[
+            types.Candidate(content=types.Content(role="model", parts=[replies.pop(0)]))
+        ])
+
+    monkeypatch.setattr(session.client.models, "_generate_content_with_continuation", generate)
+    executed = []
+    run = session.tool_executor.run
+    monkeypatch.setattr(session.tool_executor, "run", lambda calls: executed.extend(calls) or run(calls))
+
+    assert session.send_message(["I attack"]).text == "You hit."
+    assert executed == [("roll_dice", {"expression": "1d20"})]
+    assert len(requests) == 2
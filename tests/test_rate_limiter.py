@@ -0,0 +1,91 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core import rate_limiter, streaming
+
+
+def test_interactive_requests_jump_ahead_of_background_work():
+    controller = rate_limiter.AdmissionController("test/model", rpm=600, tpm=0)
+    controller.requests.drain()
+    order = []
+
+    async def request(name, priority, delay):
+        await asyncio.sleep(delay)
+        await controller.acquire_async(100, priority)
+        order.append(name)
+
+    async def run():
+        await asyncio.gather(
+            request("summary", rate_limiter.BACKGROUND, 0),
+            request("image", rate_limiter.BACKGROUND, 0),
+            request("mention", rate_limiter.INTERACTIVE, 0.02),
+        )
+
+    started = time.monotonic()
+    asyncio.run(run())
+    # 10 requests/s from an empty bucket: paced, not bursted
+    assert time.monotonic() - started >= 0.25
+    assert order == ["mention", "summary", "image"]
+
+
+def test_token_budget_paces_requests_and_reports_backpressure(monkeypatch):
+    controller = rate_limiter.AdmissionController("test/model", rpm=0, tpm=60000)
+    controller.acquire(60000)
+    depth, wait = controller.backlog(tokens=500)
+    assert depth == 0 and 0.4 < wait <= 0.6
+
+    started = time.monotonic()
+    controller.acquire(300)
+    assert 0.2 < time.monotonic() - started < 0.6
+
+    monkeypatch.setitem(rate_limiter._controllers, ("google", "busy-model"), controller)
+    monkeypatch.setattr(rate_limiter, "NOTICE_AFTER_SECONDS", 0.01)
+    controller.penalize()
+    notice = rate_limiter.backpressure_notice("google", "busy-model")
+    assert notice and "queued" in notice
+
+    # Adapters show the notice in place of the placeholder until text arrives
+    buffer = streaming.StreamBuffer(limit=200)
+    buffer.add(streaming.StatusUpdate(notice))
+    assert buffer.pages()[0].startswith(notice)
+    buffer.add("The gate opens.")
+    assert buffer.pages(final=True) == ["The gate opens."]
+
+
+def test_single_provider_rate_limits_reach_the_engine(monkeypatch):
+    import llm_bridge
+    from core.engine import GameEngine
+
+    class Messages:
+        def __init__(self, error):
+            self.error = error
+
+        def stream(self, **request):
+            raise self.error
+
+    session = llm_bridge.ClaudeChatSession("test-key", "claude-test", [], [], "You are a DM.")
+    session.client = SimpleNamespace(messages=Messages(RuntimeError("invalid x-api-key")))
+    assert session.send_message(["Hello"]).text == "Claude Error: invalid x-api-key"
+
+    # A 429 is raised even without failover, so the engine can slow every campaign down
+    error = RuntimeError("Error code: 429 - rate_limit_error")
+    session.client = SimpleNamespace(messages=Messages(error))
+    with pytest.raises(RuntimeError):
+        session.send_message(["Hello"])
+
+    engine = GameEngine([])
+    engine.provider, engine.model_name = "claude", "claude-test"
+    controller = rate_limiter.get_controller("claude", "claude-test")
+    penalized = []
+    monkeypatch.setattr(controller, "penalize", lambda: penalized.append(True))
+    assert engine._handle_llm_error("camp", error, 0, 3) == (0, None)
+    assert penalized == [True]
@@ -0,0 +1,95 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import asyncio
+import json
+import time
+
+import dm_utils
+import llm_bridge
+from core import campaign, engine as engine_module, state_manager
+from core.engine import GameEngine
+from core.scheduler import TurnScheduler
+
+
+class SlowSession:
+    calls = []
+
+    def __init__(self, history):
+        self.history = list(history)
+
+    async def send_message_async(self, content, timeout=None):
+        SlowSession.calls.append(content[0])
+        reply = f"Reply {len(SlowSession.calls)}"
+        self.history.append({"role": "user", "parts": [content[0]]})
+        await asyncio.sleep(0.2)
+        self.history.append({"role": "model", "parts": [reply]})
+        return llm_bridge.MockResponse(reply)
+
+
+def _engine(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    monkeypatch.setattr(dm_utils, "get_campaign_for_channel", lambda platform, channel: f"camp_{channel}")
+    monkeypatch.setattr(engine_module, "is_allowed", lambda **kwargs: True)
+    monkeypatch.setattr(state_manager.chat_indexer, "submit", lambda *args: None)
+    monkeypatch.setattr(llm_bridge, "get_chat_session",
+                        lambda model_name, history, tools, system_instruction: SlowSession(history))
+    SlowSession.calls = []
+    return GameEngine([])
+
+
+def test_burst_is_coalesced_and_no_turn_is_lost(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, monkeypatch)
+
+    def turn(channel, text):
+        return engine.process_message_async("U1", "Vex", text, "slack", channel_id=channel)
+
+    async def burst():
+        first = asyncio.ensure_future(turn("a", "I open the chest"))
+        while not SlowSession.calls:
+            await asyncio.sleep(0.01)
+        # Arrive while the first turn is in flight
+        rest = [turn("a", f"I shout {n}") for n in range(3)] + [turn("b", "I wait")]
+        return await asyncio.gather(first, *rest)
+
+    started = time.monotonic()
+    replies = asyncio.run(burst())
+    elapsed = time.monotonic() - started
+
+    # Campaign a: the in-flight turn, then one turn answering the whole burst,
+    # led by the message that arrived first
+    assert replies[0] == "Reply 1"
+    assert replies[2:4] == [None, None]
+    assert replies[1] is not None and replies[4] is not None
+    assert len(SlowSession.calls) == 3
+    burst_prompt = [c for c in SlowSession.calls if "I shout 0" in c][0]
+    assert burst_prompt.index("I shout 0") < burst_prompt.index("I shout 1") < burst_prompt.index("I shout 2")
+    # Campaign b ran alongside campaign a
+    assert elapsed < 0.6
+
+    token = dm_utils.set_active_campaign("camp_a")
+    try:
+        with open(dm_utils.get_chat_history_path()) as f:
+            saved = json.load(f)
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+    assert [m["role"] for m in saved] == ["user", "model", "user", "model"]
+    assert "I open the chest" in saved[0]["parts"][0]
+
+
+def test_queued_turns_are_answered_in_arrival_order(tmp_path, monkeypatch):
+    engine = _engine(tmp_path, monkeypatch)
+    engine.scheduler = TurnScheduler(coalesce=False)
+
+    async def burst():
+        return await asyncio.gather(*[
+            engine.process_message_async("U1", "Vex", f"I step {n}", "slack", channel_id="a") for n in range(4)
+        ])
+
+    replies = asyncio.run(burst())
+    assert replies == ["Reply 1", "Reply 2", "Reply 3", "Reply 4"]
+    assert [next(f"I step {n}" for n in range(4) if f"I step {n}" in c) for c in SlowSession.calls] == \
+        ["I step 0", "I step 1", "I step 2", "I step 3"]
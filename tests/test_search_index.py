@@ -0,0 +1,57 @@
+import sys
+import os
+
+# Add project root to python path so the src.dnd package resolves
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dnd.core.cache import APICache
+from src.dnd.core.search_index import FullTextIndex
+
+FIREBALL = {"index": "fireball", "name": "Fireball", "desc": ["A bright streak flashes to a point and blossoms into flame."]}
+FIRE_BOLT = {"index": "fire-bolt", "name": "Fire Bolt", "desc": ["You hurl a mote of fire at a creature."]}
+
+def test_index_follows_cache_writes(tmp_path):
+    cache = APICache(persistent=False)
+    index = FullTextIndex(str(tmp_path / "search_index.json"))
+    index.attach(cache)
+
+    cache.set("dnd_items_spells", {"category": "spells", "items": [
+        {"name": "Fireball", "index": "fireball"}, {"name": "Fire Bolt", "index": "fire-bolt"}]})
+    assert len(index) == 2
+    assert index.search(["flame"]) == []
+
+    # Details replace the name-only entry and make the description searchable
+    cache.set("dnd_item_spells_fireball", FIREBALL)
+    cache.set("dnd_item_spells_fire-bolt", FIRE_BOLT)
+    assert [m["index"] for m in index.search(["flame"])] == ["fireball"]
+
+    # Prefix expansion plus a name hit ranks Fire Bolt first for "fire bolt"
+    ranked = index.search(["fire", "bolt"])
+    assert [m["index"] for m in ranked] == ["fire-bolt", "fireball"]
+
+    cache.clear()
+    assert len(index) == 0
+
+def test_index_persists(tmp_path):
+    path = str(tmp_path / "search_index.json")
+    index = FullTextIndex(path)
+    index.add_details("spells", FIREBALL)
+    index.save()
+
+    loaded = FullTextIndex.load(path)
+    assert len(loaded) == 1
+    assert loaded.search(["blossoms"])[0]["name"] == "Fireball"
+    assert loaded.search(["bloss"], categories=["monsters"]) == []
+
+def test_save_soon_debounces_writes(tmp_path):
+    path = tmp_path / "search_index.json"
+    index = FullTextIndex(str(path))
+    index.add_details("spells", FIREBALL)
+    index.save_soon(delay=0.2)
+    index.add_details("spells", FIRE_BOLT)
+    index.save_soon(delay=0.2)
+    assert not path.exists()
+
+    index._save_timer.join(timeout=2)
+    assert len(FullTextIndex.load(str(path))) == 2
+    assert index._save_timer is None
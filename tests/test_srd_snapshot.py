@@ -0,0 +1,54 @@
+import sys
+import os
+import json
+import tarfile
+
+# Add project root to python path so the src.dnd package resolves
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.dnd.core.snapshot import SRDSnapshot, load_snapshot
+
+SPELLS = [
+    {"index": "fireball", "name": "Fireball", "level": 3, "school": {"name": "Evocation"}, "url": "/api/2014/spells/fireball"},
+    {"index": "light", "name": "Light", "level": 0, "school": {"name": "Evocation"}, "url": "/api/2014/spells/light"},
+]
+GOBLIN = {"index": "goblin", "name": "Goblin", "challenge_rating": 0.25, "url": "/api/monsters/goblin"}
+
+def _write_dump(root):
+    os.makedirs(os.path.join(root, "monsters"), exist_ok=True)
+    with open(os.path.join(root, "5e-SRD-Spells.json"), "w") as f:
+        json.dump(SPELLS, f)
+    with open(os.path.join(root, "monsters", "goblin.json"), "w") as f:
+        json.dump(GOBLIN, f)
+
+def test_ingest_directory(tmp_path):
+    dump = tmp_path / "dump"
+    _write_dump(str(dump))
+    out = str(tmp_path / "srd.sqlite3")
+
+    snapshot = SRDSnapshot.ingest(str(dump), out)
+
+    assert snapshot.categories() == ["monsters", "spells"]
+    listing = snapshot.get_category_items("spells")
+    assert listing["count"] == 2
+    assert [i["index"] for i in listing["items"]] == ["fireball", "light"]
+    assert snapshot.get_item("spells", "fireball")["level"] == 3
+    assert snapshot.get_item("monsters", "goblin")["name"] == "Goblin"
+    assert snapshot.get_item("spells", "wish") is None
+    assert snapshot.get_category_items("feats") is None
+
+def test_ingest_tarball_matches_directory_version(tmp_path):
+    dump = tmp_path / "dump"
+    _write_dump(str(dump))
+    archive = str(tmp_path / "srd.tar.gz")
+    with tarfile.open(archive, "w:gz") as tar:
+        tar.add(str(dump), arcname="5e-database")
+
+    from_dir = SRDSnapshot.ingest(str(dump), str(tmp_path / "a.sqlite3"))
+    from_tar = SRDSnapshot.ingest(archive, str(tmp_path / "b.sqlite3"))
+
+    assert from_tar.categories() == from_dir.categories()
+    assert from_tar.version == from_dir.version
+
+def test_load_snapshot_missing(tmp_path):
+    assert load_snapshot(str(tmp_path / "nope.sqlite3")) is None
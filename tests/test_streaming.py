@@ -0,0 +1,60 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import json
+
+import dm_utils
+import llm_bridge
+from core import campaign, engine as engine_module, state_manager, streaming
+from core.engine import GameEngine
+
+
+class FakeStreamingSession:
+    def __init__(self, history):
+        self.history = list(history)
+
+    def send_message_stream(self, content, timeout=None):
+        self.history.append({"role": "user", "parts": [content[0]]})
+        for delta in ["The door ", "creaks ", "open."]:
+            yield delta
+        self.history.append({"role": "model", "parts": ["The door creaks open."]})
+
+
+def test_stream_buffer_pages_and_throttles():
+    buffer = streaming.StreamBuffer(limit=30, interval=60)
+    assert buffer.pages() == [streaming.PLACEHOLDER + streaming.TYPING_CURSOR]
+    buffer.add("First paragraph here.\n\nSecond paragraph is longer.")
+    # Within the interval after a render, no edit is due
+    assert not buffer.due()
+    pages = buffer.pages(final=True)
+    assert pages == ["First paragraph here.", "Second paragraph is longer."]
+
+    posted, calls = [], []
+    streaming.render_pages(["a"], posted, lambda t: calls.append(("post", t)) or len(calls), lambda h, t: calls.append(("edit", h, t)))
+    streaming.render_pages(["ab", "c"], posted, lambda t: calls.append(("post", t)) or len(calls), lambda h, t: calls.append(("edit", h, t)))
+    assert calls == [("post", "a"), ("edit", 1, "ab"), ("post", "c")]
+
+
+def test_process_message_stream_yields_deltas_and_saves_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    monkeypatch.setattr(dm_utils, "get_campaign_for_channel", lambda platform, channel: "delta")
+    monkeypatch.setattr(engine_module, "is_allowed", lambda **kwargs: True)
+    monkeypatch.setattr(state_manager.chat_indexer, "submit", lambda *args: None)
+    monkeypatch.setattr(llm_bridge, "get_chat_session",
+                        lambda model_name, history, tools, system_instruction: FakeStreamingSession(history))
+    engine = GameEngine([])
+
+    deltas = list(engine.process_message_stream("U1", "Vex", "I open the door", "discord", channel_id="C1"))
+    assert deltas == ["The door ", "creaks ", "open."]
+
+    token = dm_utils.set_active_campaign("delta")
+    try:
+        with open(dm_utils.get_chat_history_path()) as f:
+            saved = json.load(f)
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+    assert saved[-1] == {"role": "model", "parts": ["The door creaks open."]}
+    assert "I open the door" in saved[-2]["parts"][0]
@@ -0,0 +1,53 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import threading
+
+from core import summarizer
+
+
+def _log_lines(entries: int) -> list:
+    lines = []
+    for i in range(entries):
+        lines += [f"[2024-01-01 20:{i % 60:02d}:00] Entry {i}: the party presses on into the dark.\n", "\n"]
+    return lines
+
+
+def test_chunks_are_bounded_and_lossless():
+    lines = _log_lines(200) + ["x" * 5000 + "\n"]
+    chunks = list(summarizer.iter_chunks(lines, max_tokens=100))
+    assert len(chunks) > 1
+    assert all(len(chunk.encode("utf-8")) <= 400 for chunk in chunks)
+    assert "".join(chunks) == "".join(lines)
+    # Chunks end on entry boundaries
+    assert all(chunk.endswith("\n\n") for chunk in chunks if "x" * 10 not in chunk)
+
+
+def test_rerun_only_summarizes_the_tail(tmp_path):
+    calls = []
+    lock = threading.Lock()
+
+    def summarize_chunk(chunk, index, total):
+        with lock:
+            calls.append(index)
+        return f"notes {index}"
+
+    def reduce_notes(text, from_notes):
+        assert from_notes
+        return f"## Previously on...\n{text}"
+
+    lines = _log_lines(100)
+    summary = summarizer.map_reduce_summary(lines, summarize_chunk, reduce_notes, str(tmp_path),
+                                            salt="test", max_tokens=200)
+    total = len(calls)
+    assert total > 2
+    assert summary.index("notes 0") < summary.index(f"notes {total - 1}")
+
+    calls.clear()
+    lines += ["[2024-01-01 21:00:00] A dragon arrives.\n", "\n"]
+    summarizer.map_reduce_summary(lines, summarize_chunk, reduce_notes, str(tmp_path),
+                                  salt="test", max_tokens=200)
+    assert calls == [total - 1]
@@ -0,0 +1,77 @@
+import sys
+import os
+
+# Add src to python path for testing
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../src')))
+
+import time
+import asyncio
+import threading
+
+import dm_utils
+import llm_bridge
+from core import campaign
+
+
+def test_independent_calls_run_concurrently_and_mutations_stay_ordered(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    events = []
+    lock = threading.Lock()
+
+    @llm_bridge.declare_tool(side_effects=False)
+    def lookup_monster(monster_name: str) -> str:
+        time.sleep(0.2)
+        with lock:
+            events.append(f"lookup {monster_name}")
+        return f"{monster_name} ({dm_utils.active_campaign_ctx.get()})"
+
+    def manage_inventory(item_name: str) -> str:
+        with lock:
+            events.append(f"mutate {item_name}")
+        return "ok"
+
+    @llm_bridge.declare_tool(side_effects=False, timeout=0.05)
+    def slow_rule(query: str) -> str:
+        time.sleep(0.3)
+        return query
+
+    executor = llm_bridge.ToolExecutor([lookup_monster, manage_inventory, slow_rule])
+    calls = [("lookup_monster", {"monster_name": n}) for n in ("Goblin", "Orc", "Troll", "Ogre")]
+    calls += [("manage_inventory", {"item_name": "Rope"}), ("slow_rule", {"query": "grapple"}), ("missing", {})]
+
+    token = dm_utils.set_active_campaign("epsilon")
+    try:
+        started = time.monotonic()
+        results = executor.run(calls)
+        elapsed = time.monotonic() - started
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+
+    assert elapsed < 0.7
+    assert [r.text for r in results[:4]] == ["Goblin (epsilon)", "Orc (epsilon)", "Troll (epsilon)", "Ogre (epsilon)"]
+    # The mutation waited for the lookups before it
+    assert events[-1] == "mutate Rope" and len(events) == 5
+    assert results[4].text == "ok"
+    assert "timed out" in results[5].text
+    assert results[6].text == "Error: Tool missing not found."
+
+
+def test_mutations_are_never_reported_as_timed_out(tmp_path, monkeypatch):
+    monkeypatch.setattr(campaign, "CAMPAIGNS_DIR", str(tmp_path))
+    applied = []
+
+    @llm_bridge.declare_tool(timeout=0.05)
+    def update_player_inventory(item_name: str) -> str:
+        time.sleep(0.2)
+        applied.append(item_name)
+        return "added"
+
+    executor = llm_bridge.ToolExecutor([update_player_inventory])
+    calls = [("update_player_inventory", {"item_name": "Rope"})]
+    token = dm_utils.set_active_campaign("zeta")
+    try:
+        assert executor.run(calls)[0].text == "added"
+        assert asyncio.run(executor.run_async(calls))[0].text == "added"
+    finally:
+        dm_utils.active_campaign_ctx.reset(token)
+    assert applied == ["Rope", "Rope"]